@@ -103,6 +103,68 @@ else:
     }
 
 
+# Кэш результатов проверки html: "lru" в памяти процесса, "django" через django.core.cache
+# или "file" с OPTIONS {"directory": ..., "maxsize": ...}
+CHECK_RESULT_CACHE = {
+    "BACKEND": "lru",
+    "OPTIONS": {"maxsize": 128},
+}
+
+# Свернутые тэги результата (без ошибок) отрисовываются без содержимого, оно подгружается при раскрытии.
+# Результат берется из CHECK_RESULT_CACHE, при нескольких процессах нужен общий кэш ("django" или "file")
+CHECK_RESULT_LAZY_RENDER = False
+
+# Каждая проверка из форм и api/check/ сохраняется в бд: снимок html, итоги и найденные ошибки (form_checker.models).
+# Запись идет в потоке запроса и добавляет к каждой проверке время бд, ошибки бд только пишутся в лог
+CHECK_HISTORY_ENABLED = False
+
+# Повторная проверка страницы берет ошибки неизменившихся поддеревьев из прошлой проверки в истории.
+# Нужен CHECK_HISTORY_ENABLED. Каждая проверка страницы по url считает отпечатки всех поддеревьев,
+# это дороже, чем проверка пресетов из этого репозитория, поэтому выключено
+CHECK_INCREMENTAL = False
+
+# Проверки из формы ставятся в очередь (form_checker.models.CheckJob), страница результата ждет обработчика.
+# Обработчики запускаются отдельно: python manage.py run_check_workers --processes N
+CHECK_JOBS_FOR_FORMS = False
+
+# Не больше стольких одновременных потоков событий задач (api/jobs/<id>/events/) в процессе: каждый держит
+# поток сервера до 5 минут. Остальным клиентам отвечает 503, и они опрашивают api/jobs/<id>/
+CHECK_JOB_EVENTS_MAX_STREAMS = 8
+
+# Разбор и проверка html в пуле из стольких процессов, запущенных при первой проверке. 0 - в потоке запроса.
+# Разбор и валидаторы держат GIL, без пула одновременные проверки больших страниц выполняются по очереди
+CHECK_PROCESS_POOL_WORKERS = 0
+
+# Профиль каждой проверки: время этапов (загрузка, разбор, заполнение, проверка...), поиска элементов полей
+# и проверок тэгов. Показывается на странице результата, отдается в api/check/ и пишется в лог
+# form_checker.form_checker.checker, в extra["check_profile"] - целиком. Выключенный почти ничего не стоит
+CHECK_PROFILING = False
+
+# Метрики проверок в формате Prometheus на /metrics: проверки и ошибки по пресетам, время этапов, неудачные загрузки,
+# попадания в кэш. При нескольких процессах (passenger, run_check_workers) нужен общий каталог, каждый процесс
+# пишет туда свой файл. Каталог стоит очищать при деплое, None - метрики только процесса, отдавшего /metrics
+CHECK_METRICS_ENABLED = False
+CHECK_METRICS_DIRECTORY = None
+# Процесс записывает метрики в свой файл в CHECK_METRICS_DIRECTORY не сразу, а через столько секунд после события
+CHECK_METRICS_FLUSH_INTERVAL = 5
+# /metrics отдается только с заголовком "Authorization: Bearer <CHECK_METRICS_TOKEN>" или адресам из
+# CHECK_METRICS_ALLOWED_IPS. За прокси REMOTE_ADDR - адрес прокси, тогда нужен токен
+CHECK_METRICS_TOKEN = os.environ.get("CHECK_METRICS_TOKEN")
+CHECK_METRICS_ALLOWED_IPS = []
+
+# Страница для проверки загружается по частям и не больше стольких байт после распаковки gzip/deflate/br,
+# ответы с Content-Type не html отклоняются до чтения тела
+CHECK_FETCH_MAX_BYTES = 10 * 1024 * 1024
+
+# Страница для проверки с парсером lxml разбирается по частям во время загрузки, а загрузка прекращается,
+# как только все тэги пресета найдены и закрыты. Это возможно только для пресетов без списков (many=True),
+# get_element и validate самого пресета, остальные пресеты (в том числе все пресеты этого репозитория)
+# проверяются как обычно. Разбор и проверка идут в потоке запроса без CHECK_PROCESS_POOL_WORKERS, результат
+# ищется в кэше по хэшу загруженной части. Проверки страниц, загруженных не целиком, не сохраняются в историю.
+# Только для синхронной проверки, асинхронная загружает страницу целиком
+CHECK_STREAM_PAGES = False
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,137 @@
+import random
+from dataclasses import dataclass
+from html import escape
+
+# поля форм, которые проверяют пресеты: тэг, имя, атрибуты без ошибок и атрибуты с ошибкой
+FIELDS = (
+    ("input", "first_name", {"type": "text", "pattern": r"^[\p{L}]{2,}$", "required": ""}, {"type": "email"}),
+    ("input", "last_name", {"type": "text", "pattern": r"^[\p{L}]{2,}$", "required": ""}, {"type": "text"}),
+    ("input", "email", {"type": "email", "required": ""}, {"type": "text", "required": ""}),
+    ("input", "phone", {"type": "tel"}, {"type": "text"}),
+    ("input", "password", {"type": "hidden", "required": ""}, {"type": "password"}),
+    ("input", "phonecc", {"type": "hidden", "value": "+1"}, {"type": "text", "value": "+1"}),
+    ("input", "aff_sub", {"type": "hidden", "value": "{subid}"}, {"type": "hidden", "value": ""}),
+    ("input", "ua", {"type": "hidden", "value": "{_user_agent}"}, {"type": "text", "value": "{_user_agent}"}),
+    ("input", "ip", {"type": "hidden", "value": "{ip}"}, {"type": "hidden", "value": "127.0.0.1"}),
+    ("input", "sub_id_21", {"autocomplete": "address-level2"}, {"autocomplete": "off"}),
+    ("input", "sub_id_22", {"autocomplete": "street-address"}, {}),
+    ("input", "sub_id_23", {"autocomplete": "postal-code"}, {"autocomplete": "off"}),
+    ("input", "sub_id_24", {"autocomplete": "given-name"}, {"autocomplete": "name"}),
+    ("input", "sub_id_25", {"autocomplete": "family-name"}, {}),
+    ("input", "sub_id_26", {"autocomplete": "tel-national"}, {"autocomplete": "tel"}),
+    ("input", "sub_id_27", {"autocomplete": "email"}, {"autocomplete": "off"}),
+    ("select", "sub_id_9", {"autocomplete": "address-level1"}, {}),
+)
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do", "eiusmod")
+# функции, по которым пресет Atlas ищет скрипты
+JS_FUNCTIONS = ("getShortImageSrc", "injectScript")
+# доля строк скриптов с объявлением функции, остальные - присваивания
+JS_FUNCTION_LINES_RATIO = 0.1
+
+
+@dataclass(frozen=True)
+class LanderSpec:
+    """Параметры синтетического лендинга, одинаковые параметры дают одинаковую страницу"""
+
+    forms: int = 1
+    inputs_per_form: int = 8
+    scripts: int = 3
+    # символов в каждом скрипте
+    script_size: int = 2_000
+    # символов текста страницы вне форм
+    text_size: int = 5_000
+    # доля полей и атрибутов с ошибками
+    invalid_ratio: float = 0.3
+    seed: int = 0
+
+
+# сценарии бенчмарка: по одному параметру масштабируется относительно small
+SCENARIOS: dict[str, LanderSpec] = {
+    "small": LanderSpec(),
+    "forms-50": LanderSpec(forms=50),
+    "forms-500": LanderSpec(forms=500),
+    "inputs-200": LanderSpec(forms=5, inputs_per_form=200),
+    "scripts-200": LanderSpec(scripts=200, script_size=5_000),
+    "text-2mb": LanderSpec(forms=3, text_size=2_000_000),
+}
+
+
+def _format_attributes(attributes: dict[str, str]) -> str:
+    return "".join(f" {name}" if value == "" else f' {name}="{escape(value)}"' for name, value in attributes.items())
+
+
+def _generate_text(rnd: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rnd.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def _generate_form(rnd: random.Random, spec: LanderSpec, number: int) -> str:
+    invalid = rnd.random() < spec.invalid_ratio
+    form_attributes = {
+        "id": "order" if invalid else rnd.choice(("mForm", "MyId")),
+        "action": "submit.php" if invalid else rnd.choice(("send.php", "./send.php")),
+        "class": f"order-form order-form-{number}",
+        "method": "post",
+    }
+    fields = rnd.sample(FIELDS, min(spec.inputs_per_form, len(FIELDS)))
+    parts = [f"<form{_format_attributes(form_attributes)}>"]
+    for tag, name, valid_attributes, invalid_attributes in fields:
+        attributes = invalid_attributes if rnd.random() < spec.invalid_ratio else valid_attributes
+        attributes = {"name": name, **attributes}
+        if tag == "select":
+            parts.append(f"<select{_format_attributes(attributes)}><option>1</option><option>2</option></select>")
+        else:
+            parts.append(f'<div class="field"><input{_format_attributes(attributes)}></div>')
+    # поля, которые не проверяет ни один пресет, но которые разбираются и попадают в индекс документа
+    for field_number in range(len(fields), spec.inputs_per_form):
+        parts.append(f'<div class="field"><input name="field_{field_number}" type="text"></div>')
+    button_type = "button" if rnd.random() < spec.invalid_ratio else "submit"
+    parts.append(f'<button type="{button_type}">Order</button></form>')
+    return "".join(parts)
+
+
+def _generate_script(rnd: random.Random, spec: LanderSpec, number: int) -> str:
+    lines = []
+    length = 0
+    if number < len(JS_FUNCTIONS) and rnd.random() >= spec.invalid_ratio:
+        lines.append(f"function {JS_FUNCTIONS[number]}(value) {{ return value; }}")
+    while length < spec.script_size:
+        line = f"var value_{number}_{len(lines)} = {rnd.randint(0, 10_000)};"
+        if rnd.random() < JS_FUNCTION_LINES_RATIO:
+            line = f"function handler_{number}_{len(lines)}(event) {{ event.preventDefault(); }}"
+        lines.append(line)
+        length += len(line) + 1
+    source = "\n".join(lines)
+    return f"<script>{source}</script>"
+
+
+def generate_lander(spec: LanderSpec) -> str:
+    """HTML лендинга: формы с полями пресетов, скрипты и текст, часть полей и атрибутов с ошибками"""
+    rnd = random.Random(spec.seed)
+    title = "Document" if rnd.random() < spec.invalid_ratio else "Shop"
+    scripts = [_generate_script(rnd, spec, number) for number in range(spec.scripts)]
+    # половина скриптов в head, половина в конце body
+    middle = len(scripts) // 2
+    head_scripts, body_scripts = scripts[:middle], scripts[middle:]
+    images = ['<img class="header_9__logo" src="logo.png" alt="logo">']
+    if rnd.random() >= spec.invalid_ratio:
+        images.append('<img class="def-product-item-image" src="product.png" alt="product">')
+    # текст делится между секциями с формами, чтобы формы были разбросаны по документу
+    sections = spec.forms + 1
+    text_size = spec.text_size // sections
+    body = [f"<header>{''.join(images)}</header>"]
+    for number in range(sections):
+        body.append(f"<section><p>{_generate_text(rnd, text_size)}</p>")
+        if number < spec.forms:
+            body.append(_generate_form(rnd, spec, number))
+        body.append("</section>")
+    return (
+        f'<!DOCTYPE html><html lang="{rnd.choice(("en", "ru"))}"><head><meta charset="utf-8">'
+        f'<title class="title_class">{title}</title>{"".join(head_scripts)}</head>'
+        f'<body>{"".join(body)}{"".join(body_scripts)}</body></html>'
+    )
@@ -0,0 +1,320 @@
+import datetime
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict
+from functools import partial
+from importlib import metadata
+from typing import NamedTuple
+
+from common.request_sender import RequestSender
+from form_checker.form_checker.cache import LRUResultCache
+from form_checker.form_checker.checker import HtmlChecker, run_check
+from form_checker.form_checker.pool import CheckProcessPool
+from form_checker.form_checker.presets import PRESETS_MAP
+from form_checker.form_checker.render import render_tag_tree
+from html_checker import serializers
+from html_checker.backends import PARSER_BACKENDS, get_backend
+from html_checker.index import DocumentIndex
+from html_checker.summary import summarize
+from html_checker.utils import get_errors_levels_stat
+
+from .landers import SCENARIOS, generate_lander
+
+REPORT_FORMAT = 1
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.1
+# изменения меньше этого не считаются регрессией, как бы ни выросло время быстрых этапов в процентах
+MIN_SIGNIFICANT_DIFFERENCE = 0.001
+# этапы в порядке run_check и вывода результата
+PHASES = ("parse", "fill", "validate", "stats", "summarize", "render", "json")
+TOTAL = "total"
+# пути проверки: pipeline - этапы run_check по отдельности, остальные замеряются целиком.
+# threads и pool - BATCH_SIZE одновременных проверок из потоков, как в сервере, без пула и с CheckProcessPool,
+# incremental - повторная проверка неизменившейся страницы с состоянием прошлой, cache_hit - результат из кэша
+PIPELINE = "pipeline"
+PATHS = (PIPELINE, "threads", "pool", "incremental", "cache_hit")
+BATCH_SIZE = 8
+STATISTICS = ("min", "median", "max")
+PACKAGES = ("beautifulsoup4", "lxml", "soupsieve", "Django")
+
+
+class _Stopwatch:
+    __slots__ = ("timings", "_started_at")
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+        self._started_at = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.timings[phase] = now - self._started_at
+        self._started_at = now
+
+
+def run_pipeline(html: str, preset_name: str, parser_backend: str) -> tuple[dict[str, float], dict[str, int]]:
+    """Один прогон проверки как в run_check, затем отрисовка и JSON результата: время этапов и размер дерева"""
+    backend = get_backend(parser_backend)
+    preset = PRESETS_MAP[preset_name]
+    stopwatch = _Stopwatch()
+    html_tag = backend.parse(html)
+    stopwatch.lap("parse")
+    html_preset = preset(
+        elem=html_tag,
+        backend=backend,
+        document_index=DocumentIndex(root=html_tag, backend=backend),
+    )
+    stopwatch.lap("fill")
+    html_preset.run_validators()
+    stopwatch.lap("validate")
+    errors_level_stat = get_errors_levels_stat(tag=html_preset)
+    stopwatch.lap("stats")
+    summary = summarize(html_preset)
+    stopwatch.lap("summarize")
+    render_tag_tree(summary)
+    stopwatch.lap("render")
+    for _ in serializers.iter_json(summary):
+        pass
+    stopwatch.lap("json")
+    counts = {"tags": sum(1 for _ in summary.iter_tags()), "errors": sum(errors_level_stat.values())}
+    return stopwatch.timings, counts
+
+
+def _get_statistics(values: list[float]) -> dict[str, float]:
+    return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+
+def _check_batch(html_checker: HtmlChecker, html: str, preset_name: str, parser_backend: str) -> None:
+    with ThreadPoolExecutor(max_workers=BATCH_SIZE) as threads:
+        futures = [
+            threads.submit(html_checker.check, html, preset_name=preset_name, url="", parser_backend=parser_backend)
+            for _ in range(BATCH_SIZE)
+        ]
+        for future in futures:
+            future.result()
+
+
+def _make_path_runner(
+    path: str,
+    html: str,
+    preset_name: str,
+    parser_backend: str,
+    executor: Executor | None,
+) -> Callable[[], dict[str, float]]:
+    """Функция одного прогона пути проверки, возвращает время этапов"""
+    if path == PIPELINE:
+        return lambda: run_pipeline(html, preset_name=preset_name, parser_backend=parser_backend)[0]
+    if path == "pool" and executor is None:
+        raise ValueError("Path pool requires executor")
+    if path in ("threads", "pool"):
+        html_checker = HtmlChecker(request_sender=RequestSender(), executor=executor if path == "pool" else None)
+        run = partial(_check_batch, html_checker, html, preset_name=preset_name, parser_backend=parser_backend)
+    elif path == "incremental":
+        previous_state = run_check(html, preset_name, parser_backend, track_nodes=True).node_state
+        run = partial(run_check, html, preset_name, parser_backend, previous_state=previous_state, track_nodes=True)
+    elif path == "cache_hit":
+        # прогревочный прогон кладет результат в кэш
+        html_checker = HtmlChecker(request_sender=RequestSender(), result_cache=LRUResultCache(maxsize=1))
+        run = partial(html_checker.check, html, preset_name=preset_name, url="", parser_backend=parser_backend)
+    else:
+        raise ValueError(f'Unknown path "{path}", expected one of {list(PATHS)}')
+
+    def run_path() -> dict[str, float]:
+        started_at = time.perf_counter()
+        run()
+        return {TOTAL: time.perf_counter() - started_at}
+
+    return run_path
+
+
+def benchmark_case(  # noqa: PLR0913
+    scenario: str,
+    preset_name: str,
+    parser_backend: str,
+    repeat: int = DEFAULT_REPEAT,
+    path: str = PIPELINE,
+    executor: Executor | None = None,
+) -> dict:
+    """repeat прогонов после одного прогревочного, сборщик мусора на время прогона отключен, как в timeit.
+
+    executor - пул процессов для пути pool.
+    """
+    html = generate_lander(SCENARIOS[scenario])
+    run_path = _make_path_runner(path, html, preset_name=preset_name, parser_backend=parser_backend, executor=executor)
+    runs = []
+    for number in range(repeat + 1):
+        gc.collect()
+        gc.disable()
+        try:
+            timings = run_path()
+        finally:
+            gc.enable()
+        if number:
+            runs.append(timings)
+    if path == PIPELINE:
+        phases = {phase: _get_statistics([timings[phase] for timings in runs]) for phase in PHASES}
+        phases[TOTAL] = _get_statistics([sum(timings.values()) for timings in runs])
+    else:
+        phases = {TOTAL: _get_statistics([timings[TOTAL] for timings in runs])}
+    _, counts = run_pipeline(html, preset_name=preset_name, parser_backend=parser_backend)
+    return {
+        "scenario": scenario,
+        "preset": preset_name,
+        "backend": parser_backend,
+        "path": path,
+        "html_size": len(html.encode()),
+        **counts,
+        "phases": phases,
+    }
+
+
+def _get_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def _get_package_version(name: str) -> str | None:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def get_environment() -> dict:
+    """Окружение прогона: сравнивать между собой стоит прогоны на одной машине и с теми же версиями"""
+    return {
+        "revision": _get_revision(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": {name: _get_package_version(name) for name in PACKAGES},
+    }
+
+
+def run_benchmarks(
+    scenarios: Iterable[str] | None = None,
+    preset_names: Iterable[str] | None = None,
+    parser_backends: Iterable[str] | None = None,
+    repeat: int = DEFAULT_REPEAT,
+    paths: Iterable[str] | None = None,
+) -> Iterator[dict]:
+    """Результаты по одному на сценарий, пресет, парсер и путь проверки по мере готовности, по умолчанию - все.
+
+    Для пути pool на все прогоны запускается один CheckProcessPool по числу процессоров.
+    """
+    paths = list(paths or PATHS)
+    process_pool = CheckProcessPool(workers=os.cpu_count() or 1) if "pool" in paths else None
+    try:
+        for scenario in scenarios or SCENARIOS:
+            for preset_name in preset_names or PRESETS_MAP:
+                for parser_backend in parser_backends or PARSER_BACKENDS:
+                    for path in paths:
+                        yield benchmark_case(
+                            scenario,
+                            preset_name=preset_name,
+                            parser_backend=parser_backend,
+                            repeat=repeat,
+                            path=path,
+                            executor=process_pool,
+                        )
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+
+
+def make_report(results: list[dict], repeat: int) -> dict:
+    """Отчет для сохранения в JSON: окружение, версии схем пресетов, параметры сценариев и результаты"""
+    scenarios = {result["scenario"] for result in results}
+    preset_names = {result["preset"] for result in results}
+    return {
+        "format": REPORT_FORMAT,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": get_environment(),
+        "repeat": repeat,
+        "scenarios": {name: asdict(SCENARIOS[name]) for name in SCENARIOS if name in scenarios},
+        "presets": {name: PRESETS_MAP[name].get_schema_version() for name in PRESETS_MAP if name in preset_names},
+        "results": results,
+    }
+
+
+def get_result_key(result: dict) -> tuple[str, str, str, str]:
+    """Сценарий, пресет, парсер и путь проверки результата, в отчетах без путей все результаты - pipeline"""
+    return result["scenario"], result["preset"], result["backend"], result.get("path", PIPELINE)
+
+
+class Comparison(NamedTuple):
+    scenario: str
+    preset: str
+    backend: str
+    path: str
+    phase: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Относительное изменение времени: 0.1 - на 10% медленнее"""
+        if self.baseline == 0:
+            return 0.0
+        return self.current / self.baseline - 1
+
+    def is_regression(self, threshold: float = DEFAULT_THRESHOLD) -> bool:
+        return self.change > threshold and self.current - self.baseline >= MIN_SIGNIFICANT_DIFFERENCE
+
+
+def compare_reports(baseline: dict, current: dict, statistic: str = "min") -> list[Comparison]:
+    """Время этапов двух отчетов для общих сценариев, пресетов, парсеров и путей проверки.
+
+    По умолчанию сравнивается минимум прогонов: он меньше всего зависит от соседней нагрузки на машину.
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(f'Unknown statistic "{statistic}", expected one of {list(STATISTICS)}')
+    baseline_results = {get_result_key(result): result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        key = get_result_key(result)
+        baseline_result = baseline_results.get(key)
+        if baseline_result is None:
+            continue
+        for phase, values in result["phases"].items():
+            baseline_values = baseline_result["phases"].get(phase)
+            if baseline_values is None:
+                continue
+            comparisons.append(
+                Comparison(*key, phase=phase, baseline=baseline_values[statistic], current=values[statistic]),
+            )
+    return comparisons
+
+
+def get_environment_changes(baseline: dict, current: dict) -> list[str]:
+    """Ключи окружения, которые отличаются у двух отчетов, кроме ревизии кода"""
+    return [
+        key
+        for key, value in current["environment"].items()
+        if key != "revision" and baseline["environment"].get(key) != value
+    ]
+
+
+def get_changed_presets(baseline: dict, current: dict) -> list[str]:
+    """Пресеты, схема которых изменилась между прогонами, их время меняется не только из-за кода проверки"""
+    return [
+        name
+        for name, version in current["presets"].items()
+        if name in baseline["presets"] and baseline["presets"][name] != version
+    ]
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+import weakref
+from collections.abc import Callable
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any
+
+import httpx
+
+from .download import ACCEPT_ENCODING, DEFAULT_CHUNK_SIZE, DEFAULT_CONTENT_TYPES, DEFAULT_MAX_BYTES, ResponseBodyReader
+from .exceptions import ResponseRejected
+from .request_sender import (
+    DEFAULT_RESPONSE_CACHE_BYTES,
+    RequestAttempt,
+    ResponseCache,
+    get_backoff,
+    notify_attempt,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRequestSender:
+    """Асинхронная загрузка страниц через пул соединений httpx.
+
+    Клиент httpx привязан к циклу событий, поэтому на каждый цикл создается свой клиент.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        timeout: float = 10,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 10,
+        response_cache_size: int = 128,
+        response_cache_bytes: int = DEFAULT_RESPONSE_CACHE_BYTES,
+        on_attempt: Callable[[RequestAttempt], None] | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        content_types: tuple[str, ...] | None = DEFAULT_CONTENT_TYPES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.timeout = timeout
+        # вызывается после каждой попытки запроса, как у RequestSender
+        self.on_attempt = on_attempt
+        # ограничения тела ответа, как у RequestSender
+        self.max_bytes = max_bytes
+        self.content_types = content_types
+        self.chunk_size = chunk_size
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.response_cache = (
+            ResponseCache(maxsize=response_cache_size, max_bytes=response_cache_bytes)
+            if response_cache_size > 0
+            else None
+        )
+        self._clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # requests по умолчанию идет по редиректам, httpx нет
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True,
+                headers={"Accept-Encoding": ACCEPT_ENCODING},
+                # cookies не сохраняются, чтобы проверка не зависела от прошлых, как у RequestSender
+                cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def request(self, url: str, attempts: int = 2, method: str = "GET", **kwargs: dict[str, Any]) -> str:
+        if attempts <= 0:
+            raise ValueError("attempts must be positive integer")
+        last_error = None
+        for attempt in range(attempts):
+            if attempt > 0:
+                await asyncio.sleep(get_backoff(attempt - 1, self.backoff_factor, self.backoff_max))
+            started_at = time.perf_counter()
+            try:
+                return await self._request(url=url, method=method, started_at=started_at, **kwargs)
+            except httpx.HTTPError as error:
+                last_error = error
+                status_code = error.response.status_code if isinstance(error, httpx.HTTPStatusError) else None
+                notify_attempt(self.on_attempt, url, method, started_at, status_code, error=error)
+        raise last_error
+
+    async def _request(self, url: str, method: str, started_at: float, **kwargs: dict[str, Any]) -> str:
+        cached = None
+        if method.upper() == "GET" and self.response_cache is not None:
+            cached = self.response_cache.get(url)
+        if cached is not None:
+            kwargs["headers"] = {**cached.get_conditional_headers(), **kwargs.get("headers", {})}
+        async with self.client.stream(method=method, url=url, **kwargs) as response:
+            logger.info("%s: %s", response.status_code, url)
+            if cached is not None and response.status_code == httpx.codes.NOT_MODIFIED:
+                # как у RequestSender: прочитанный до конца ответ возвращает соединение в пул
+                await response.aread()
+                notify_attempt(self.on_attempt, url, method, started_at, response.status_code)
+                return cached.text
+            response.raise_for_status()
+            try:
+                reader = ResponseBodyReader(
+                    response.headers,
+                    max_bytes=self.max_bytes,
+                    content_types=self.content_types,
+                    chunk_size=self.chunk_size,
+                )
+                async for data in response.aiter_raw(self.chunk_size):
+                    reader.feed(data)
+                text = reader.finish()
+            except ResponseRejected as error:
+                notify_attempt(self.on_attempt, url, method, started_at, response.status_code, error=error)
+                raise
+        notify_attempt(self.on_attempt, url, method, started_at, response.status_code, size=reader.size)
+        if method.upper() == "GET" and self.response_cache is not None:
+            self.response_cache.set(url, text=text, headers=response.headers)
+        return text
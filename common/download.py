@@ -0,0 +1,215 @@
+import codecs
+import re
+import zlib
+from collections.abc import Iterable, Iterator, Mapping
+
+from charset_normalizer import from_bytes
+
+from .exceptions import InvalidContentEncoding, ResponseTooLarge, UnsupportedContentType
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+# сжатие, которое распаковывает ContentDecoder, br - только с установленным пакетом brotli
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+DECODING_ERRORS = (zlib.error, brotli.error) if brotli is not None else (zlib.error,)
+# по спецификации html объявление кодировки в <meta> ищется в первых 1024 байтах
+META_PRESCAN_BYTES = 1024
+# если кодировка нигде не объявлена, она определяется по стольким первым байтам
+DETECT_ENCODING_BYTES = 64 * 1024
+DEFAULT_ENCODING = "utf-8"
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-z0-9_:.-]+)""", re.IGNORECASE)
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# кодировки, для которых берется совместимая более широкая: ascii в начале страницы не значит ascii в конце
+WIDER_ENCODINGS = {"ascii": DEFAULT_ENCODING}
+
+
+def parse_content_type(value: str | None) -> tuple[str, str | None]:
+    """Тип содержимого в нижнем регистре и charset из заголовка Content-Type"""
+    if not value:
+        return "", None
+    mime_type, *parameters = value.split(";")
+    charset = None
+    for parameter in parameters:
+        name, _, parameter_value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            charset = parameter_value.strip().strip("\"'") or None
+    return mime_type.strip().lower(), charset
+
+
+def lookup_encoding(name: str | None) -> str | None:
+    """Каноническое имя кодировки или None, если Python ее не знает"""
+    if not name:
+        return None
+    try:
+        encoding = codecs.lookup(name).name
+    except LookupError:
+        return None
+    return WIDER_ENCODINGS.get(encoding, encoding)
+
+
+def _get_bom_encoding(data: bytes | bytearray) -> str | None:
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+    return None
+
+
+def _get_meta_encoding(data: bytes | bytearray) -> str | None:
+    match = META_CHARSET_RE.search(data, 0, META_PRESCAN_BYTES)
+    return lookup_encoding(match.group(1).decode("ascii")) if match else None
+
+
+def _guess_encoding(data: bytes | bytearray) -> str:
+    best_match = from_bytes(bytes(data[:DETECT_ENCODING_BYTES])).best()
+    return lookup_encoding(best_match.encoding if best_match is not None else None) or DEFAULT_ENCODING
+
+
+class ContentDecoder:
+    """Распаковка тела ответа по Content-Encoding по частям.
+
+    gzip и deflate распаковываются частями не больше chunk_size байт, поэтому сжатая бомба не распаковывается
+    в память целиком до проверки размера. brotli не умеет ограничивать вывод, его ограничивает размер входных частей.
+    """
+
+    def __init__(self, content_encoding: str | None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        encoding = (content_encoding or "identity").strip().lower()
+        self.chunk_size = chunk_size
+        self._zlib = None
+        self._brotli = None
+        # часть серверов отдает deflate без zlib-заголовка
+        self._try_raw_deflate = encoding == "deflate"
+        if encoding in ("gzip", "x-gzip"):
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._zlib = zlib.decompressobj()
+        elif encoding == "br" and brotli is not None:
+            self._brotli = brotli.Decompressor()
+        elif encoding != "identity":
+            raise InvalidContentEncoding(f'Unsupported Content-Encoding "{content_encoding}"')
+
+    def decode(self, data: bytes) -> Iterator[bytes]:
+        try:
+            if self._zlib is not None:
+                yield from self._decode_zlib(data)
+            elif self._brotli is not None:
+                yield self._brotli.process(data)
+            else:
+                yield data
+        except DECODING_ERRORS as error:
+            raise InvalidContentEncoding(f"Failed to decode response body: {error}") from error
+
+    def _decode_zlib(self, data: bytes) -> Iterator[bytes]:
+        try:
+            output = self._zlib.decompress(data, self.chunk_size)
+        except zlib.error:
+            if not self._try_raw_deflate:
+                raise
+            self._zlib = zlib.decompressobj(-zlib.MAX_WBITS)
+            output = self._zlib.decompress(data, self.chunk_size)
+        self._try_raw_deflate = False
+        yield output
+        while self._zlib.unconsumed_tail:
+            yield self._zlib.decompress(self._zlib.unconsumed_tail, self.chunk_size)
+
+    def finish(self) -> Iterator[bytes]:
+        if self._zlib is not None:
+            try:
+                yield self._zlib.flush()
+            except zlib.error as error:
+                raise InvalidContentEncoding(f"Failed to decode response body: {error}") from error
+
+
+class ResponseBodyReader:
+    """Текст тела ответа, прочитанного по частям.
+
+    Заголовки проверяются до чтения тела: тип содержимого и Content-Length. Тело распаковывается и декодируется
+    по частям, как только по первым байтам определена кодировка: BOM, charset из Content-Type, <meta> в первых
+    META_PRESCAN_BYTES, иначе charset_normalizer по первым DETECT_ENCODING_BYTES. Распакованное тело больше
+    max_bytes прерывает чтение.
+    """
+
+    def __init__(
+        self,
+        headers: Mapping[str, str],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        content_types: Iterable[str] | None = DEFAULT_CONTENT_TYPES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        mime_type, charset = parse_content_type(headers.get("Content-Type"))
+        if mime_type and content_types is not None and mime_type not in content_types:
+            raise UnsupportedContentType(f'Content-Type "{mime_type}" is not html')
+        content_length = headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > max_bytes:
+            raise ResponseTooLarge(f"Content-Length {content_length} exceeds the limit of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+        # распакованных байт тела
+        self.size = 0
+        self.encoding: str | None = None
+        self._header_encoding = lookup_encoding(charset)
+        self._content_decoder = ContentDecoder(headers.get("Content-Encoding"), chunk_size=chunk_size)
+        # начало тела до определения кодировки
+        self._prefix = bytearray()
+        self._text_decoder: codecs.IncrementalDecoder | None = None
+        self._parts: list[str] = []
+
+    def feed(self, data: bytes) -> None:
+        self._parts.append(self.decode(data))
+
+    def finish(self) -> str:
+        self._parts.append(self.decode_final())
+        return "".join(self._parts)
+
+    def decode(self, data: bytes) -> str:
+        """Текст, ставший известным после части тела data, без сохранения в reader - для разбора по частям"""
+        return "".join(self._add(chunk) for chunk in self._content_decoder.decode(data))
+
+    def decode_final(self) -> str:
+        """Остаток текста после последней части тела"""
+        parts = [self._add(chunk) for chunk in self._content_decoder.finish()]
+        if self._text_decoder is None:
+            parts.append(self._start_decoding(self._detect_encoding(final=True)))
+        parts.append(self._text_decoder.decode(b"", final=True))
+        return "".join(parts)
+
+    def _add(self, chunk: bytes) -> str:
+        if not chunk:
+            return ""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ResponseTooLarge(f"Response body exceeds the limit of {self.max_bytes} bytes")
+        if self._text_decoder is not None:
+            return self._text_decoder.decode(chunk)
+        self._prefix += chunk
+        encoding = self._detect_encoding(final=False)
+        if encoding is not None:
+            return self._start_decoding(encoding)
+        return ""
+
+    def _start_decoding(self, encoding: str) -> str:
+        self.encoding = encoding
+        self._text_decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        text = self._text_decoder.decode(bytes(self._prefix))
+        self._prefix = bytearray()
+        return text
+
+    def _detect_encoding(self, final: bool) -> str | None:
+        """Кодировка по началу тела, None - нужно больше байт"""
+        prefix = self._prefix
+        if len(prefix) < len(codecs.BOM_UTF8) and not final:
+            return None
+        encoding = _get_bom_encoding(prefix) or self._header_encoding
+        if encoding is None and (final or len(prefix) >= META_PRESCAN_BYTES):
+            encoding = _get_meta_encoding(prefix)
+            if encoding is None and (final or len(prefix) >= DETECT_ENCODING_BYTES):
+                encoding = _guess_encoding(prefix)
+        return encoding
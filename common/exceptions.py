@@ -1,2 +1,18 @@
 class AppException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class ResponseRejected(AppException):
+    """Ответ отклонен: слишком большой, не html или с неизвестным сжатием, повтор запроса не поможет"""
+
+
+class ResponseTooLarge(ResponseRejected):
+    pass
+
+
+class UnsupportedContentType(ResponseRejected):
+    pass
+
+
+class InvalidContentEncoding(ResponseRejected):
+    pass
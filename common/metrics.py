@@ -0,0 +1,261 @@
+import atexit
+import json
+import math
+import os
+import threading
+import uuid
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+# границы корзин гистограммы времени по умолчанию, в секундах, как в prometheus_client
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# значения записываются в файл процесса не чаще раза в столько секунд
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+LabelValues = tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    labels = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values))
+    return f"{{{labels}}}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Метрика реестра, значения для каждого набора меток хранит реестр"""
+
+    type = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _get_label_values(self, labels: dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"{self.name} expects labels {list(self.labelnames)}, got {list(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get_size(self) -> int:
+        """Количество чисел в значении для одного набора меток"""
+        return 1
+
+    def iter_lines(self, values: dict[LabelValues, list[float]]) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only be increased")
+        self.registry.add(self, self._get_label_values(labels), ((0, amount),))
+
+    def iter_lines(self, values: dict[LabelValues, list[float]]) -> Iterator[str]:
+        for label_values, (value,) in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, label_values)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Гистограмма: количество наблюдений в каждой корзине, сумма и количество наблюдений"""
+
+    type = "histogram"
+
+    def __init__(  # noqa: PLR0913
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(registry, name, documentation, labelnames)
+        buckets = tuple(sorted(float(bucket) for bucket in buckets))
+        if not buckets or buckets[-1] != math.inf:
+            buckets = (*buckets, math.inf)
+        self.buckets = buckets
+
+    def get_size(self) -> int:
+        # корзины, затем сумма и количество
+        return len(self.buckets) + 2
+
+    def observe(self, value: float, **labels: str) -> None:
+        bucket_number = next(number for number, bound in enumerate(self.buckets) if value <= bound)
+        size = self.get_size()
+        self.registry.add(self, self._get_label_values(labels), ((bucket_number, 1), (size - 2, value), (size - 1, 1)))
+
+    def iter_lines(self, values: dict[LabelValues, list[float]]) -> Iterator[str]:
+        labelnames = (*self.labelnames, "le")
+        for label_values, value in sorted(values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, value):
+                cumulative += count
+                bucket_labels = _format_labels(labelnames, (*label_values, _format_value(bound)))
+                yield f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}"
+            labels = _format_labels(self.labelnames, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(value[-2])}"
+            yield f"{self.name}_count{labels} {_format_value(value[-1])}"
+
+
+class MetricsRegistry:
+    """Метрики процесса в текстовом формате Prometheus.
+
+    directory - каталог для нескольких процессов (воркеры passenger, обработчики задач): каждый процесс
+    записывает свои значения в отдельный файл после flush, а expose складывает значения всех файлов.
+    Файлы завершившихся процессов остаются, чтобы счетчики не уменьшались, каталог стоит очищать при деплое.
+    Без directory отдаются значения только текущего процесса.
+    schedule_flush записывает значения не сразу, а через flush_interval секунд одним flush на все события
+    за это время, и при завершении процесса.
+    """
+
+    suffix = ".json"
+
+    def __init__(self, directory: str | Path | None = None, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.directory = Path(directory) if directory is not None else None
+        self.flush_interval = flush_interval
+        self._flush_timer: threading.Timer | None = None
+        self._metrics: dict[str, Metric] = {}
+        self._values: dict[str, dict[LabelValues, list[float]]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._file_name = self._make_file_name()
+        if self.directory is not None:
+            atexit.register(self.flush_pending)
+
+    def _make_file_name(self) -> str:
+        # pid может достаться новому процессу, а файл прошлого процесса с тем же pid нужно сохранить
+        return f"{self._pid}-{uuid.uuid4().hex[:8]}{self.suffix}"
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric "{metric.name}" is already registered')
+        self._metrics[metric.name] = metric
+        self._values[metric.name] = {}
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def add(self, metric: Metric, label_values: LabelValues, increments: Iterable[tuple[int, float]]) -> None:
+        """Прибавить к числам значения метрики с метками label_values: пары (номер числа, приращение)"""
+        with self._lock:
+            self._reset_after_fork()
+            values = self._values[metric.name]
+            value = values.get(label_values)
+            if value is None:
+                value = values[label_values] = [0.0] * metric.get_size()
+            for number, increment in increments:
+                value[number] += increment
+
+    def _reset_after_fork(self) -> None:
+        # дочерний процесс начинает со своих значений, иначе значения родителя до fork посчитаются дважды
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._file_name = self._make_file_name()
+            # поток таймера не переходит в дочерний процесс
+            self._flush_timer = None
+            for values in self._values.values():
+                values.clear()
+
+    def _dump_values(self) -> dict:
+        return {
+            name: [[list(label_values), value] for label_values, value in values.items()]
+            for name, values in self._values.items()
+        }
+
+    def schedule_flush(self) -> None:
+        """Записать значения процесса в его файл через flush_interval секунд, если запись еще не назначена"""
+        if self.directory is None:
+            return
+        with self._lock:
+            self._reset_after_fork()
+            if self._flush_timer is not None:
+                return
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush_pending(self) -> None:
+        """Записать значения, если после прошлой записи были события"""
+        if self._flush_timer is not None:
+            self.flush()
+
+    def flush(self) -> None:
+        """Записать значения процесса в его файл в directory, без directory ничего не делает"""
+        if self.directory is None:
+            return
+        with self._lock:
+            self._reset_after_fork()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            data = json.dumps(self._dump_values())
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / self._file_name
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "w") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+
+    def _iter_process_values(self) -> Iterator[dict]:
+        if self.directory is None:
+            with self._lock:
+                yield self._dump_values()
+            return
+        self.flush()
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                with open(path) as file:
+                    yield json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+
+    def collect(self) -> dict[str, dict[LabelValues, list[float]]]:
+        """Значения метрик, сложенные по всем процессам"""
+        collected: dict[str, dict[LabelValues, list[float]]] = {name: {} for name in self._metrics}
+        for process_values in self._iter_process_values():
+            for name, samples in process_values.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    # метрика удалена из кода, а файл записан старой версией
+                    continue
+                values = collected[name]
+                for label_values, value in samples:
+                    if len(value) != metric.get_size():
+                        continue
+                    total = values.setdefault(tuple(label_values), [0.0] * len(value))
+                    for number, number_value in enumerate(value):
+                        total[number] += number_value
+        return collected
+
+    def expose(self, collected: dict[str, dict[LabelValues, list[float]]] | None = None) -> str:
+        """Метрики в текстовом формате Prometheus, collected - результат collect, если он уже получен"""
+        if collected is None:
+            collected = self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.iter_lines(collected[name]))
+        return "\n".join(lines) + "\n"
@@ -1,21 +1,293 @@
 import logging
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import closing
+from dataclasses import dataclass
+from http.cookiejar import DefaultCookiePolicy
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
+from .download import ACCEPT_ENCODING, DEFAULT_CHUNK_SIZE, DEFAULT_CONTENT_TYPES, DEFAULT_MAX_BYTES, ResponseBodyReader
+from .exceptions import ResponseRejected
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    text: str
+    etag: str | None = None
+    last_modified: str | None = None
+    # память, которую занимает text
+    size: int = 0
+
+    def get_conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Тексты ответов с ETag/Last-Modified для условных GET-запросов.
+
+    Хранит последние maxsize адресов, тексты которых вместе занимают не больше max_bytes памяти.
+    Тексты больше max_entry_bytes (по умолчанию восьмая часть max_bytes) не сохраняются.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        max_bytes: int = DEFAULT_RESPONSE_CACHE_BYTES,
+        max_entry_bytes: int | None = None,
+    ):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 8
+        self._responses: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Память, которую занимают сохраненные тексты"""
+        return self._size
+
+    def get(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            cached = self._responses.get(url)
+            if cached is not None:
+                self._responses.move_to_end(url)
+            return cached
+
+    def set(self, url: str, text: str, headers: Mapping[str, str]) -> None:
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        size = sys.getsizeof(text)
+        with self._lock:
+            previous = self._responses.pop(url, None)
+            if previous is not None:
+                self._size -= previous.size
+            if (etag is None and last_modified is None) or size > self.max_entry_bytes:
+                return
+            self._responses[url] = CachedResponse(text=text, etag=etag, last_modified=last_modified, size=size)
+            self._size += size
+            while len(self._responses) > self.maxsize or self._size > self.max_bytes:
+                _, evicted = self._responses.popitem(last=False)
+                self._size -= evicted.size
+
+
+@dataclass(frozen=True)
+class RequestAttempt:
+    """Попытка запроса для хука on_attempt отправителя"""
+
+    url: str
+    method: str
+    seconds: float
+    status_code: int | None = None
+    # байт в теле ответа, для 304 - 0
+    size: int = 0
+    error: str | None = None
+    # имя класса исключения неудачной попытки
+    error_type: str | None = None
+
+
+def notify_attempt(  # noqa: PLR0913
+    on_attempt: Callable[[RequestAttempt], None] | None,
+    url: str,
+    method: str,
+    started_at: float,
+    status_code: int | None,
+    size: int = 0,
+    error: Exception | None = None,
+) -> None:
+    """Передать попытку запроса, начатую в started_at по time.perf_counter, в хук on_attempt, если он задан"""
+    if on_attempt is not None:
+        on_attempt(
+            RequestAttempt(
+                url=url,
+                method=method,
+                seconds=time.perf_counter() - started_at,
+                status_code=status_code,
+                size=size,
+                error=repr(error) if error is not None else None,
+                error_type=type(error).__name__ if error is not None else None,
+            ),
+        )
+
+
+def get_backoff(attempt: int, backoff_factor: float, backoff_max: float) -> float:
+    """Пауза перед повтором: экспонента со случайным разбросом от 0 до предела (full jitter)"""
+    return random.uniform(0, min(backoff_max, backoff_factor * 2**attempt))
+
 
 class RequestSender:
-    def request(self, url: str, attempts: int = 2, method: str = 'GET', **kwargs: dict[str, Any]) -> str:
+    def __init__(  # noqa: PLR0913
+        self,
+        timeout: float = 10,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 10,
+        response_cache_size: int = 128,
+        response_cache_bytes: int = DEFAULT_RESPONSE_CACHE_BYTES,
+        on_attempt: Callable[[RequestAttempt], None] | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        content_types: tuple[str, ...] | None = DEFAULT_CONTENT_TYPES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.timeout = timeout
+        # вызывается после каждой попытки запроса, в том числе неудачной, например для профиля проверки
+        self.on_attempt = on_attempt
+        # тело ответа читается по частям и не больше max_bytes после распаковки, ответы с Content-Type
+        # не из content_types не читаются, None - любые. Отклоненные ответы не запрашиваются повторно
+        self.max_bytes = max_bytes
+        self.content_types = content_types
+        self.chunk_size = chunk_size
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        # для условных запросов, тексты вместе не больше response_cache_bytes памяти
+        self.response_cache = (
+            ResponseCache(maxsize=response_cache_size, max_bytes=response_cache_bytes)
+            if response_cache_size > 0
+            else None
+        )
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        # requests.Session не гарантирует потокобезопасность, у каждого потока своя сессия
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Сессия текущего потока: соединения переиспользуются между запросами, пул на каждый хост,
+        не больше pool_maxsize соединений в пуле. Cookies не сохраняются, чтобы проверка не зависела от прошлых
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            # тело распаковывает ResponseBodyReader, поэтому только сжатие, которое он умеет
+            session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+            adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def request(self, url: str, attempts: int = 2, method: str = "GET", **kwargs: dict[str, Any]) -> str:
         if attempts <= 0:
-            raise ValueError('attempts must be positive integer')
+            raise ValueError("attempts must be positive integer")
         last_error = None
-        for _ in range(attempts):
+        for attempt in range(attempts):
+            if attempt > 0:
+                time.sleep(get_backoff(attempt - 1, self.backoff_factor, self.backoff_max))
+            started_at = time.perf_counter()
             try:
-                response = requests.request(url=url, method=method, timeout=10, **kwargs)
-                logging.info('%s: %s', response.status_code, url)
-                response.raise_for_status()
-                return response.text
+                return self._request(url=url, method=method, started_at=started_at, **kwargs)
             except RequestException as error:
                 last_error = error
-        raise last_error
\ No newline at end of file
+                status_code = error.response.status_code if error.response is not None else None
+                notify_attempt(self.on_attempt, url, method, started_at, status_code, error=error)
+        raise last_error
+
+    def _request(self, url: str, method: str, started_at: float, **kwargs: dict[str, Any]) -> str:
+        cached = None
+        if method.upper() == "GET" and self.response_cache is not None:
+            cached = self.response_cache.get(url)
+        if cached is not None:
+            kwargs["headers"] = {**cached.get_conditional_headers(), **kwargs.get("headers", {})}
+        response = self.session.request(url=url, method=method, timeout=self.timeout, stream=True, **kwargs)
+        with response:
+            logger.info("%s: %s", response.status_code, url)
+            if cached is not None and response.status_code == requests.codes.not_modified:
+                # у 304 нет тела, но без чтения до конца соединение закрывается, а не возвращается в пул
+                _ = response.content
+                notify_attempt(self.on_attempt, url, method, started_at, response.status_code)
+                return cached.text
+            response.raise_for_status()
+            try:
+                reader = ResponseBodyReader(
+                    response.headers,
+                    max_bytes=self.max_bytes,
+                    content_types=self.content_types,
+                    chunk_size=self.chunk_size,
+                )
+                for data in response.raw.stream(self.chunk_size, decode_content=False):
+                    reader.feed(data)
+                text = reader.finish()
+            except ResponseRejected as error:
+                notify_attempt(self.on_attempt, url, method, started_at, response.status_code, error=error)
+                raise
+        notify_attempt(self.on_attempt, url, method, started_at, response.status_code, size=reader.size)
+        if method.upper() == "GET" and self.response_cache is not None:
+            self.response_cache.set(url, text=text, headers=response.headers)
+        return text
+
+    def iter_text(self, url: str, attempts: int = 2, method: str = "GET", **kwargs: dict[str, Any]) -> Iterator[str]:
+        """Текст тела ответа частями по мере загрузки, например для разбора html по частям.
+
+        Запрос повторяется, только пока не отдано ни одной части. Если закрыть итератор раньше (break в цикле),
+        остаток тела не загружается, а соединение закрывается. Условные запросы не используются:
+        тело может быть прочитано не полностью, и его нельзя сохранить в response_cache.
+        """
+        if attempts <= 0:
+            raise ValueError("attempts must be positive integer")
+        for attempt in range(attempts):
+            if attempt > 0:
+                time.sleep(get_backoff(attempt - 1, self.backoff_factor, self.backoff_max))
+            started_at = time.perf_counter()
+            parts = self._iter_text(url=url, method=method, started_at=started_at, **kwargs)
+            try:
+                next(parts)
+            except StopIteration:
+                return
+            except RequestException as error:
+                status_code = error.response.status_code if error.response is not None else None
+                notify_attempt(self.on_attempt, url, method, started_at, status_code, error=error)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            # первая часть - пустая строка из _iter_text
+            with closing(parts):
+                yield from parts
+            return
+
+    def _iter_text(self, url: str, method: str, started_at: float, **kwargs: dict[str, Any]) -> Iterator[str]:
+        response = self.session.request(url=url, method=method, timeout=self.timeout, stream=True, **kwargs)
+        reader = None
+        error = None
+        try:
+            with response:
+                logger.info("%s: %s", response.status_code, url)
+                response.raise_for_status()
+                reader = ResponseBodyReader(
+                    response.headers,
+                    max_bytes=self.max_bytes,
+                    content_types=self.content_types,
+                    chunk_size=self.chunk_size,
+                )
+                # пустая первая часть, чтобы ошибки запроса и заголовков возникли до первой части тела
+                yield ""
+                for data in response.raw.stream(self.chunk_size, decode_content=False):
+                    yield reader.decode(data)
+                yield reader.decode_final()
+        except Exception as failure:
+            error = failure
+            raise
+        finally:
+            # и после ошибки, и после закрытия итератора до конца тела. Ошибки запроса до чтения тела
+            # учитывает iter_text, он же повторяет запрос
+            if reader is not None or (error is not None and not isinstance(error, RequestException)):
+                size = reader.size if reader is not None else 0
+                notify_attempt(self.on_attempt, url, method, started_at, response.status_code, size=size, error=error)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import queue
+import threading
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from urllib.parse import urlsplit
+
+import httpx
+
+from common.async_request_sender import AsyncRequestSender
+from common.exceptions import ResponseRejected
+from html_checker.backends import DEFAULT_PARSER_BACKEND
+
+from .checker import run_check
+from .exceptions import HtmlTagNotFound
+from .factory import create_async_request_sender
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 20
+DEFAULT_PER_HOST_LIMIT = 4
+
+
+@dataclass
+class BulkCheckResult:
+    url: str
+    preset_name: str
+    errors_level_stat: dict[str, int] | None = None
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def run_check_summary(html: str, preset_names: list[str], parser_backend: str) -> dict[str, dict[str, int]]:
+    """Проверка html всеми пресетами, в процесс-родитель возвращается только статистика уровней ошибок"""
+    summary = {}
+    for preset_name in preset_names:
+        check_result = run_check(html=html, preset_name=preset_name, parser_backend=parser_backend)
+        summary[preset_name] = {level.level: count for level, count in check_result.errors_level_stat.items()}
+    return summary
+
+
+async def check_urls(  # noqa: PLR0913
+    urls: Iterable[str],
+    preset_names: list[str],
+    parser_backend: str = DEFAULT_PARSER_BACKEND,
+    executor: Executor | None = None,
+    request_sender: AsyncRequestSender | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+) -> AsyncIterator[BulkCheckResult]:
+    """Проверка каждого url каждым пресетом, результаты отдаются по мере готовности.
+
+    Страница загружается один раз на все пресеты. Одновременно обрабатывается не больше concurrency адресов
+    и не больше per_host_limit адресов одного хоста. Без request_sender страницы загружаются отправителем
+    из настроек проекта, как в create_html_checker. Без executor проверка идет в потоках этого процесса.
+    """
+    request_sender = request_sender or create_async_request_sender()
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    host_semaphores = defaultdict(lambda: asyncio.Semaphore(per_host_limit))
+
+    async def check_url(url: str) -> list[BulkCheckResult]:
+        async with semaphore:
+            try:
+                async with host_semaphores[urlsplit(url).hostname]:
+                    html = await request_sender.request(url=url)
+                summary = await loop.run_in_executor(executor, run_check_summary, html, preset_names, parser_backend)
+            except (httpx.HTTPError, ResponseRejected) as e:
+                error = f"Не удалось загрузить сайт: {e}"
+            except HtmlTagNotFound as e:
+                error = str(e)
+            except Exception as e:
+                # ошибка одного адреса (упавший пул процессов, ошибка парсера) не прерывает остальные
+                logger.exception("Bulk check of %s failed", url)
+                error = f"Ошибка проверки: {type(e).__name__}: {e}"
+            else:
+                return [
+                    BulkCheckResult(url=url, preset_name=preset_name, errors_level_stat=summary[preset_name])
+                    for preset_name in preset_names
+                ]
+        return [BulkCheckResult(url=url, preset_name=preset_name, error=error) for preset_name in preset_names]
+
+    tasks = [asyncio.create_task(check_url(url)) for url in dict.fromkeys(urls)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            for result in await task:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await request_sender.aclose()
+
+
+def iter_check_urls(
+    urls: Iterable[str],
+    preset_names: list[str],
+    executor: Executor | None = None,
+    **kwargs: dict,
+) -> Iterator[BulkCheckResult]:
+    """Синхронная обертка над check_urls для WSGI и команд manage.py.
+
+    Цикл событий работает в отдельном потоке, результаты передаются через очередь по мере готовности.
+    executor - пул процессов проверки, например общий пул процесса HtmlChecker.executor, без него
+    проверка идет в потоках этого процесса.
+    """
+    results = queue.Queue()
+    done = object()
+    stop = threading.Event()
+
+    async def produce() -> None:
+        async for result in check_urls(urls=urls, preset_names=preset_names, executor=executor, **kwargs):
+            if stop.is_set():
+                break
+            results.put(result)
+
+    def run() -> None:
+        try:
+            asyncio.run(produce())
+        except Exception as e:  # noqa: BLE001
+            results.put(e)
+        finally:
+            results.put(done)
+
+    threading.Thread(target=run, daemon=True).start()
+    try:
+        while (result := results.get()) is not done:
+            if isinstance(result, Exception):
+                raise result
+            yield result
+    finally:
+        stop.set()
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.core.cache import BaseCache, caches
+
+from .dto import HtmlCheckResult
+
+DEFAULT_CACHE_MAXSIZE = 128
+CACHE_KEY_PREFIX = "html_check"
+
+
+def make_cache_key(html: str, preset_name: str, preset_version: str, parser_backend: str) -> str:
+    """Ключ результата проверки: хэш html, пресет с версией его схемы и парсер"""
+    html_hash = hashlib.sha256(html.encode()).hexdigest()
+    return make_hash_cache_key(html_hash, preset_name, preset_version, parser_backend)
+
+
+def make_hash_cache_key(
+    html_hash: str,
+    preset_name: str,
+    preset_version: str,
+    parser_backend: str,
+    partial: bool = False,
+) -> str:
+    """Ключ по готовому sha256 html. partial - html только начало страницы, после которого разбор остановлен
+    (streaming.StreamingParser), такие результаты не совпадают с результатами целых страниц с тем же html
+    """
+    kind = f"{parser_backend}:partial" if partial else parser_backend
+    return f"{CACHE_KEY_PREFIX}:{preset_name}:{preset_version}:{kind}:{html_hash}"
+
+
+class ResultCache:
+    """Кэш результатов проверки html"""
+
+    def get(self, key: str) -> HtmlCheckResult | None:
+        raise NotImplementedError
+
+    def set(self, key: str, result: HtmlCheckResult) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    async def aget(self, key: str) -> HtmlCheckResult | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, result: HtmlCheckResult) -> None:
+        await asyncio.to_thread(self.set, key, result)
+
+
+class LRUResultCache(ResultCache):
+    """Кэш в памяти процесса, вытесняет давно не использованные результаты"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_MAXSIZE):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive integer")
+        self.maxsize = maxsize
+        self._results: OrderedDict[str, HtmlCheckResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: str) -> HtmlCheckResult | None:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def set(self, key: str, result: HtmlCheckResult) -> None:
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+    async def aget(self, key: str) -> HtmlCheckResult | None:
+        return self.get(key)
+
+    async def aset(self, key: str, result: HtmlCheckResult) -> None:
+        self.set(key, result)
+
+
+class DjangoResultCache(ResultCache):
+    """Кэш через django.core.cache, подходит для нескольких процессов"""
+
+    def __init__(self, alias: str = "default", timeout: int | None = None):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    def get(self, key: str) -> HtmlCheckResult | None:
+        return self.cache.get(key)
+
+    def set(self, key: str, result: HtmlCheckResult) -> None:
+        self.cache.set(key, result, timeout=self.timeout)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    async def aget(self, key: str) -> HtmlCheckResult | None:
+        return await self.cache.aget(key)
+
+    async def aset(self, key: str, result: HtmlCheckResult) -> None:
+        await self.cache.aset(key, result, timeout=self.timeout)
+
+
+class FileResultCache(ResultCache):
+    """Кэш в файлах на диске, при переполнении удаляются файлы, которые дольше всего не читали"""
+
+    suffix = ".pickle"
+
+    def __init__(self, directory: str | Path, maxsize: int = DEFAULT_CACHE_MAXSIZE):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive integer")
+        self.directory = Path(directory)
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+
+    def _get_path(self, key: str) -> Path:
+        file_name = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / f"{file_name}{self.suffix}"
+
+    def get(self, key: str) -> HtmlCheckResult | None:
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as file:
+                result = pickle.load(file)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # файл поврежден или записан старой версией кода
+            path.unlink(missing_ok=True)
+            return None
+        return result
+
+    def set(self, key: str, result: HtmlCheckResult) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._get_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as file:
+            pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        paths = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                paths.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        paths.sort()
+        for _, path in paths[: max(len(paths) - self.maxsize, 0)]:
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.directory.glob(f"*{self.suffix}"):
+            path.unlink(missing_ok=True)
+
+
+RESULT_CACHE_BACKENDS = {
+    "lru": LRUResultCache,
+    "django": DjangoResultCache,
+    "file": FileResultCache,
+}
+
+
+def get_result_cache(config: dict | None) -> ResultCache | None:
+    """Кэш по настройке вида {"BACKEND": "lru", "OPTIONS": {"maxsize": 128}}, None если кэш выключен"""
+    if not config:
+        return None
+    backend_name = config.get("BACKEND", "lru")
+    if backend_name not in RESULT_CACHE_BACKENDS:
+        raise ValueError(f"Unknown result cache backend: {backend_name}")
+    return RESULT_CACHE_BACKENDS[backend_name](**config.get("OPTIONS", {}))
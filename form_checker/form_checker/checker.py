@@ -1,32 +1,555 @@
-from bs4 import BeautifulSoup
+import asyncio
+import dataclasses
+import hashlib
+import logging
+import time
+from collections.abc import Iterator
+from concurrent.futures import Executor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from common.request_sender import RequestSender
+from common.async_request_sender import AsyncRequestSender
+from common.request_sender import RequestAttempt, RequestSender
+from html_checker.backends import DEFAULT_PARSER_BACKEND, Element, LxmlBackend, ParserBackend, get_backend
+from html_checker.incremental import NodeState, NodeTracker, PreviousCheck, diff_states
+from html_checker.index import DocumentIndex
+from html_checker.profiling import CheckProfile, get_current_profile, measure_phase, profiling
+from html_checker.streaming import StreamingParser, get_stop_selectors
+from html_checker.summary import summarize
 from html_checker.utils import get_errors_levels_stat
 
+from .cache import ResultCache, make_cache_key, make_hash_cache_key
 from .dto import HtmlCheckResult
 from .exceptions import HtmlTagNotFound
+from .metrics import CheckMetrics
 from .presets import PRESETS_MAP
 
+if TYPE_CHECKING:
+    from .history import CheckHistory
+
+logger = logging.getLogger(__name__)
+
 request_sender = RequestSender()
 
 
+def record_request_attempt(attempt: RequestAttempt) -> None:
+    """Хук on_attempt отправителей запросов: попытка загрузки страницы попадает в профиль текущей проверки"""
+    profile = get_current_profile()
+    if profile is not None:
+        profile.requests.append(dataclasses.asdict(attempt))
+        profile.count("requests")
+        profile.count("response_bytes", attempt.size)
+
+
+def run_check(  # noqa: PLR0913
+    html: str,
+    preset_name: str,
+    parser_backend: str,
+    previous_state: NodeState | None = None,
+    track_nodes: bool = False,
+    profile: bool = False,
+    profile_details: bool = True,
+) -> HtmlCheckResult:
+    """Разбор и проверка html без кэша, функция модуля, чтобы ее можно было отправить в пул процессов.
+
+    В результат попадает дерево TagSummary без элементов документа: оно в несколько раз быстрее сериализуется,
+    чем дерево TagChecker, и не держит в памяти разобранный документ.
+
+    previous_state - состояние прошлой проверки страницы, ошибки поддеревьев с прежним отпечатком берутся из него.
+    track_nodes - сохранить в результате состояние этой проверки для следующей.
+    profile - замерить этапы, профиль попадает в результат.
+    profile_details - замерить и поиск элементов полей и проверки тэгов.
+    """
+    check_profile = CheckProfile(details=profile_details) if profile else None
+    with profiling(check_profile):
+        backend = get_backend(parser_backend)
+        with measure_phase(check_profile, "parse"):
+            html_tag = backend.parse(html)
+        return _check_document(
+            html_tag,
+            backend=backend,
+            preset_name=preset_name,
+            html_size=len(html),
+            previous_state=previous_state,
+            track_nodes=track_nodes,
+            check_profile=check_profile,
+        )
+
+
+def _check_document(  # noqa: PLR0913
+    html_tag: Element | None,
+    backend: ParserBackend,
+    preset_name: str,
+    html_size: int | None,
+    previous_state: NodeState | None,
+    track_nodes: bool,
+    check_profile: CheckProfile | None,
+) -> HtmlCheckResult:
+    """Проверка разобранного документа, html_tag - корневой тэг <html> или None.
+    html_size None - размер неизвестен, страница загружена не целиком
+    """
+    if html_tag is None:
+        raise HtmlTagNotFound("Не найден корневой тэг <html>")
+    preset = PRESETS_MAP[preset_name]
+    with measure_phase(check_profile, "fill"):
+        html_preset = preset(
+            elem=html_tag,
+            backend=backend,
+            document_index=DocumentIndex(root=html_tag, backend=backend),
+        )
+    tracker = None
+    previous = None
+    if track_nodes or previous_state is not None:
+        with measure_phase(check_profile, "track"):
+            tracker = NodeTracker(html_preset, version=preset.get_schema_version())
+    if previous_state is not None:
+        previous = PreviousCheck(state=previous_state, tracker=tracker)
+    with measure_phase(check_profile, "validate"):
+        html_preset.run_validators(previous=previous)
+    with measure_phase(check_profile, "stats"):
+        errors_level_stat = get_errors_levels_stat(tag=html_preset)
+    with measure_phase(check_profile, "summarize"):
+        summary = summarize(html_preset)
+    if check_profile is not None:
+        tags = list(html_preset.iter_tags())
+        if html_size is not None:
+            check_profile.count("html_size", html_size)
+        check_profile.count("tags", len(tags))
+        check_profile.count("matched_tags", sum(1 for tag in tags if tag.exist()))
+        check_profile.count("errors", sum(errors_level_stat.values()))
+        check_profile.count("reused_subtrees", len(previous.reused) if previous is not None else 0)
+    return HtmlCheckResult(
+        preset=summary,
+        errors_level_stat=errors_level_stat,
+        preset_name=preset_name,
+        node_state=tracker.get_state() if track_nodes else None,
+        reused_subtrees=len(previous.reused) if previous is not None else 0,
+        profile=check_profile,
+    )
+
+
+@dataclass(frozen=True)
+class _StreamedPage:
+    """Результат HtmlChecker._fetch_and_parse"""
+
+    # загруженный html, при partial - только начало страницы
+    html: str
+    # корневой тэг <html> или None, не разбирается при cached_result
+    html_tag: Element | None
+    partial: bool
+    # ключ, с которым результат проверки этого html сохраняется в кэш
+    cache_key: str | None
+    cached_result: HtmlCheckResult | None
+
+
 class HtmlChecker:
-    def __init__(self, request_sender: RequestSender):
+    def __init__(  # noqa: PLR0913
+        self,
+        request_sender: RequestSender,
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        result_cache: ResultCache | None = None,
+        async_request_sender: AsyncRequestSender | None = None,
+        executor: Executor | None = None,
+        history: "CheckHistory | None" = None,
+        profile_checks: bool = False,
+        metrics: CheckMetrics | None = None,
+        stream_pages: bool = False,
+        incremental: bool = False,
+    ):
         self.request_sender = request_sender
+        self.parser_backend = parser_backend
+        self.result_cache = result_cache
+        self.async_request_sender = async_request_sender or AsyncRequestSender()
+        # где выполняются разбор и проверка, например CheckProcessPool. None - check выполняет их в текущем
+        # потоке, acheck - в пуле потоков цикла событий по умолчанию
+        self.executor = executor
+        # сохранение проверок в бд, None - не сохранять
+        self.history = history
+        # профиль этапов в результате и в логе каждой проверки, без него точки замера почти ничего не стоят
+        self.profile_checks = profile_checks
+        # учет проверок для /metrics, None - не учитывать
+        self.metrics = metrics
+        # check пресетов с streaming.get_stop_selectors разбирает страницу парсером lxml по частям во время загрузки,
+        # без executor, и прекращает загрузку, когда остаток страницы уже не может изменить результат
+        self.stream_pages = stream_pages
+        # при повторной проверке страницы ошибки неизменившихся поддеревьев берутся из прошлой проверки в history.
+        # Для этого каждая проверка считает отпечатки всех поддеревьев, что заметно дороже самой проверки
+        self.incremental = incremental
 
-    def check(self, html: str, preset_name: str, url: str) -> HtmlCheckResult:
-        if url != "":
-            html = self.request_sender.request(url=url)
-        soup = BeautifulSoup(html, "lxml")
-        html_tag = soup.select_one("html")
-        if html_tag is None:
-            raise HtmlTagNotFound("Не найден корневой тэг <html>")
-        preset = PRESETS_MAP[preset_name]
-        html_preset = preset(elem=html_tag)
-        html_preset.run_validators()
-        errors_level_stat = get_errors_levels_stat(tag=html_preset)
-        return HtmlCheckResult(
-            preset=html_preset,
-            errors_level_stat=errors_level_stat,
+    def check(self, html: str, preset_name: str, url: str, parser_backend: str | None = None) -> HtmlCheckResult:
+        parser_backend = parser_backend or self.parser_backend
+        if self._can_stream(url, preset_name, parser_backend):
+            return self._check_stream(preset_name=preset_name, url=url, parser_backend=parser_backend)
+        with self._profiling(preset_name) as profile:
+            if url != "":
+                with measure_phase(profile, "fetch"):
+                    html = self.request_sender.request(url=url)
+            cache_key = self._get_cache_key(html=html, preset_name=preset_name, parser_backend=parser_backend)
+            check_result = None
+            if cache_key is not None:
+                with measure_phase(profile, "cache"):
+                    check_result = self.result_cache.get(cache_key)
+            cache_hit = check_result is not None if cache_key is not None else None
+            previous_state = None
+            if self._needs_previous_state(url, check_result):
+                with measure_phase(profile, "history"):
+                    previous_state = self.history.get_previous_state(
+                        url=url,
+                        preset_name=preset_name,
+                        parser_backend=parser_backend,
+                    )
+            if check_result is None:
+                started_at = time.perf_counter()
+                check_result = self._run_check(
+                    html,
+                    preset_name,
+                    parser_backend,
+                    previous_state,
+                    self._is_incremental(url),
+                    profile is not None,
+                    self.profile_checks,
+                )
+                self._merge_check_profile(
+                    check_result,
+                    profile,
+                    seconds=time.perf_counter() - started_at,
+                    in_executor=self.executor is not None,
+                )
+                if cache_key is not None:
+                    check_result.cache_key = cache_key
+                    with measure_phase(profile, "cache"):
+                        self.result_cache.set(cache_key, check_result)
+            elif profile is not None:
+                profile.count("cache_hits")
+            check_result = self._with_diff(check_result, previous_state=previous_state)
+            if self.history is not None:
+                with measure_phase(profile, "history"):
+                    self.history.save(check_result, html=html, url=url, parser_backend=parser_backend)
+        return self._finish(
+            check_result,
+            profile=profile,
+            url=url,
+            parser_backend=parser_backend,
+            cache_hit=cache_hit,
+        )
+
+    def _can_stream(self, url: str, preset_name: str, parser_backend: str) -> bool:
+        """Разбирать ли страницу по мере загрузки: только если разбор пресета может остановиться раньше конца
+        страницы, иначе обычная проверка быстрее - с условными запросами и в executor
+        """
+        if url == "" or not self.stream_pages or parser_backend != LxmlBackend.name:
+            return False
+        return get_stop_selectors(PRESETS_MAP[preset_name]) is not None
+
+    def _is_incremental(self, url: str) -> bool:
+        """Нужны ли состояние прошлой проверки страницы и отпечатки поддеревьев этой"""
+        return self.incremental and self.history is not None and url != ""
+
+    def _needs_previous_state(self, url: str, cached_result: HtmlCheckResult | None) -> bool:
+        """Загружать ли прошлую проверку: для самой проверки при промахе кэша или для разницы с результатом из кэша"""
+        if not self._is_incremental(url):
+            return False
+        return cached_result is None or cached_result.node_state is not None
+
+    def _check_stream(self, preset_name: str, url: str, parser_backend: str) -> HtmlCheckResult:
+        """check страницы, которая разбирается по мере загрузки, только для пресетов с get_stop_selectors.
+
+        Результат проверки, загрузка которой прекращена, сохраняется в кэш с ключом по хэшу загруженной части,
+        поэтому перед разбором каждой части он ищется в кэше по хэшу уже загруженного: та же страница
+        загружается теми же частями и останавливается на той же части. Разбор и проверка идут в текущем потоке,
+        без executor. В историю проверка с прекращенной загрузкой не сохраняется: снимок не совпадал бы
+        со страницей, а следующая проверка сравнивалась бы с проверкой части страницы.
+        """
+        with self._profiling(preset_name) as profile:
+            page = self._fetch_and_parse(
+                url=url,
+                preset_name=preset_name,
+                parser_backend=parser_backend,
+                profile=profile,
+            )
+            check_result = page.cached_result
+            cache_hit = check_result is not None if self.result_cache is not None else None
+            previous_state = None
+            if self._needs_previous_state(url, check_result):
+                with measure_phase(profile, "history"):
+                    previous_state = self.history.get_previous_state(
+                        url=url,
+                        preset_name=preset_name,
+                        parser_backend=parser_backend,
+                    )
+            if check_result is None:
+                check_profile = CheckProfile(details=self.profile_checks) if profile is not None else None
+                started_at = time.perf_counter()
+                with profiling(check_profile):
+                    check_result = _check_document(
+                        page.html_tag,
+                        backend=get_backend(LxmlBackend.name),
+                        preset_name=preset_name,
+                        html_size=None if page.partial else len(page.html),
+                        previous_state=previous_state,
+                        track_nodes=self._is_incremental(url),
+                        check_profile=check_profile,
+                    )
+                self._merge_check_profile(
+                    check_result,
+                    profile,
+                    seconds=time.perf_counter() - started_at,
+                    in_executor=False,
+                )
+                if page.cache_key is not None:
+                    check_result.cache_key = page.cache_key
+                    with measure_phase(profile, "cache"):
+                        self.result_cache.set(page.cache_key, check_result)
+            elif profile is not None:
+                profile.count("cache_hits")
+            if profile is not None:
+                profile.count("stream_stopped", int(page.partial))
+                profile.count("stream_received", len(page.html))
+            check_result = self._with_diff(check_result, previous_state=previous_state)
+            if self.history is not None and not page.partial:
+                with measure_phase(profile, "history"):
+                    self.history.save(check_result, html=page.html, url=url, parser_backend=parser_backend)
+        return self._finish(
+            check_result,
+            profile=profile,
+            url=url,
+            parser_backend=parser_backend,
+            cache_hit=cache_hit,
+        )
+
+    def _fetch_and_parse(
+        self,
+        url: str,
+        preset_name: str,
+        parser_backend: str,
+        profile: CheckProfile | None,
+    ) -> "_StreamedPage":
+        """Загрузка и разбор страницы по частям до остановки разбора, конца страницы или результата в кэше.
+        Время разбора частей - этап parse, поиска в кэше - cache, остальное время загрузки - этап fetch
+        """
+        parser = StreamingParser(stop_selectors=get_stop_selectors(PRESETS_MAP[preset_name]))
+        parts = []
+        html_hash = hashlib.sha256()
+        cache_key = None
+        cached_result = None
+        parse_seconds = 0.0
+        cache_seconds = 0.0
+        started_at = time.perf_counter()
+        # закрытие итератора прекращает загрузку остатка страницы
+        with closing(self.request_sender.iter_text(url=url)) as texts:
+            for text in texts:
+                if not text:
+                    continue
+                parts.append(text)
+                html_hash.update(text.encode())
+                cache_started_at = time.perf_counter()
+                cache_key = self._get_hash_cache_key(html_hash.hexdigest(), preset_name, parser_backend, partial=True)
+                cached_result = self.result_cache.get(cache_key) if cache_key is not None else None
+                cache_seconds += time.perf_counter() - cache_started_at
+                if cached_result is not None:
+                    break
+                feed_started_at = time.perf_counter()
+                is_stopped = parser.feed(text)
+                parse_seconds += time.perf_counter() - feed_started_at
+                if is_stopped:
+                    break
+        html = "".join(parts)
+        partial = parser.stopped or cached_result is not None
+        html_tag = None
+        if cached_result is None:
+            if not partial:
+                # страница загружена целиком: ее результат мог сохранить и обычный check
+                cache_started_at = time.perf_counter()
+                cache_key = self._get_hash_cache_key(html_hash.hexdigest(), preset_name, parser_backend)
+                cached_result = self.result_cache.get(cache_key) if cache_key is not None else None
+                cache_seconds += time.perf_counter() - cache_started_at
+            if cached_result is None:
+                feed_started_at = time.perf_counter()
+                html_tag = parser.close()
+                parse_seconds += time.perf_counter() - feed_started_at
+        if profile is not None:
+            profile.add_phase("fetch", time.perf_counter() - started_at - parse_seconds - cache_seconds)
+            profile.add_phase("parse", parse_seconds)
+            if cache_key is not None:
+                profile.add_phase("cache", cache_seconds)
+        return _StreamedPage(
+            html=html,
+            html_tag=html_tag,
+            partial=partial,
+            cache_key=cache_key,
+            cached_result=cached_result,
+        )
+
+    async def acheck(
+        self,
+        html: str,
+        preset_name: str,
+        url: str,
+        parser_backend: str | None = None,
+    ) -> HtmlCheckResult:
+        """Как check, но страница загружается без блокировки, а разбор и проверка выполняются в executor"""
+        with self._profiling(preset_name) as profile:
+            if url != "":
+                with measure_phase(profile, "fetch"):
+                    html = await self.async_request_sender.request(url=url)
+            parser_backend = parser_backend or self.parser_backend
+            cache_key = self._get_cache_key(html=html, preset_name=preset_name, parser_backend=parser_backend)
+            check_result = None
+            if cache_key is not None:
+                with measure_phase(profile, "cache"):
+                    check_result = await self.result_cache.aget(cache_key)
+            cache_hit = check_result is not None if cache_key is not None else None
+            previous_state = None
+            if self._needs_previous_state(url, check_result):
+                with measure_phase(profile, "history"):
+                    previous_state = await self.history.aget_previous_state(
+                        url=url,
+                        preset_name=preset_name,
+                        parser_backend=parser_backend,
+                    )
+            if check_result is None:
+                loop = asyncio.get_running_loop()
+                started_at = time.perf_counter()
+                check_result = await loop.run_in_executor(
+                    self.executor,
+                    run_check,
+                    html,
+                    preset_name,
+                    parser_backend,
+                    previous_state,
+                    self._is_incremental(url),
+                    profile is not None,
+                    self.profile_checks,
+                )
+                self._merge_check_profile(
+                    check_result,
+                    profile,
+                    seconds=time.perf_counter() - started_at,
+                    in_executor=True,
+                )
+                if cache_key is not None:
+                    check_result.cache_key = cache_key
+                    with measure_phase(profile, "cache"):
+                        await self.result_cache.aset(cache_key, check_result)
+            elif profile is not None:
+                profile.count("cache_hits")
+            check_result = self._with_diff(check_result, previous_state=previous_state)
+            if self.history is not None:
+                with measure_phase(profile, "history"):
+                    await self.history.asave(check_result, html=html, url=url, parser_backend=parser_backend)
+        return self._finish(
+            check_result,
+            profile=profile,
+            url=url,
+            parser_backend=parser_backend,
+            cache_hit=cache_hit,
+        )
+
+    @contextmanager
+    def _profiling(self, preset_name: str) -> Iterator[CheckProfile | None]:
+        """Профиль проверки, если включены профилирование или метрики, и учет проверок с исключением"""
+        profile = None
+        if self.profile_checks or self.metrics is not None:
+            profile = CheckProfile(details=self.profile_checks)
+        with profiling(profile):
+            try:
+                yield profile
+            except Exception as error:
+                if self.metrics is not None:
+                    self.metrics.record_failure(preset_name=preset_name, error=error)
+                raise
+
+    def _run_check(self, *args: object) -> HtmlCheckResult:
+        if self.executor is None:
+            return run_check(*args)
+        return self.executor.submit(run_check, *args).result()
+
+    @staticmethod
+    def _merge_check_profile(
+        check_result: HtmlCheckResult,
+        profile: CheckProfile | None,
+        seconds: float,
+        in_executor: bool,
+    ) -> None:
+        """Перенести профиль run_check в профиль проверки, чтобы он не попал в кэш вместе с результатом.
+
+        seconds - время вызова run_check, в executor время сверх его этапов - ожидание свободного воркера
+        и передача аргументов и результата между потоками или процессами.
+        """
+        if profile is None or check_result.profile is None:
+            return
+        profile.merge(check_result.profile)
+        if in_executor:
+            profile.add_phase("executor", max(0.0, seconds - check_result.profile.total))
+        check_result.profile = None
+
+    def _finish(  # noqa: PLR0913
+        self,
+        check_result: HtmlCheckResult,
+        profile: CheckProfile | None,
+        url: str,
+        parser_backend: str,
+        cache_hit: bool | None,
+    ) -> HtmlCheckResult:
+        """Учесть проверку в метриках и вернуть результат с профилем, копию - сам результат может лежать в кэше"""
+        if profile is None:
+            return check_result
+        if self.metrics is not None:
+            self.metrics.record_check(
+                check_result,
+                profile=profile,
+                parser_backend=parser_backend,
+                cache_hit=cache_hit,
+            )
+        if not self.profile_checks:
+            return check_result
+        logger.info(
+            "check %s %s: %.1f ms, %s",
+            check_result.preset_name,
+            url or "<html>",
+            profile.total * 1000,
+            profile.format_phases(),
+            extra={"check_profile": profile.to_dict()},
+        )
+        return dataclasses.replace(check_result, profile=profile)
+
+    def get_cached_result(self, cache_key: str) -> HtmlCheckResult | None:
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get(cache_key)
+
+    @staticmethod
+    def _with_diff(check_result: HtmlCheckResult, previous_state: NodeState | None) -> HtmlCheckResult:
+        """Результат с разницей ошибок относительно прошлой проверки, копия - сам результат может лежать в кэше"""
+        if previous_state is None or check_result.node_state is None:
+            return check_result
+        return dataclasses.replace(check_result, diff=diff_states(previous_state, check_result.node_state))
+
+    def _get_cache_key(self, html: str, preset_name: str, parser_backend: str) -> str | None:
+        if self.result_cache is None:
+            return None
+        return make_cache_key(
+            html=html,
+            preset_name=preset_name,
+            preset_version=PRESETS_MAP[preset_name].get_schema_version(),
+            parser_backend=parser_backend,
+        )
+
+    def _get_hash_cache_key(
+        self,
+        html_hash: str,
+        preset_name: str,
+        parser_backend: str,
+        partial: bool = False,
+    ) -> str | None:
+        """Ключ кэша по sha256 загруженного html (hexdigest), partial - загрузка прекращена на этом html"""
+        if self.result_cache is None:
+            return None
+        return make_hash_cache_key(
+            html_hash=html_hash,
             preset_name=preset_name,
+            preset_version=PRESETS_MAP[preset_name].get_schema_version(),
+            parser_backend=parser_backend,
+            partial=partial,
         )
@@ -1,11 +1,38 @@
 from collections import OrderedDict
+from collections.abc import Iterator
 from dataclasses import dataclass
 
-from html_checker import TagChecker
+from html_checker import serializers
+from html_checker.incremental import CheckDiff, NodeState
+from html_checker.profiling import CheckProfile
+from html_checker.summary import TagSummary
 
 
 @dataclass
 class HtmlCheckResult:
     preset_name: str
-    preset: TagChecker
+    # дерево результата без элементов документа, его можно закэшировать или вернуть из другого процесса
+    preset: TagSummary
     errors_level_stat: OrderedDict
+    # ключ в кэше результатов, по нему результат можно получить повторно, например для ленивой отрисовки
+    cache_key: str | None = None
+    # отпечатки и ошибки тэгов для следующей проверки страницы, заполняется при сохранении истории
+    node_state: NodeState | None = None
+    # количество поддеревьев, ошибки которых взяты из прошлой проверки
+    reused_subtrees: int = 0
+    # разница ошибок с прошлой проверкой страницы
+    diff: CheckDiff | None = None
+    # время этапов и счетчики этой проверки, заполняется, если профилирование включено
+    profile: CheckProfile | None = None
+
+    def iter_json(self, compact: bool = False) -> Iterator[str]:
+        """Результат проверки в JSON по частям, для StreamingHttpResponse"""
+        extra = {
+            "preset_name": self.preset_name,
+            "errors_level_stat": {level.level: count for level, count in self.errors_level_stat.items()},
+        }
+        if self.diff is not None:
+            extra["diff"] = self.diff.to_dict()
+        if self.profile is not None:
+            extra["profile"] = self.profile.to_dict()
+        return serializers.iter_json(self.preset, compact=compact, extra=extra)
@@ -0,0 +1,67 @@
+from collections.abc import Callable
+
+from django.conf import settings
+
+from common.async_request_sender import AsyncRequestSender
+from common.download import DEFAULT_MAX_BYTES
+from common.request_sender import RequestAttempt, RequestSender
+
+from .cache import get_result_cache
+from .checker import HtmlChecker, record_request_attempt
+from .history import CheckHistory
+from .metrics import get_check_metrics
+from .pool import CheckProcessPool
+
+
+def _combine_hooks(*hooks: Callable[[RequestAttempt], None] | None) -> Callable[[RequestAttempt], None] | None:
+    hooks = [hook for hook in hooks if hook is not None]
+    if len(hooks) <= 1:
+        return hooks[0] if hooks else None
+
+    def on_attempt(attempt: RequestAttempt) -> None:
+        for hook in hooks:
+            hook(attempt)
+
+    return on_attempt
+
+
+def _get_on_attempt() -> Callable[[RequestAttempt], None] | None:
+    """Хук попыток запроса для профилирования и метрик из настроек проекта"""
+    metrics = get_check_metrics()
+    return _combine_hooks(
+        record_request_attempt if getattr(settings, "CHECK_PROFILING", False) else None,
+        metrics.record_request_attempt if metrics is not None else None,
+    )
+
+
+def create_async_request_sender() -> AsyncRequestSender:
+    """AsyncRequestSender с ограничением размера страницы, профилированием и метриками из настроек проекта"""
+    return AsyncRequestSender(
+        on_attempt=_get_on_attempt(),
+        max_bytes=getattr(settings, "CHECK_FETCH_MAX_BYTES", DEFAULT_MAX_BYTES),
+    )
+
+
+def create_html_checker(process_pool_workers: int | None = None) -> HtmlChecker:
+    """HtmlChecker с кэшем результатов, историей проверок, пулом процессов, профилированием, метриками
+    и разбором страниц по частям из настроек проекта.
+
+    process_pool_workers - размер пула процессов для разбора и проверки, по умолчанию CHECK_PROCESS_POOL_WORKERS,
+    0 - проверять в потоке запроса.
+    """
+    if process_pool_workers is None:
+        process_pool_workers = getattr(settings, "CHECK_PROCESS_POOL_WORKERS", 0)
+    return HtmlChecker(
+        request_sender=RequestSender(
+            on_attempt=_get_on_attempt(),
+            max_bytes=getattr(settings, "CHECK_FETCH_MAX_BYTES", DEFAULT_MAX_BYTES),
+        ),
+        result_cache=get_result_cache(getattr(settings, "CHECK_RESULT_CACHE", None)),
+        async_request_sender=create_async_request_sender(),
+        executor=CheckProcessPool(workers=process_pool_workers) if process_pool_workers else None,
+        history=CheckHistory() if getattr(settings, "CHECK_HISTORY_ENABLED", False) else None,
+        profile_checks=getattr(settings, "CHECK_PROFILING", False),
+        metrics=get_check_metrics(),
+        stream_pages=getattr(settings, "CHECK_STREAM_PAGES", False),
+        incremental=getattr(settings, "CHECK_INCREMENTAL", False),
+    )
@@ -0,0 +1,130 @@
+import gzip
+import logging
+from collections.abc import Iterator
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, connection, transaction
+
+from form_checker.models import CheckRun, Finding, HtmlSnapshot
+from html_checker import TagChecker
+from html_checker.exceptions import ErrorDetail
+from html_checker.incremental import NodeState
+from html_checker.summary import TagSummary
+from html_checker.tag import NON_FIELD_ERROR
+
+from .dto import HtmlCheckResult
+from .presets import PRESETS_MAP
+
+logger = logging.getLogger(__name__)
+
+FINDING_COLUMNS = ("run", "url", "preset_name", "created_at", "level", "path", "attribute", "message")
+
+
+def iter_findings(preset: TagChecker | TagSummary) -> Iterator[tuple[str, str, ErrorDetail]]:
+    """Все ошибки дерева: путь тэга, имя атрибута (пустое для ошибок самого тэга) и ошибка"""
+    for tag in preset.iter_tags():
+        for error in tag.errors.get(NON_FIELD_ERROR, ()):
+            yield tag.path_name, "", error
+        for attribute in tag.attributes.values():
+            for error in attribute.errors:
+                yield tag.path_name, attribute.name, error
+
+
+def _insert_findings(run: CheckRun, findings: Iterator[tuple[str, str, ErrorDetail]]) -> None:
+    """Вставка ошибок одним executemany: bulk_create на тысячах строк тратит основное время на подготовку полей"""
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(quote_name(Finding._meta.get_field(name).column) for name in FINDING_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(FINDING_COLUMNS))
+    sql = f"INSERT INTO {quote_name(Finding._meta.db_table)} ({columns}) VALUES ({placeholders})"
+    created_at = connection.ops.adapt_datetimefield_value(run.created_at)
+    rows = [
+        (run.pk, run.url, run.preset_name, created_at, int(error.level), path, attribute, str(error.message))
+        for path, attribute, error in findings
+    ]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+def _compress_state(state: NodeState | None) -> bytes | None:
+    if state is None:
+        return None
+    return gzip.compress(state.to_json().encode(), compresslevel=6)
+
+
+class CheckHistory:
+    """Сохранение проверок в бд: сжатый снимок html, запуск проверки и найденные ошибки.
+
+    История не должна ломать проверку: ошибки бд пишутся в лог, save возвращает None,
+    get_previous_state - None, как для страницы без прошлых проверок.
+    """
+
+    def save(self, check_result: HtmlCheckResult, html: str, url: str, parser_backend: str) -> CheckRun | None:
+        try:
+            return self._save(check_result, html=html, url=url, parser_backend=parser_backend)
+        except DatabaseError:
+            logger.exception("Failed to save check of %s to history", url or "<html>")
+            return None
+
+    def _save(self, check_result: HtmlCheckResult, html: str, url: str, parser_backend: str) -> CheckRun:
+        counts = {level.level: count for level, count in check_result.errors_level_stat.items()}
+        levels_found = [int(level) for level, count in check_result.errors_level_stat.items() if count]
+        with transaction.atomic():
+            run = CheckRun.objects.create(
+                url=url,
+                preset_name=check_result.preset_name,
+                preset_version=PRESETS_MAP[check_result.preset_name].get_schema_version(),
+                parser_backend=parser_backend,
+                snapshot=HtmlSnapshot.get_or_create_for_html(html),
+                max_level=max(levels_found, default=0),
+                info_count=counts.get("info", 0),
+                warning_count=counts.get("warning", 0),
+                danger_count=counts.get("danger", 0),
+                # состояние нужно только для повторной проверки той же страницы
+                node_state=_compress_state(check_result.node_state) if url else None,
+            )
+            _insert_findings(run, iter_findings(check_result.preset))
+        return run
+
+    async def asave(
+        self,
+        check_result: HtmlCheckResult,
+        html: str,
+        url: str,
+        parser_backend: str,
+    ) -> CheckRun | None:
+        return await sync_to_async(self.save)(check_result, html=html, url=url, parser_backend=parser_backend)
+
+    def get_previous_state(self, url: str, preset_name: str, parser_backend: str) -> NodeState | None:
+        """Состояние последней проверки страницы тем же пресетом и парсером"""
+        try:
+            # точка сохранения: ошибка запроса не должна ломать внешнюю транзакцию, если она есть
+            with transaction.atomic():
+                data = self._get_previous_state_data(url=url, preset_name=preset_name, parser_backend=parser_backend)
+        except DatabaseError:
+            logger.exception("Failed to load previous check of %s from history", url)
+            return None
+        if data is None:
+            return None
+        return NodeState.from_json(gzip.decompress(bytes(data)))
+
+    @staticmethod
+    def _get_previous_state_data(url: str, preset_name: str, parser_backend: str) -> bytes | None:
+        return (
+            CheckRun.objects.filter(
+                url=url,
+                preset_name=preset_name,
+                parser_backend=parser_backend,
+                node_state__isnull=False,
+            )
+            .order_by("-created_at")
+            .values_list("node_state", flat=True)
+            .first()
+        )
+
+    async def aget_previous_state(self, url: str, preset_name: str, parser_backend: str) -> NodeState | None:
+        return await sync_to_async(self.get_previous_state)(
+            url=url,
+            preset_name=preset_name,
+            parser_backend=parser_backend,
+        )
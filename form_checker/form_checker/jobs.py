@@ -0,0 +1,327 @@
+import dataclasses
+import datetime
+import gzip
+import json
+import logging
+import os
+import pickle
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterator
+from urllib.parse import urlsplit
+
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from requests.exceptions import RequestException
+
+from common.exceptions import ResponseRejected
+from common.request_sender import get_backoff
+from form_checker.models import CheckJob, HostThrottle
+
+from .checker import HtmlChecker
+from .dto import HtmlCheckResult
+from .exceptions import HtmlTagNotFound
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_STALE_TIMEOUT = 300.0
+DEFAULT_HOST_INTERVAL = 1.0
+RETRY_BACKOFF_FACTOR = 30.0
+RETRY_BACKOFF_MAX = 3600.0
+# сколько готовых задач просматривается за раз, задачи хостов с исчерпанным лимитом пропускаются
+CLAIM_BATCH_SIZE = 20
+EVENTS_POLL_INTERVAL = 1.0
+EVENTS_TIMEOUT = 300.0
+DEFAULT_MAX_EVENT_STREAMS = 8
+
+
+def submit_job(
+    preset_name: str,
+    url: str = "",
+    html: str = "",
+    parser_backend: str = "",
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> CheckJob:
+    """Поставить проверку в очередь, выполнит ее первый свободный обработчик"""
+    return CheckJob.objects.create(
+        url=url,
+        host=urlsplit(url).hostname or "",
+        html=html,
+        preset_name=preset_name,
+        parser_backend=parser_backend,
+        max_attempts=max_attempts,
+    )
+
+
+def dump_result(check_result: HtmlCheckResult) -> bytes:
+    # состояние тэгов нужно только истории проверок, в задаче оно не хранится
+    check_result = dataclasses.replace(check_result, node_state=None)
+    return gzip.compress(pickle.dumps(check_result, protocol=pickle.HIGHEST_PROTOCOL), compresslevel=6)
+
+
+def load_result(job: CheckJob) -> HtmlCheckResult | None:
+    if job.result is None:
+        return None
+    return pickle.loads(gzip.decompress(bytes(job.result)))  # noqa: S301
+
+
+def _format_datetime(value: datetime.datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def get_job_status(job: CheckJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "url": job.url,
+        "preset_name": job.preset_name,
+        "parser_backend": job.parser_backend,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "error": job.error,
+        "created_at": _format_datetime(job.created_at),
+        "run_after": _format_datetime(job.run_after),
+        "started_at": _format_datetime(job.started_at),
+        "finished_at": _format_datetime(job.finished_at),
+    }
+
+
+def iter_job_json(job: CheckJob, compact: bool = False) -> Iterator[str]:
+    """Статус задачи в JSON, в ключе "result" - результат проверки в том же виде, что отдает api/check/"""
+    check_result = load_result(job) if job.status == CheckJob.DONE else None
+    status = get_job_status(job)
+    if check_result is None:
+        yield json.dumps({**status, "result": None}, ensure_ascii=False)
+        return
+    yield json.dumps(status, ensure_ascii=False)[:-1] + ', "result": '
+    yield from check_result.iter_json(compact=compact)
+    yield "}"
+
+
+def iter_job_events(
+    job_id: int,
+    with_result: bool = True,
+    compact: bool = False,
+    poll_interval: float = EVENTS_POLL_INTERVAL,
+    timeout: float = EVENTS_TIMEOUT,
+) -> Iterator[str]:
+    """Server-sent events задачи: status при каждом изменении, после завершения - result и конец потока.
+
+    Через timeout секунд поток закрывается, EventSource переподключится сам. Получив завершенный статус,
+    клиент должен закрыть EventSource, иначе он переподключится и получит результат еще раз.
+    """
+    yield f"retry: {int(poll_interval * 1000)}\n\n"
+    deadline = time.monotonic() + timeout
+    last_status = None
+    while True:
+        job = CheckJob.objects.defer("html", "result").get(id=job_id)
+        status = get_job_status(job)
+        if status != last_status:
+            yield f"event: status\ndata: {json.dumps(status, ensure_ascii=False)}\n\n"
+            last_status = status
+        if job.is_finished():
+            if with_result and job.status == CheckJob.DONE:
+                # JSON без переводов строк, поэтому помещается в одно поле data
+                check_result = load_result(job)
+                yield f"event: result\ndata: {''.join(check_result.iter_json(compact=compact))}\n\n"
+            return
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(poll_interval)
+
+
+class _JobEventStream:
+    """Поток событий задачи, при закрытии освобождает место в JobEventStreams"""
+
+    def __init__(self, events: Iterator[str], release: Callable[[], None]):
+        self._events = events
+        self._release = release
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        return next(self._events)
+
+    def close(self) -> None:
+        # StreamingHttpResponse закрывает поток и тогда, когда его не начали читать
+        if self._release is not None:
+            self._events.close()
+            self._release()
+            self._release = None
+
+
+class JobEventStreams:
+    """Не больше max_streams одновременных потоков событий в процессе.
+
+    Поток занимает поток WSGI-сервера до EVENTS_TIMEOUT секунд и опрашивает бд, без ограничения потоки
+    событий могут занять весь сервер.
+    """
+
+    def __init__(self, max_streams: int = DEFAULT_MAX_EVENT_STREAMS):
+        self._semaphore = threading.BoundedSemaphore(max_streams)
+
+    def open(self, job_id: int, with_result: bool = True, compact: bool = False) -> Iterator[str] | None:
+        """Поток событий задачи для StreamingHttpResponse, None - мест нет, статус задачи нужно опрашивать"""
+        if not self._semaphore.acquire(blocking=False):
+            return None
+        events = iter_job_events(job_id=job_id, with_result=with_result, compact=compact)
+        return _JobEventStream(events, release=self._semaphore.release)
+
+
+class JobWorker:
+    """Обработчик очереди CheckJob в одном процессе.
+
+    Задача захватывается условным UPDATE по статусу, поэтому несколько процессов разбирают одну очередь
+    без блокировок строк. Пока задача выполняется, обработчик обновляет heartbeat_at, задачи с устаревшим
+    heartbeat_at возвращаются в очередь. Запросы к одному хосту не чаще раза в host_interval секунд.
+    """
+
+    def __init__(
+        self,
+        html_checker: HtmlChecker,
+        name: str | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        stale_timeout: float = DEFAULT_STALE_TIMEOUT,
+        host_interval: float = DEFAULT_HOST_INTERVAL,
+    ):
+        self.html_checker = html_checker
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.stale_timeout = datetime.timedelta(seconds=stale_timeout)
+        self.heartbeat_interval = stale_timeout / 3
+        self.host_interval = datetime.timedelta(seconds=host_interval)
+
+    def run(self, stop: threading.Event) -> None:
+        """Выполнять задачи, пока не установлен stop, текущая задача при остановке завершается"""
+        next_reclaim_at = 0.0
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                if time.monotonic() >= next_reclaim_at:
+                    self.reclaim_stale_jobs()
+                    next_reclaim_at = time.monotonic() + self.heartbeat_interval
+                if self.run_once():
+                    continue
+            except DatabaseError:
+                # временная недоступность бд не должна останавливать обработчик
+                logger.exception("Job queue query failed")
+            stop.wait(self.poll_interval)
+
+    def run_once(self) -> bool:
+        """Выполнить одну задачу, False - готовых задач нет"""
+        job = self.claim_job()
+        if job is None:
+            return False
+        self.process(job)
+        return True
+
+    def claim_job(self) -> CheckJob | None:
+        candidates = CheckJob.objects.ready().values_list("id", "host")[:CLAIM_BATCH_SIZE]
+        for job_id, host in candidates:
+            # слот хоста занимается только вместе с захватом задачи: задачу мог захватить другой обработчик
+            with transaction.atomic():
+                now = timezone.now()
+                claimed = CheckJob.objects.filter(id=job_id, status=CheckJob.PENDING).update(
+                    status=CheckJob.RUNNING,
+                    locked_by=self.name,
+                    attempts=F("attempts") + 1,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+                if not claimed:
+                    continue
+                if host and not self._reserve_host(host):
+                    transaction.set_rollback(True)
+                    continue
+            return CheckJob.objects.get(id=job_id)
+        return None
+
+    def _reserve_host(self, host: str) -> bool:
+        """Занять следующий слот запроса к хосту, False - хост запрашивали меньше host_interval назад"""
+        now = timezone.now()
+        next_request_at = now + self.host_interval
+        reserved = HostThrottle.objects.filter(host=host, next_request_at__lte=now).update(
+            next_request_at=next_request_at,
+        )
+        if reserved:
+            return True
+        _, created = HostThrottle.objects.get_or_create(host=host, defaults={"next_request_at": next_request_at})
+        return created
+
+    def reclaim_stale_jobs(self) -> int:
+        """Вернуть в очередь задачи обработчиков, которые перестали отвечать, у исчерпавших попытки - ошибка"""
+        now = timezone.now()
+        stale = CheckJob.objects.filter(status=CheckJob.RUNNING, heartbeat_at__lt=now - self.stale_timeout)
+        stale.filter(attempts__gte=F("max_attempts")).update(
+            status=CheckJob.FAILED,
+            locked_by="",
+            error="Обработчик задачи перестал отвечать",
+            finished_at=now,
+        )
+        reclaimed = stale.update(status=CheckJob.PENDING, locked_by="", run_after=now)
+        if reclaimed:
+            logger.warning("Reclaimed %s stale jobs", reclaimed)
+        return reclaimed
+
+    def process(self, job: CheckJob) -> None:
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job.id, stop_heartbeat), daemon=True)
+        heartbeat.start()
+        try:
+            check_result = self.html_checker.check(
+                html=job.html,
+                preset_name=job.preset_name,
+                url=job.url,
+                parser_backend=job.parser_backend or None,
+            )
+        except HtmlTagNotFound as e:
+            self._finish(job, status=CheckJob.FAILED, error=str(e))
+        except ResponseRejected as e:
+            self._finish(job, status=CheckJob.FAILED, error=f"Не удалось загрузить сайт: {e}")
+        except RequestException as e:
+            self._retry(job, error=f"Не удалось загрузить сайт: {e}")
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            self._retry(job, error=repr(e))
+        else:
+            self._finish(job, status=CheckJob.DONE, result=dump_result(check_result))
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+    def _heartbeat(self, job_id: int, stop: threading.Event) -> None:
+        try:
+            while not stop.wait(self.heartbeat_interval):
+                CheckJob.objects.filter(id=job_id, locked_by=self.name).update(heartbeat_at=timezone.now())
+        finally:
+            # у потока свое соединение с бд
+            connection.close()
+
+    def _finish(self, job: CheckJob, status: str, error: str = "", result: bytes | None = None) -> None:
+        # задачу, которую вернули в очередь как зависшую, уже может выполнять другой обработчик
+        updated = CheckJob.objects.filter(id=job.id, status=CheckJob.RUNNING, locked_by=self.name).update(
+            status=status,
+            locked_by="",
+            error=error,
+            result=result,
+            finished_at=timezone.now(),
+        )
+        if not updated:
+            logger.warning("Job %s was reclaimed before %s finished it", job.id, self.name)
+
+    def _retry(self, job: CheckJob, error: str) -> None:
+        if job.attempts >= job.max_attempts:
+            self._finish(job, status=CheckJob.FAILED, error=error)
+            return
+        delay = get_backoff(job.attempts - 1, RETRY_BACKOFF_FACTOR, RETRY_BACKOFF_MAX)
+        CheckJob.objects.filter(id=job.id, status=CheckJob.RUNNING, locked_by=self.name).update(
+            status=CheckJob.PENDING,
+            locked_by="",
+            error=error,
+            run_after=timezone.now() + datetime.timedelta(seconds=delay),
+        )
@@ -0,0 +1,110 @@
+from functools import cache
+
+from django.conf import settings
+
+from common.metrics import DEFAULT_FLUSH_INTERVAL, MetricsRegistry
+from common.request_sender import RequestAttempt
+from html_checker.profiling import CheckProfile
+
+from .dto import HtmlCheckResult
+
+# метки результата обращения к кэшу результатов
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+
+
+class CheckMetrics:
+    """Метрики проверок: количество и время проверок и их этапов, ошибки по уровням, неудачные загрузки, кэш"""
+
+    def __init__(self, registry: MetricsRegistry | None = None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.checks = self.registry.counter(
+            "atlas_checks_total",
+            "Выполненные проверки по пресету и парсеру",
+            ("preset", "backend"),
+        )
+        self.check_failures = self.registry.counter(
+            "atlas_check_failures_total",
+            "Проверки, завершившиеся исключением, по пресету и классу исключения",
+            ("preset", "exception"),
+        )
+        self.check_errors = self.registry.counter(
+            "atlas_check_errors_total",
+            "Ошибки в результатах проверок по пресету и уровню",
+            ("preset", "level"),
+        )
+        self.check_duration = self.registry.histogram(
+            "atlas_check_duration_seconds",
+            "Время проверки от загрузки страницы до результата",
+            ("preset",),
+        )
+        self.phase_duration = self.registry.histogram(
+            "atlas_check_phase_duration_seconds",
+            "Время этапов проверки: fetch, parse, fill, validate, summarize, cache, history, executor",
+            ("phase",),
+        )
+        self.fetch_failures = self.registry.counter(
+            "atlas_fetch_failures_total",
+            "Неудачные попытки загрузки страницы по классу исключения",
+            ("exception",),
+        )
+        self.cache_requests = self.registry.counter(
+            "atlas_check_cache_requests_total",
+            "Обращения к кэшу результатов проверки: hit - результат взят из кэша, miss - проверка выполнена",
+            ("result",),
+        )
+
+    def record_check(
+        self,
+        check_result: HtmlCheckResult,
+        profile: CheckProfile,
+        parser_backend: str,
+        cache_hit: bool | None,
+    ) -> None:
+        """Учесть проверку, cache_hit - взят ли результат из кэша, None - кэш не используется"""
+        preset_name = check_result.preset_name
+        self.checks.inc(preset=preset_name, backend=parser_backend)
+        for level, count in check_result.errors_level_stat.items():
+            if count:
+                self.check_errors.inc(count, preset=preset_name, level=level.level)
+        self.check_duration.observe(profile.total, preset=preset_name)
+        for phase, seconds in profile.phases.items():
+            self.phase_duration.observe(seconds, phase=phase)
+        if cache_hit is not None:
+            self.cache_requests.inc(result=CACHE_HIT if cache_hit else CACHE_MISS)
+        self.registry.schedule_flush()
+
+    def record_failure(self, preset_name: str, error: Exception) -> None:
+        self.check_failures.inc(preset=preset_name, exception=type(error).__name__)
+        self.registry.schedule_flush()
+
+    def record_request_attempt(self, attempt: RequestAttempt) -> None:
+        """Хук on_attempt отправителей запросов"""
+        if attempt.error_type is not None:
+            self.fetch_failures.inc(exception=attempt.error_type)
+            self.registry.schedule_flush()
+
+    def expose(self) -> str:
+        """Метрики в текстовом формате Prometheus и доля попаданий в кэш результатов за все время"""
+        collected = self.registry.collect()
+        cache_requests = {labels[0]: value[0] for labels, value in collected[self.cache_requests.name].items()}
+        total = cache_requests.get(CACHE_HIT, 0) + cache_requests.get(CACHE_MISS, 0)
+        hit_ratio = cache_requests.get(CACHE_HIT, 0) / total if total else 0.0
+        return (
+            self.registry.expose(collected)
+            + "# HELP atlas_check_cache_hit_ratio Доля проверок, результат которых взят из кэша, за все время\n"
+            + "# TYPE atlas_check_cache_hit_ratio gauge\n"
+            + f"atlas_check_cache_hit_ratio {hit_ratio!r}\n"
+        )
+
+
+@cache
+def get_check_metrics() -> CheckMetrics | None:
+    """Метрики процесса из настроек проекта, None - метрики выключены"""
+    if not getattr(settings, "CHECK_METRICS_ENABLED", False):
+        return None
+    registry = MetricsRegistry(
+        directory=getattr(settings, "CHECK_METRICS_DIRECTORY", None),
+        flush_interval=getattr(settings, "CHECK_METRICS_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL),
+    )
+    return CheckMetrics(registry=registry)
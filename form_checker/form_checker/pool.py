@@ -0,0 +1,76 @@
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from html_checker.backends import PARSER_BACKENDS
+
+from .checker import run_check
+from .presets import PRESETS_MAP
+
+logger = logging.getLogger(__name__)
+
+# импортируются один раз в сервере forkserver, рабочие процессы получают их уже загруженными
+PRELOAD_MODULES = ["form_checker.form_checker.checker"]
+WARM_UP_HTML = "<html><head></head><body></body></html>"
+
+
+def warm_up_worker() -> None:
+    """Схемы пресетов и пустая проверка каждым пресетом и парсером до первой настоящей проверки"""
+    for preset_name, preset in PRESETS_MAP.items():
+        preset.get_schema_version()
+        for parser_backend in PARSER_BACKENDS:
+            run_check(html=WARM_UP_HTML, preset_name=preset_name, parser_backend=parser_backend)
+
+
+def _ping() -> None:
+    pass
+
+
+class CheckProcessPool(Executor):
+    """Пул процессов для разбора и проверки html, разбор и валидаторы держат GIL и в потоках не параллелятся.
+
+    Процессы запускаются и прогреваются все сразу при первом submit, а не при создании пула:
+    пул создается при импорте urlconf, в том числе в manage.py check, migrate и shell. Их порождает forkserver
+    с заранее импортированными пресетами: это быстрее spawn и безопаснее fork из многопоточного сервера.
+    Если процесс пула аварийно завершился (например, не хватило памяти), пул пересоздается при следующем submit.
+    """
+
+    def __init__(self, workers: int):
+        if workers <= 0:
+            raise ValueError("workers must be positive integer")
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._is_shutdown = False
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=warm_up_worker)
+        # ProcessPoolExecutor запускает процесс, только когда нет свободного, одновременные задачи запускают все
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def submit(self, fn: Callable, /, *args: object, **kwargs: object) -> Future:
+        with self._lock:
+            if self._is_shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            if self._executor is None:
+                self._executor = self._create_executor()
+            try:
+                return self._executor.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                logger.warning("Check process pool is broken, restarting it")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+                return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._is_shutdown = True
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -1,13 +1,12 @@
-from bs4 import Tag
-
 from html_checker import HtmlTag, HtmlTagAttribute, TagChecker, levels
+from html_checker.backends import Element
 from html_checker.exceptions import ValidationError
 from html_checker.utils import find_script_with_js_function
 
 
 class Title(TagChecker):
     def validate(self) -> None:
-        if self.exist() and self.elem.text == "Document":
+        if self.exist() and self.get_text() == "Document":
             raise ValidationError("Неправильный текст в title")
 
 
@@ -69,20 +68,31 @@ class OrderForm(TagChecker):
     sub_id_9 = Sub9Select()
 
 
-class GetShortImageSrcDetector(TagChecker):
-    SELECTOR = "script with getShortImageSrc"
+class JsFunctionScriptDetector(TagChecker):
+    JS_FUNCTION_NAME = None
 
-    def get_element(self) -> Tag | None:
-        scripts = self.root.elem.select("script")
-        return find_script_with_js_function(scripts=scripts, js_function_name="getShortImageSrc")
+    def get_element(self) -> Element | None:
+        if self.document_index is not None:
+            return self.document_index.find_script_with_js_function(
+                js_function_name=self.JS_FUNCTION_NAME,
+                scope=self.root.elem,
+            )
+        scripts = self.backend.select(self.root.elem, "script")
+        return find_script_with_js_function(
+            scripts=scripts,
+            js_function_name=self.JS_FUNCTION_NAME,
+            backend=self.backend,
+        )
 
 
-class InjectScriptDetector(TagChecker):
-    SELECTOR = "script with injectScript"
+class GetShortImageSrcDetector(JsFunctionScriptDetector):
+    SELECTOR = "script with getShortImageSrc"
+    JS_FUNCTION_NAME = "getShortImageSrc"
+
 
-    def get_element(self) -> Tag | None:
-        scripts = self.root.elem.select("script")
-        return find_script_with_js_function(scripts=scripts, js_function_name="injectScript")
+class InjectScriptDetector(JsFunctionScriptDetector):
+    SELECTOR = "script with injectScript"
+    JS_FUNCTION_NAME = "injectScript"
 
 
 class AtlasHtml(HtmlTag):
@@ -0,0 +1,122 @@
+from collections.abc import Iterable
+from urllib.parse import urlencode
+
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeString, mark_safe
+
+from html_checker import HtmlTagAttribute, ListTagChecker, TagChecker
+from html_checker.exceptions import ErrorDetail
+from html_checker.summary import AttributeSummary, ListSummary, TagSummary
+from html_checker.tag import NON_FIELD_ERROR
+
+ATTRIBUTES_TABLE_HEAD = (
+    '<table class="table"><thead><tr><th scope="col">Attr</th><th scope="col">Value</th>'
+    '<th scope="col">Expected</th><th scope="col">Errors</th></tr></thead><tbody>'
+)
+PATH_SEPARATOR = "/"
+
+# в стеке обхода вместо тэга лежит этот маркер, когда нужно закрыть <details>
+_CLOSE = object()
+
+
+def _render_errors(parts: list[str], errors: Iterable[ErrorDetail], suffix: str = "") -> None:
+    for error in errors:
+        level = error.level.level
+        parts.append(
+            f'<p class="error-message error-message-{level} text-{level}">'
+            f"<span>{conditional_escape(error.message)}</span></p>{suffix}",
+        )
+
+
+def _render_attribute(parts: list[str], attribute: HtmlTagAttribute | AttributeSummary) -> None:
+    value = "-" if attribute.value is None else f'"{conditional_escape(attribute.value)}"'
+    expected = f'"{conditional_escape(attribute.expected)}"' if attribute.expected else ""
+    if attribute.choices:
+        expected += conditional_escape(attribute.choices)
+    parts.append(f"<tr><td><b>{conditional_escape(attribute.name)}</b></td><td>{value}</td><td>{expected}</td>")
+    parts.append('<td class="error-cell">')
+    if attribute.errors:
+        _render_errors(parts, attribute.errors)
+    else:
+        parts.append('<p class="error-message error-message-success text-success"></p>')
+    parts.append("</td></tr>")
+
+
+def _render_tag_body(parts: list[str], tag: TagChecker | TagSummary) -> None:
+    """Содержимое <details> тэга без заголовка и вложенных тэгов"""
+    exist = tag.exist()
+    short_display = conditional_escape(tag.get_short_display()) if exist else "elem not found"
+    parts.append(f'<div class="row mb-3"><div class="col"><p class="text-center">{short_display}</p></div>')
+    parts.append('<div class="col">')
+    _render_errors(parts, tag.errors.get(NON_FIELD_ERROR, ()), suffix="<br>")
+    parts.append("</div></div>")
+    if exist and tag.attributes:
+        parts.append(ATTRIBUTES_TABLE_HEAD)
+        for attribute in tag.attributes.values():
+            _render_attribute(parts, attribute)
+        parts.append("</tbody></table>")
+
+
+def _iter_children(tag: TagChecker | TagSummary, path: str) -> Iterable[tuple[TagChecker | TagSummary, str]]:
+    prefix = f"{path}{PATH_SEPARATOR}" if path else ""
+    for key, child in tag.childrens.items():
+        if isinstance(child, (ListTagChecker, ListSummary)):
+            for number, item in enumerate(child.tags_items):
+                yield item, f"{prefix}{key}{PATH_SEPARATOR}{number}"
+        else:
+            yield child, f"{prefix}{key}"
+
+
+def render_tag_tree(
+    tag: TagChecker | TagSummary,
+    lazy_url: str | None = None,
+    path: str = "",
+    body_only: bool = False,
+) -> SafeString:
+    """HTML дерева результата проверки, тот же вид, что давал рекурсивный render_tag.html.
+
+    Дерево обходится стеком, без рекурсии. Если передан lazy_url, у свернутых тэгов (без ошибок в поддереве)
+    выводится только заголовок, содержимое браузер запрашивает по lazy_url с параметром path при раскрытии.
+    body_only - только содержимое тэга path без его <details>, ответ на такой запрос.
+    """
+    parts = []
+    stack: list[tuple[TagChecker | TagSummary, str] | object] = []
+    if body_only:
+        _render_tag_body(parts, tag)
+        stack.extend(reversed(list(_iter_children(tag, path))))
+    else:
+        stack.append((tag, path))
+    while stack:
+        item = stack.pop()
+        if item is _CLOSE:
+            parts.append("</details>")
+            continue
+        node, node_path = item
+        is_open = bool(node.errors)
+        summary = f'<summary class="{node.error_level.level}">{conditional_escape(node.path_name)}</summary>'
+        if lazy_url is not None and not is_open:
+            src = conditional_escape(f"{lazy_url}?{urlencode({'path': node_path})}")
+            parts.append(f'<details data-src="{src}">{summary}</details>')
+            continue
+        parts.append(f"<details{' open' if is_open else ''}>{summary}")
+        _render_tag_body(parts, node)
+        stack.append(_CLOSE)
+        stack.extend(reversed(list(_iter_children(node, node_path))))
+    return mark_safe("".join(parts))  # noqa: S308
+
+
+def get_tag_by_path(tag: TagChecker | TagSummary, path: str) -> TagChecker | TagSummary:
+    """Тэг дерева по пути из render_tag_tree: имена полей и номера элементов списков через "/".
+
+    Для несуществующего пути поднимает KeyError, IndexError или ValueError.
+    """
+    tokens = path.split(PATH_SEPARATOR) if path else []
+    position = 0
+    while position < len(tokens):
+        field = tag.childrens[tokens[position]]
+        position += 1
+        if isinstance(field, (ListTagChecker, ListSummary)):
+            field = field.tags_items[int(tokens[position])]
+            position += 1
+        tag = field
+    return tag
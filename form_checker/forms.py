@@ -2,12 +2,15 @@ from django import forms
 from django.core.exceptions import ValidationError
 
 from form_checker.form_checker.presets import PRESETS_MAP
+from form_checker.models import URL_MAX_LENGTH
+from html_checker.backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS
 
 
 class CheckFormsByUrlForm(forms.Form):
     preset_name = forms.ChoiceField(choices=[(c, c) for c in PRESETS_MAP])
-    url = forms.URLField(required=False)
+    url = forms.URLField(required=False, max_length=URL_MAX_LENGTH)
     html = forms.CharField(required=False)
+    parser_backend = forms.ChoiceField(choices=[(c, c) for c in PARSER_BACKENDS], initial=DEFAULT_PARSER_BACKEND)
 
     def clean(self) -> dict:
         cleaned_data = super().clean()
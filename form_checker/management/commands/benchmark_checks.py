@@ -0,0 +1,140 @@
+import json
+from argparse import ArgumentParser
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.landers import SCENARIOS
+from benchmarks.runner import (
+    DEFAULT_REPEAT,
+    DEFAULT_THRESHOLD,
+    PATHS,
+    PHASES,
+    STATISTICS,
+    TOTAL,
+    compare_reports,
+    get_changed_presets,
+    get_environment_changes,
+    make_report,
+    run_benchmarks,
+)
+from form_checker.form_checker.presets import PRESETS_MAP
+from html_checker.backends import PARSER_BACKENDS
+
+
+def _format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+
+def _format_phase(result: dict, phase: str) -> str:
+    # пути проверки кроме pipeline замеряются только целиком
+    values = result["phases"].get(phase)
+    return _format_ms(values["min"]) if values is not None else "-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Время этапов проверки синтетических лендингов каждым пресетом, парсером и путем проверки "
+        "(без пула, с пулом процессов, повторная, из кэша), отчет сохраняется в JSON"
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "-s",
+            "--scenario",
+            dest="scenarios",
+            action="append",
+            choices=list(SCENARIOS),
+            help="Сценарий, можно указать несколько раз, по умолчанию все",
+        )
+        parser.add_argument(
+            "-p",
+            "--preset",
+            dest="preset_names",
+            action="append",
+            choices=list(PRESETS_MAP),
+            help="Пресет, можно указать несколько раз, по умолчанию все",
+        )
+        parser.add_argument(
+            "--parser-backend",
+            dest="parser_backends",
+            action="append",
+            choices=list(PARSER_BACKENDS),
+            help="Парсер, можно указать несколько раз, по умолчанию все",
+        )
+        parser.add_argument(
+            "--path",
+            dest="paths",
+            action="append",
+            choices=PATHS,
+            help="Путь проверки, можно указать несколько раз, по умолчанию все",
+        )
+        parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Количество замеряемых прогонов")
+        parser.add_argument("-o", "--output", help="Файл для отчета в JSON")
+        parser.add_argument(
+            "--compare",
+            help="Отчет прошлого прогона, с которым сравнить время этапов, например benchmarks/baseline.json",
+        )
+        parser.add_argument("--statistic", choices=STATISTICS, default="min", help="Что сравнивать при --compare")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=DEFAULT_THRESHOLD,
+            help="Замедление этапа, которое считается регрессией: 0.1 - на 10%%",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true", help="Код выхода 1 при регрессии")
+
+    def handle(self, *args: str, **options: dict) -> None:  # noqa: ARG002
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be positive integer")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+        header = " ".join((*PHASES, TOTAL))
+        self.stdout.write(
+            f"{'scenario':<12} {'preset':<8} {'parser':<6} {'path':<11} {'KB':>7} {'tags':>6}  ms, min: {header}",
+        )
+        results = []
+        for result in run_benchmarks(
+            scenarios=options["scenarios"],
+            preset_names=options["preset_names"],
+            parser_backends=options["parser_backends"],
+            repeat=options["repeat"],
+            paths=options["paths"],
+        ):
+            results.append(result)
+            phases = " ".join(_format_phase(result, phase) for phase in (*PHASES, TOTAL))
+            self.stdout.write(
+                f"{result['scenario']:<12} {result['preset']:<8} {result['backend']:<6} {result['path']:<11} "
+                f"{result['html_size'] / 1024:>7.0f} {result['tags']:>6}  {phases}",
+            )
+        report = make_report(results, repeat=options["repeat"])
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Отчет сохранен в {options['output']}")
+        if baseline is not None:
+            self._compare(baseline, report, options)
+
+    def _compare(self, baseline: dict, report: dict, options: dict) -> None:
+        environment_changes = get_environment_changes(baseline, report)
+        if environment_changes:
+            changes = ", ".join(environment_changes)
+            self.stdout.write(self.style.WARNING(f"Окружение прогонов отличается ({changes}), сравнение неточное"))
+        for name in get_changed_presets(baseline, report):
+            self.stdout.write(self.style.WARNING(f"Схема пресета {name} изменилась с прошлого прогона"))
+        comparisons = compare_reports(baseline, report, statistic=options["statistic"])
+        regressions = {comparison for comparison in comparisons if comparison.is_regression(options["threshold"])}
+        for comparison in comparisons:
+            if comparison.phase != TOTAL and comparison not in regressions:
+                continue
+            line = (
+                f"{comparison.scenario} {comparison.preset} {comparison.backend} {comparison.path} "
+                f"{comparison.phase}: "
+                f"{_format_ms(comparison.baseline)} -> {_format_ms(comparison.current)} ms "
+                f"({comparison.change:+.0%})"
+            )
+            self.stdout.write(self.style.ERROR(line) if comparison in regressions else line)
+        self.stdout.write(f"Регрессий: {len(regressions)} из {len(comparisons)} сравнений")
+        if regressions and options["fail_on_regression"]:
+            raise CommandError("Время проверки выросло больше порога", returncode=1)
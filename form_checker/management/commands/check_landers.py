@@ -0,0 +1,64 @@
+import json
+import os
+from argparse import ArgumentParser
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from form_checker.form_checker.bulk import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST_LIMIT, iter_check_urls
+from form_checker.form_checker.pool import CheckProcessPool
+from form_checker.form_checker.presets import PRESETS_MAP
+from html_checker.backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS
+
+
+class Command(BaseCommand):
+    help = "Проверка списка лендингов пресетами, результаты выводятся по мере готовности"
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("urls", nargs="*", help="Адреса лендингов")
+        parser.add_argument("-f", "--file", help="Файл со списком адресов, по одному в строке")
+        parser.add_argument(
+            "-p",
+            "--preset",
+            dest="preset_names",
+            action="append",
+            choices=list(PRESETS_MAP),
+            required=True,
+            help="Пресет проверки, можно указать несколько раз",
+        )
+        parser.add_argument("--parser-backend", choices=list(PARSER_BACKENDS), default=DEFAULT_PARSER_BACKEND)
+        parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+        parser.add_argument("--per-host-limit", type=int, default=DEFAULT_PER_HOST_LIMIT)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Количество процессов для проверки, по умолчанию по числу процессоров, 0 - проверять в этом процессе",
+        )
+        parser.add_argument("--json", action="store_true", help="Выводить результаты в формате JSON Lines")
+
+    def handle(self, *args: str, **options: dict) -> None:  # noqa: ARG002
+        urls = list(options["urls"])
+        if options["file"]:
+            with open(options["file"]) as file:
+                urls.extend(line.strip() for line in file if line.strip())
+        if not urls:
+            raise CommandError("Не указаны адреса для проверки")
+        workers = options["workers"] if options["workers"] is not None else os.cpu_count() or 1
+        with CheckProcessPool(workers=workers) if workers else nullcontext() as process_pool:
+            results = iter_check_urls(
+                urls=urls,
+                preset_names=options["preset_names"],
+                parser_backend=options["parser_backend"],
+                executor=process_pool,
+                concurrency=options["concurrency"],
+                per_host_limit=options["per_host_limit"],
+            )
+            for result in results:
+                if options["json"]:
+                    self.stdout.write(json.dumps(result.to_dict(), ensure_ascii=False))
+                elif result.error is not None:
+                    self.stdout.write(self.style.ERROR(f"{result.url} [{result.preset_name}] {result.error}"))
+                else:
+                    stat = " ".join(f"{level}={count}" for level, count in result.errors_level_stat.items())
+                    self.stdout.write(f"{result.url} [{result.preset_name}] {stat}")
@@ -0,0 +1,90 @@
+import multiprocessing
+import signal
+import threading
+from argparse import ArgumentParser
+from multiprocessing.synchronize import Event as ProcessEvent
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from form_checker.form_checker.factory import create_html_checker
+from form_checker.form_checker.jobs import (
+    DEFAULT_HOST_INTERVAL,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_STALE_TIMEOUT,
+    JobWorker,
+)
+
+
+def stop_on_signals(stop: threading.Event | ProcessEvent) -> None:
+    """SIGINT и SIGTERM не прерывают текущую задачу, а останавливают обработчик после нее"""
+
+    def handler(signum: int, frame: object) -> None:  # noqa: ARG001
+        stop.set()
+
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+
+
+def run_worker(options: dict, stop: threading.Event | ProcessEvent) -> None:
+    # при запуске через spawn дочерний процесс начинает с чистого интерпретатора
+    django.setup()
+    stop_on_signals(stop)
+    worker = JobWorker(
+        # обработчик выполняет одну задачу за раз, параллельность задается количеством процессов-обработчиков
+        html_checker=create_html_checker(process_pool_workers=0),
+        poll_interval=options["poll_interval"],
+        stale_timeout=options["stale_timeout"],
+        host_interval=options["host_interval"],
+    )
+    try:
+        worker.run(stop=stop)
+    finally:
+        # процесс multiprocessing завершается без atexit, метрики последних задач записываются здесь
+        if worker.html_checker.metrics is not None:
+            worker.html_checker.metrics.registry.flush_pending()
+
+
+class Command(BaseCommand):
+    help = "Обработчики очереди фоновых проверок (CheckJob), работают до SIGINT/SIGTERM"
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--processes", type=int, default=1, help="Количество процессов-обработчиков")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=DEFAULT_POLL_INTERVAL,
+            help="Пауза между запросами к очереди, когда задач нет, в секундах",
+        )
+        parser.add_argument(
+            "--stale-timeout",
+            type=float,
+            default=DEFAULT_STALE_TIMEOUT,
+            help="Через сколько секунд без heartbeat задача возвращается в очередь",
+        )
+        parser.add_argument(
+            "--host-interval",
+            type=float,
+            default=DEFAULT_HOST_INTERVAL,
+            help="Минимальный интервал между запросами к одному хосту, в секундах",
+        )
+
+    def handle(self, *args: str, **options: dict) -> None:  # noqa: ARG002
+        if options["processes"] < 1:
+            raise CommandError("--processes must be positive integer")
+        if options["processes"] == 1:
+            run_worker(options, stop=threading.Event())
+            return
+        stop = multiprocessing.Event()
+        # соединения с бд не должны переходить в дочерние процессы
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(options, stop), name=f"check-worker-{number}")
+            for number in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        stop_on_signals(stop)
+        for process in processes:
+            process.join()
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.4 on 2026-10-18 05:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HtmlSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('compression', models.CharField(choices=[('gzip', 'gzip'), ('zstd', 'zstd')], max_length=8)),
+                ('content', models.BinaryField()),
+                ('size', models.PositiveIntegerField(help_text='Размер html до сжатия в байтах')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CheckRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('preset_name', models.CharField(max_length=64)),
+                ('preset_version', models.CharField(max_length=64)),
+                ('parser_backend', models.CharField(max_length=16)),
+                ('max_level', models.PositiveSmallIntegerField(choices=[(0, 'success'), (1, 'info'), (2, 'warning'), (3, 'danger')])),
+                ('info_count', models.PositiveIntegerField(default=0)),
+                ('warning_count', models.PositiveIntegerField(default=0)),
+                ('danger_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='runs', to='form_checker.htmlsnapshot')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Finding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('preset_name', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField()),
+                ('level', models.PositiveSmallIntegerField(choices=[(0, 'success'), (1, 'info'), (2, 'warning'), (3, 'danger')])),
+                ('path', models.TextField(help_text='path_name тэга')),
+                ('attribute', models.CharField(blank=True, max_length=128)),
+                ('message', models.TextField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='findings', to='form_checker.checkrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['preset_name', 'level', 'created_at'], name='form_checke_preset__2cf237_idx'), models.Index(fields=['url', 'preset_name', 'level', 'created_at'], name='form_checke_url_024ee3_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='checkrun',
+            index=models.Index(fields=['preset_name', 'max_level', 'created_at'], name='form_checke_preset__403a02_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkrun',
+            index=models.Index(fields=['url', 'preset_name', 'created_at'], name='form_checke_url_efb82e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkrun',
+            index=models.Index(fields=['created_at'], name='form_checke_created_1eb2b9_idx'),
+        ),
+    ]
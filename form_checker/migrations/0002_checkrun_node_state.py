@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 05:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_checker', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkrun',
+            name='node_state',
+            field=models.BinaryField(help_text='Сжатые gzip отпечатки поддеревьев и ошибки тэгов в JSON, для повторной проверки страницы', null=True),
+        ),
+    ]
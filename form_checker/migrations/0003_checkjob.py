@@ -0,0 +1,47 @@
+# Generated by Django 5.0.4 on 2026-10-18 05:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_checker', '0002_checkrun_node_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostThrottle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('host', models.CharField(max_length=255, unique=True)),
+                ('next_request_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CheckJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=8)),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('host', models.CharField(blank=True, help_text='Хост url, для ограничения частоты запросов', max_length=255)),
+                ('html', models.TextField(blank=True)),
+                ('preset_name', models.CharField(max_length=64)),
+                ('parser_backend', models.CharField(max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Время следующей попытки')),
+                ('locked_by', models.CharField(blank=True, help_text='Обработчик, выполняющий задачу', max_length=128)),
+                ('heartbeat_at', models.DateTimeField(help_text='Последний сигнал обработчика о том, что он работает', null=True)),
+                ('error', models.TextField(blank=True)),
+                ('result', models.BinaryField(help_text='Сжатый gzip pickle HtmlCheckResult', null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(null=True)),
+                ('finished_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='form_checke_status_38458a_idx'), models.Index(fields=['status', 'heartbeat_at'], name='form_checke_status_609802_idx')],
+            },
+        ),
+    ]
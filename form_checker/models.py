@@ -1,3 +1,185 @@
+import gzip
+import hashlib
+
 from django.db import models
+from django.utils import timezone
+
+from html_checker import levels
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+URL_MAX_LENGTH = 500
+LEVEL_CHOICES = [(int(level), level.level) for level in levels.LEVELS]
+
+
+class HtmlSnapshot(models.Model):
+    """HTML проверенной страницы: хранится сжатым, одна запись на каждое уникальное содержимое"""
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+    COMPRESSION_CHOICES = [(GZIP, GZIP), (ZSTD, ZSTD)]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    compression = models.CharField(max_length=8, choices=COMPRESSION_CHOICES)
+    content = models.BinaryField()
+    size = models.PositiveIntegerField(help_text="Размер html до сжатия в байтах")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.sha256
+
+    @classmethod
+    def compress(cls, data: bytes) -> tuple[str, bytes]:
+        if zstandard is not None:
+            return cls.ZSTD, zstandard.ZstdCompressor(level=10).compress(data)
+        return cls.GZIP, gzip.compress(data, compresslevel=6)
+
+    @classmethod
+    def get_or_create_for_html(cls, html: str) -> "HtmlSnapshot":
+        """Снимок по хэшу содержимого, сжатие выполняется только для нового html"""
+        data = html.encode()
+        sha256 = hashlib.sha256(data).hexdigest()
+        snapshot = cls.objects.defer("content").filter(sha256=sha256).first()
+        if snapshot is not None:
+            return snapshot
+        compression, content = cls.compress(data)
+        snapshot, _ = cls.objects.get_or_create(
+            sha256=sha256,
+            defaults={"compression": compression, "content": content, "size": len(data)},
+        )
+        return snapshot
+
+    def get_html(self) -> str:
+        if self.compression == self.ZSTD:
+            if zstandard is None:
+                raise ImportError("Snapshot is compressed with zstd, install the zstandard package to read it")
+            return zstandard.ZstdDecompressor().decompress(bytes(self.content)).decode()
+        return gzip.decompress(bytes(self.content)).decode()
+
+
+class CheckRunQuerySet(models.QuerySet):
+    def with_errors(self, level: levels.ErrorLevel = levels.ERROR) -> "CheckRunQuerySet":
+        """Проверки, в которых есть ошибки уровня level или выше"""
+        return self.filter(max_level__gte=int(level))
+
+
+class CheckRun(models.Model):
+    """Одна проверка страницы пресетом, количество ошибок по уровням хранится в полях для быстрых выборок"""
+
+    url = models.URLField(max_length=URL_MAX_LENGTH, blank=True)
+    preset_name = models.CharField(max_length=64)
+    preset_version = models.CharField(max_length=64)
+    parser_backend = models.CharField(max_length=16)
+    snapshot = models.ForeignKey(HtmlSnapshot, on_delete=models.PROTECT, related_name="runs")
+    max_level = models.PositiveSmallIntegerField(choices=LEVEL_CHOICES)
+    info_count = models.PositiveIntegerField(default=0)
+    warning_count = models.PositiveIntegerField(default=0)
+    danger_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    node_state = models.BinaryField(
+        null=True,
+        help_text="Сжатые gzip отпечатки поддеревьев и ошибки тэгов в JSON, для повторной проверки страницы",
+    )
+
+    objects = CheckRunQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["preset_name", "max_level", "created_at"]),
+            models.Index(fields=["url", "preset_name", "created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.preset_name}: {self.url or self.snapshot_id}"
+
+
+class FindingQuerySet(models.QuerySet):
+    def with_level(self, level: levels.ErrorLevel) -> "FindingQuerySet":
+        """Ошибки уровня level или выше"""
+        return self.filter(level__gte=int(level))
+
+
+class Finding(models.Model):
+    """Найденная ошибка. url, пресет и дата скопированы из проверки, чтобы выборки шли по индексу без join"""
+
+    run = models.ForeignKey(CheckRun, on_delete=models.CASCADE, related_name="findings")
+    url = models.URLField(max_length=URL_MAX_LENGTH, blank=True)
+    preset_name = models.CharField(max_length=64)
+    created_at = models.DateTimeField()
+    level = models.PositiveSmallIntegerField(choices=LEVEL_CHOICES)
+    path = models.TextField(help_text="path_name тэга")
+    attribute = models.CharField(max_length=128, blank=True)
+    message = models.TextField()
+
+    objects = FindingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["preset_name", "level", "created_at"]),
+            models.Index(fields=["url", "preset_name", "level", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_level_display()}: {self.message}"
+
+
+class CheckJobQuerySet(models.QuerySet):
+    def ready(self) -> "CheckJobQuerySet":
+        """Ожидающие задачи, время запуска которых наступило, в порядке очереди"""
+        return self.filter(status=CheckJob.PENDING, run_after__lte=timezone.now()).order_by("run_after", "id")
+
+
+class CheckJob(models.Model):
+    """Задача фоновой проверки в очереди, ее выполняют обработчики из manage.py run_check_workers"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, PENDING), (RUNNING, RUNNING), (DONE, DONE), (FAILED, FAILED)]
+    FINISHED_STATUSES = (DONE, FAILED)
+
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=PENDING)
+    url = models.URLField(max_length=URL_MAX_LENGTH, blank=True)
+    host = models.CharField(max_length=255, blank=True, help_text="Хост url, для ограничения частоты запросов")
+    html = models.TextField(blank=True)
+    preset_name = models.CharField(max_length=64)
+    parser_backend = models.CharField(max_length=16)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Время следующей попытки")
+    locked_by = models.CharField(max_length=128, blank=True, help_text="Обработчик, выполняющий задачу")
+    heartbeat_at = models.DateTimeField(null=True, help_text="Последний сигнал обработчика о том, что он работает")
+    error = models.TextField(blank=True)
+    result = models.BinaryField(null=True, help_text="Сжатый gzip pickle HtmlCheckResult")
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    objects = CheckJobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+            models.Index(fields=["status", "heartbeat_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.pk} {self.status}: {self.url or self.preset_name}"
+
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
+
+
+class HostThrottle(models.Model):
+    """Время, раньше которого обработчики задач не запрашивают хост, общее для всех процессов"""
+
+    host = models.CharField(max_length=255, unique=True)
+    next_request_at = models.DateTimeField()
 
-# Create your models here.
+    def __str__(self):
+        return self.host
@@ -0,0 +1,40 @@
+from rest_framework import serializers
+
+from form_checker.form_checker.bulk import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST_LIMIT
+from form_checker.form_checker.jobs import DEFAULT_MAX_ATTEMPTS
+from form_checker.form_checker.presets import PRESETS_MAP
+from form_checker.models import URL_MAX_LENGTH
+from html_checker.backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS
+
+MAX_BULK_URLS = 1000
+
+
+class CheckSerializer(serializers.Serializer):
+    preset_name = serializers.ChoiceField(choices=list(PRESETS_MAP))
+    url = serializers.URLField(required=False, default="", max_length=URL_MAX_LENGTH)
+    html = serializers.CharField(required=False, default="", trim_whitespace=False)
+    parser_backend = serializers.ChoiceField(choices=list(PARSER_BACKENDS), default=DEFAULT_PARSER_BACKEND)
+    compact = serializers.BooleanField(default=False)
+
+    def validate(self, attrs: dict) -> dict:
+        if not any([attrs["url"], attrs["html"]]):
+            raise serializers.ValidationError("Должно быть заполнено одно из полей")
+        if all([attrs["url"], attrs["html"]]):
+            raise serializers.ValidationError("2 поля заполнять нельзя")
+        return attrs
+
+
+class CheckJobSerializer(CheckSerializer):
+    compact = None
+    max_attempts = serializers.IntegerField(min_value=1, max_value=10, default=DEFAULT_MAX_ATTEMPTS)
+
+
+class BulkCheckSerializer(serializers.Serializer):
+    urls = serializers.ListField(child=serializers.URLField(), allow_empty=False, max_length=MAX_BULK_URLS)
+    preset_names = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(PRESETS_MAP)),
+        allow_empty=False,
+    )
+    parser_backend = serializers.ChoiceField(choices=list(PARSER_BACKENDS), default=DEFAULT_PARSER_BACKEND)
+    concurrency = serializers.IntegerField(min_value=1, max_value=100, default=DEFAULT_CONCURRENCY)
+    per_host_limit = serializers.IntegerField(min_value=1, max_value=20, default=DEFAULT_PER_HOST_LIMIT)
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.safestring import SafeString
+
+from form_checker.form_checker.dto import HtmlCheckResult
+from form_checker.form_checker.render import render_tag_tree
+
+register = template.Library()
+
+
+@register.simple_tag
+def render_result_tree(check_result: HtmlCheckResult, lazy_url: str | None = None) -> SafeString:
+    return render_tag_tree(check_result.preset, lazy_url=lazy_url or None)
+
+
+@register.filter
+def milliseconds(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
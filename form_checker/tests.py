@@ -1,3 +1,1285 @@
-from django.test import TestCase
+import asyncio
+import codecs
+import datetime
+import gzip
+import hashlib
+import http.server
+import json
+import re
+import sys
+import tempfile
+import threading
+from collections.abc import Iterator
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest import mock
+from urllib.parse import unquote
 
-# Create your tests here.
+from django.db import DatabaseError
+from django.template import Context, Engine
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from requests.exceptions import RequestException
+
+from benchmarks.runner import PHASES, TOTAL, benchmark_case, compare_reports, make_report, run_benchmarks
+from common.async_request_sender import AsyncRequestSender
+from common.download import ResponseBodyReader
+from common.exceptions import InvalidContentEncoding, ResponseTooLarge, UnsupportedContentType
+from common.metrics import MetricsRegistry
+from common.request_sender import RequestAttempt, RequestSender, ResponseCache
+from html_checker import HtmlTag, HtmlTagAttribute, TagChecker, levels, serializers
+from html_checker.backends import PARSER_BACKENDS, get_backend
+from html_checker.exceptions import ValidationError
+from html_checker.incremental import DiffError, NodeState, NodeTracker, PreviousCheck, diff_states
+from html_checker.index import DocumentIndex, find_js_functions
+from html_checker.profiling import CheckProfile, profiling
+from html_checker.selector import compile_selector, select_all
+from html_checker.streaming import StreamingParser, get_stop_selectors
+from html_checker.utils import convert_to_dict
+
+from .form_checker import bulk, checker, jobs, pool
+from .form_checker.bulk import iter_check_urls, run_check_summary
+from .form_checker.cache import LRUResultCache
+from .form_checker.checker import HtmlChecker, run_check
+from .form_checker.history import CheckHistory, iter_findings
+from .form_checker.history import logger as history_logger
+from .form_checker.jobs import RETRY_BACKOFF_FACTOR, JobWorker, dump_result, iter_job_events, submit_job
+from .form_checker.metrics import CheckMetrics
+from .form_checker.pool import CheckProcessPool
+from .form_checker.presets import PRESETS_MAP
+from .form_checker.render import get_tag_by_path, render_tag_tree
+from .models import CheckJob, CheckRun, Finding, HostThrottle, HtmlSnapshot
+
+FORM_INPUTS = (
+    '<input name="first_name" type="text" pattern="^[\\p{L}]{2,}$" required>'
+    '<input name="email" type="EMAIL" class="field email">'
+    '<input name="phone" type="tel" value="{subid}">'
+    '<input name="sub_id_21" type="hidden" value="">'
+    '<select name="sub_id_9"><option>1</option></select>'
+)
+
+
+def make_page(forms: int = 3, scripts: int = 2) -> str:
+    """Страница с формами, скриптами и вложенными блоками для сравнения способов поиска"""
+    body = "".join(
+        f'<div class="wrap c{number}"><form id="form{number}" action="send.php" class="f c{number}">'
+        f'{FORM_INPUTS}<button type="submit">Go</button></form></div>'
+        for number in range(forms)
+    )
+    script_tags = "".join(
+        f"<script>var a = 1; function getShortImageSrc{number} (x) {{ return x }}</script>"
+        for number in range(scripts)
+    )
+    return (
+        '<!DOCTYPE html><html lang="en"><head><title class="title_class">Shop</title>'
+        "<script>const injectScript = (x) => x</script></head>"
+        f'<body><img class="def-product-item-image" src="a.png"><p id="text">Текст</p>{body}{script_tags}'
+        "</body></html>"
+    )
+
+
+SELECTORS = (
+    "form",
+    "input",
+    "input[name=email]",
+    "input[type=email]",
+    "input[name='phone']",
+    'input[value="{subid}"]',
+    "#form1",
+    ".wrap",
+    ".f.c2",
+    "div.wrap",
+    "input[required]",
+    "select[name=sub_id_9]",
+    "*",
+)
+
+
+class PageHandler(http.server.BaseHTTPRequestHandler):
+    """Страницы PageServer с ETag, на If-None-Match с тем же ETag - 304"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:
+        body = self.server.pages[self.path]
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.requests.append((self.path, 304))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.server.requests.append((self.path, 200))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        # клиент может закрыть соединение, не дочитав тело
+        try:
+            self.wfile.write(body)
+        except OSError:
+            self.close_connection = True
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+class PageServer(http.server.ThreadingHTTPServer):
+    """Локальный сервер страниц pages (путь -> тело) в отдельном потоке.
+    Запросы (путь, статус) записываются в requests, число открытых клиентами соединений - в connections
+    """
+
+    def __init__(self, pages: dict[str, bytes]):
+        super().__init__(("127.0.0.1", 0), PageHandler)
+        self.pages = pages
+        self.requests: list[tuple[str, int]] = []
+        self.connections = 0
+
+    def handle_error(self, request: object, client_address: tuple) -> None:
+        # разрыв соединения клиентом, который прекратил загрузку
+        pass
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+    def __enter__(self) -> "PageServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class PhoneInput(TagChecker):
+    type = HtmlTagAttribute(expected="tel")
+
+
+class ContactForm(TagChecker):
+    action = HtmlTagAttribute(expected="send.php")
+    phone = PhoneInput(selector="input[name=phone]")
+    inputs = TagChecker(selector="input", many=True)
+
+
+class ContactPage(HtmlTag):
+    lang = HtmlTagAttribute(expected="en")
+    form = ContactForm(selector="form", attributes={"class": {"expected": "f c0"}})
+
+
+class SchemaCloneTests(SimpleTestCase):
+    """Поля тэгов создаются из схемы класса через clone(), проверки не должны делить состояние"""
+
+    def check(self, html: str) -> ContactPage:
+        backend = get_backend("bs4")
+        html_preset = ContactPage(elem=backend.parse(html), backend=backend)
+        html_preset.run_validators()
+        return html_preset
+
+    def test_schema_is_built_once_per_class(self) -> None:
+        self.assertIs(ContactForm.get_schema(), ContactForm.get_schema())
+        self.assertEqual([field.name for field in ContactForm.get_schema().fields], ["action", "inputs", "phone"])
+        self.assertIsNot(PhoneInput.get_schema(), ContactForm.get_schema())
+
+    def test_checks_do_not_share_field_state(self) -> None:
+        bad_html = make_page().replace('lang="en"', 'lang="ru"').replace('type="tel"', 'type="text"')
+        with mock.patch("copy.deepcopy", side_effect=AssertionError("deepcopy")):
+            bad = self.check(bad_html)
+            good = self.check(make_page())
+        self.assertEqual(good.error_level, levels.SUCCESS)
+        self.assertEqual(bad.error_level, levels.ERROR)
+        self.assertEqual((bad.lang.value, good.lang.value), ("ru", "en"))
+        self.assertEqual((bad.form.phone.type.value, good.form.phone.type.value), ("text", "tel"))
+        self.assertTrue(bad.form.phone.type.errors)
+        self.assertFalse(good.form.phone.type.errors)
+        self.assertIsNot(bad.form, good.form)
+        self.assertIsNot(getattr(bad.form, "class"), getattr(good.form, "class"))
+        self.assertEqual(getattr(good.form, "class").value, "f c0")
+
+    def test_declarations_stay_unbound(self) -> None:
+        self.check(make_page().replace('type="tel"', 'type="text"'))
+        declaration = ContactPage.__dict__["form"]
+        self.assertIsNone(declaration.elem)
+        self.assertIsNone(declaration.root)
+        self.assertIsNone(ContactForm.__dict__["phone"].elem)
+        self.assertIsNone(PhoneInput.__dict__["type"].value)
+        self.assertFalse(PhoneInput.__dict__["type"].errors)
+        self.assertNotIn("action", vars(declaration))
+
+
+class SelectorFastPathTests(SimpleTestCase):
+    """Простые селекторы ищутся без soupsieve, результат должен совпадать с soupsieve"""
+
+    def setUp(self) -> None:
+        self.backend = get_backend("bs4")
+        self.root = self.backend.parse(make_page())
+
+    def test_compiled_selectors_match_soupsieve(self) -> None:
+        for selector in SELECTORS:
+            with self.subTest(selector=selector):
+                self.assertIsNotNone(compile_selector(selector))
+                self.assertEqual(self.backend.select(self.root, selector), self.root.select(selector))
+
+    def test_select_all_matches_soupsieve(self) -> None:
+        selected = select_all(elem=self.root, selectors=SELECTORS, backend=self.backend)
+        for selector in SELECTORS:
+            with self.subTest(selector=selector):
+                self.assertEqual(selected[selector], self.root.select(selector))
+
+    def test_complex_selectors_are_not_compiled(self) -> None:
+        for selector in ("div > form", "form input", "input:not([type=hidden])", "a, b", "input[name^=sub]"):
+            with self.subTest(selector=selector):
+                self.assertIsNone(compile_selector(selector))
+
+
+class DocumentIndexTests(SimpleTestCase):
+    def test_select_matches_backend_select(self) -> None:
+        for backend_name in ("bs4", "lxml"):
+            backend = get_backend(backend_name)
+            root = backend.parse(make_page())
+            index = DocumentIndex(root=root, backend=backend)
+            scopes = [root, *backend.select(root, "form")]
+            for scope in scopes:
+                for selector in SELECTORS:
+                    with self.subTest(backend=backend_name, selector=selector):
+                        self.assertEqual(index.select(selector=selector, scope=scope), backend.select(scope, selector))
+
+    def test_complex_selector_and_foreign_scope_fall_back(self) -> None:
+        backend = get_backend("bs4")
+        root = backend.parse(make_page())
+        index = DocumentIndex(root=root, backend=backend)
+        self.assertIsNone(index.select(selector="div > form", scope=root))
+        other_root = backend.parse(make_page())
+        self.assertIsNone(index.select(selector="form", scope=other_root))
+
+    def test_positions_follow_document_order(self) -> None:
+        backend = get_backend("lxml")
+        root = backend.parse(make_page())
+        index = DocumentIndex(root=root, backend=backend)
+        elements = list(backend.iter_elements(root))
+        self.assertEqual(len(index), len(elements))
+        self.assertEqual([index.get_position(elem) for elem in elements], list(range(len(elements))))
+
+    def test_find_script_with_js_function(self) -> None:
+        backend = get_backend("bs4")
+        root = backend.parse(make_page())
+        index = DocumentIndex(root=root, backend=backend)
+        head = backend.select_one(root, "head")
+        self.assertIn("injectScript", backend.get_text(index.find_script_with_js_function("injectScript", root)))
+        self.assertIsNotNone(index.find_script_with_js_function("getShortImageSrc1", root))
+        self.assertIsNone(index.find_script_with_js_function("getShortImageSrc1", head))
+        self.assertIsNone(index.find_script_with_js_function("missing", root))
+
+    def test_named_function_expression(self) -> None:
+        self.assertEqual(find_js_functions("const x = function injectScript(a){}"), {"x", "injectScript"})
+        self.assertEqual(find_js_functions("let y = async function (a) {}; var z = a => a"), {"y", "z"})
+        html = make_page().replace("const injectScript = (x) => x", "var inject = function injectScript (x) { }")
+        for backend_name in ("bs4", "lxml"):
+            with self.subTest(backend=backend_name):
+                backend = get_backend(backend_name)
+                root = backend.parse(html)
+                index = DocumentIndex(root=root, backend=backend)
+                for name in ("inject", "injectScript"):
+                    script = index.find_script_with_js_function(name, root)
+                    self.assertIn("injectScript", backend.get_text(script))
+
+
+class ParserBackendsTests(SimpleTestCase):
+    """Парсер lxml должен давать тот же результат проверки, что и bs4"""
+
+    def test_presets_give_same_result(self) -> None:
+        pages = (make_page(), make_page(forms=0, scripts=0), make_page(forms=5, scripts=4))
+        for html in pages:
+            for preset_name in PRESETS_MAP:
+                with self.subTest(preset=preset_name):
+                    results = [
+                        run_check(html=html, preset_name=preset_name, parser_backend=backend_name)
+                        for backend_name in ("bs4", "lxml")
+                    ]
+                    self.assertEqual(convert_to_dict(results[0].preset), convert_to_dict(results[1].preset))
+                    self.assertEqual(results[0].errors_level_stat, results[1].errors_level_stat)
+
+    def test_childless_element_exists(self) -> None:
+        # тэг bs4 всегда истинный, а элемент lxml без потомков - ложный, поэтому элемент сравнивается с None
+        html = '<html><body><form><input name="phone" type="tel"></form></body></html>'
+        for backend_name in ("bs4", "lxml"):
+            with self.subTest(backend=backend_name):
+                backend = get_backend(backend_name)
+                html_preset = ContactPage(elem=backend.parse(html), backend=backend)
+                html_preset.run_validators()
+                phone = html_preset.form.phone
+                self.assertTrue(phone.exist())
+                self.assertEqual(phone.tag_name, "input")
+                self.assertEqual(phone.get_short_display(), "<input {'name': 'phone', 'type': 'tel'}>...</input>")
+                html_preset = ContactPage(elem=backend.parse("<html><body></body></html>"), backend=backend)
+                html_preset.run_validators()
+                self.assertFalse(html_preset.form.exist())
+                self.assertEqual(html_preset.form.tag_name, "form")
+                self.assertEqual(html_preset.form.get_short_display(), "")
+
+
+class ResultCacheTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.html_checker = HtmlChecker(request_sender=RequestSender(), result_cache=LRUResultCache(maxsize=8))
+
+    def check(self, html: str, preset_name: str = "Atlas", parser_backend: str = "bs4") -> tuple:
+        with mock.patch.object(checker, "run_check", wraps=run_check) as run_check_mock:
+            result = self.html_checker.check(html=html, preset_name=preset_name, url="", parser_backend=parser_backend)
+        return result, run_check_mock.call_count
+
+    def test_same_html_is_checked_once(self) -> None:
+        html = make_page()
+        first, first_calls = self.check(html)
+        second, second_calls = self.check(html)
+        self.assertEqual((first_calls, second_calls), (1, 0))
+        self.assertIsNotNone(first.cache_key)
+        self.assertEqual(first.cache_key, second.cache_key)
+        self.assertEqual(convert_to_dict(first.preset), convert_to_dict(second.preset))
+
+    def test_other_html_preset_or_backend_is_a_miss(self) -> None:
+        html = make_page()
+        self.check(html)
+        for html_, preset_name, parser_backend in (
+            (make_page(forms=1), "Atlas", "bs4"),
+            (html, "TEST", "bs4"),
+            (html, "Atlas", "lxml"),
+        ):
+            with self.subTest(preset=preset_name, backend=parser_backend):
+                self.assertEqual(self.check(html_, preset_name, parser_backend)[1], 1)
+
+
+class RequestSenderTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.server = self.enterContext(PageServer({"/": make_page().encode(), "/other": make_page(forms=1).encode()}))
+
+    def test_keep_alive_connection_is_reused(self) -> None:
+        request_sender = RequestSender()
+        for path in ("/", "/other", "/", "/other"):
+            request_sender.request(self.server.url(path))
+        self.assertEqual(self.server.connections, 1)
+
+    def test_conditional_get_returns_cached_body(self) -> None:
+        request_sender = RequestSender()
+        first = request_sender.request(self.server.url())
+        second = request_sender.request(self.server.url())
+        self.assertEqual(second, first)
+        self.server.pages["/"] = make_page(forms=2).encode()
+        changed = request_sender.request(self.server.url())
+        self.assertEqual(changed, make_page(forms=2))
+        self.assertEqual(self.server.requests, [("/", 200), ("/", 304), ("/", 200)])
+
+    def test_async_sender_reuses_connection_and_cached_body(self) -> None:
+        async def request_pages() -> list[str]:
+            request_sender = AsyncRequestSender()
+            try:
+                return [await request_sender.request(self.server.url(path)) for path in ("/", "/other", "/")]
+            finally:
+                await request_sender.aclose()
+
+        texts = asyncio.run(request_pages())
+        self.assertEqual(texts[2], texts[0])
+        self.assertEqual(self.server.requests, [("/", 200), ("/other", 200), ("/", 304)])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_response_cache_is_bounded_by_size(self) -> None:
+        text_size = sys.getsizeof("x" * 1000)
+        response_cache = ResponseCache(maxsize=10, max_bytes=text_size * 2, max_entry_bytes=text_size)
+        headers = {"ETag": '"1"'}
+        for url in ("a", "b", "c"):
+            response_cache.set(url, "x" * 1000, headers=headers)
+        self.assertIsNone(response_cache.get("a"))
+        self.assertIsNotNone(response_cache.get("b"))
+        self.assertEqual(response_cache.size, text_size * 2)
+        # слишком большой текст не сохраняется и вытесняет прежний текст адреса
+        response_cache.set("b", "x" * 1001, headers=headers)
+        self.assertIsNone(response_cache.get("b"))
+        self.assertEqual(response_cache.size, text_size)
+
+
+class BulkCheckTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.pages = {
+            "/": make_page().encode(),
+            "/broken": make_page(forms=1).encode(),
+            "/large": make_page(forms=50).encode(),
+        }
+        self.server = self.enterContext(PageServer(self.pages))
+
+    def test_failed_url_does_not_stop_other_urls(self) -> None:
+        broken_html = self.pages["/broken"].decode()
+
+        def check_summary(html: str, preset_names: list[str], parser_backend: str) -> dict:
+            if html == broken_html:
+                raise RuntimeError("parser crashed")
+            return run_check_summary(html, preset_names, parser_backend)
+
+        self.enterContext(mock.patch.object(bulk, "run_check_summary", side_effect=check_summary))
+        # отправитель страниц создается из настроек проекта, как в create_html_checker
+        self.enterContext(override_settings(CHECK_FETCH_MAX_BYTES=len(self.pages["/"]) * 2))
+        urls = [self.server.url(path) for path in ("/broken", "/", "/large", "/missing")]
+        with self.assertLogs(bulk.logger, "ERROR") as logs:
+            results = {
+                (result.url, result.preset_name): result
+                for result in iter_check_urls(urls=urls, preset_names=["Atlas", "TEST"], concurrency=2)
+            }
+        self.assertEqual(logs.output[0].splitlines()[0], f"ERROR:{bulk.logger.name}:Bulk check of {urls[0]} failed")
+
+        self.assertEqual(len(results), 8)
+        expected = run_check_summary(self.pages["/"].decode(), ["Atlas", "TEST"], "lxml")
+        for preset_name in ("Atlas", "TEST"):
+            result = results[self.server.url("/"), preset_name]
+            self.assertIsNone(result.error)
+            self.assertEqual(result.errors_level_stat, expected[preset_name])
+            broken = results[self.server.url("/broken"), preset_name]
+            self.assertEqual(broken.error, "Ошибка проверки: RuntimeError: parser crashed")
+            self.assertIsNone(broken.errors_level_stat)
+            large = results[self.server.url("/large"), preset_name]
+            self.assertTrue(large.error.startswith("Не удалось загрузить сайт"))
+            self.assertTrue(results[self.server.url("/missing"), preset_name].error.startswith("Не удалось"))
+
+
+class ResponseBodyReaderTests(SimpleTestCase):
+    def read(self, headers: dict[str, str], body: bytes, max_bytes: int = 1024 * 1024, chunk_size: int = 7) -> str:
+        reader = ResponseBodyReader(headers, max_bytes=max_bytes, chunk_size=chunk_size)
+        for start in range(0, len(body), chunk_size):
+            reader.feed(body[start : start + chunk_size])
+        return reader.finish()
+
+    def test_content_length_over_limit(self) -> None:
+        with self.assertRaises(ResponseTooLarge):
+            ResponseBodyReader({"Content-Type": "text/html", "Content-Length": "2048"}, max_bytes=1024)
+
+    def test_decompressed_body_over_limit(self) -> None:
+        body = gzip.compress(b"<html>" + b" " * 100_000 + b"</html>")
+        headers = {"Content-Type": "text/html", "Content-Encoding": "gzip"}
+        with self.assertRaises(ResponseTooLarge):
+            self.read(headers, body, max_bytes=10_000, chunk_size=512)
+
+    def test_gzip_body(self) -> None:
+        html = "<html><body>Привет</body></html>"
+        body = gzip.compress(html.encode())
+        self.assertEqual(self.read({"Content-Type": "text/html", "Content-Encoding": "gzip"}, body), html)
+
+    def test_unsupported_content(self) -> None:
+        with self.assertRaises(UnsupportedContentType):
+            ResponseBodyReader({"Content-Type": "application/json"})
+        with self.assertRaises(InvalidContentEncoding):
+            ResponseBodyReader({"Content-Type": "text/html", "Content-Encoding": "zstd"})
+        with self.assertRaises(InvalidContentEncoding):
+            self.read({"Content-Type": "text/html", "Content-Encoding": "gzip"}, b"not gzip at all")
+
+    def test_encoding_sources(self) -> None:
+        html = "<html><head><meta charset='windows-1251'></head><body>Привет мир</body></html>"
+        cases = (
+            ({"Content-Type": "text/html; charset=windows-1251"}, html.encode("cp1251")),
+            ({"Content-Type": "text/html"}, html.encode("cp1251")),
+            ({"Content-Type": "text/html"}, codecs.BOM_UTF8 + html.encode()),
+            ({"Content-Type": "text/html"}, html.replace("windows-1251", "utf-8").encode()),
+        )
+        for headers, body in cases:
+            with self.subTest(headers=headers, body=body[:10]):
+                self.assertIn("Привет мир", self.read(headers, body))
+
+
+class HeadAndForm(HtmlTag):
+    """Пресет без списков и get_element: разбор можно остановить после первой формы"""
+
+    lang = HtmlTagAttribute(expected="en")
+    title = TagChecker(selector="title", attributes={"class": {"expected": "title_class"}})
+    form = TagChecker(selector="form", attributes={"action": {"expected": "send.php"}})
+    image = TagChecker(selector="img.def-product-item-image", required=False)
+
+
+class StreamingParserTests(SimpleTestCase):
+    def parse(self, html: str, preset: type[HtmlTag], chunk_size: int) -> StreamingParser:
+        parser = StreamingParser(stop_selectors=get_stop_selectors(preset))
+        for start in range(0, len(html), chunk_size):
+            if parser.feed(html[start : start + chunk_size]):
+                break
+        return parser
+
+    def check(self, root: object, preset: type[HtmlTag]) -> dict:
+        backend = get_backend("lxml")
+        html_preset = preset(elem=root, backend=backend, document_index=DocumentIndex(root=root, backend=backend))
+        html_preset.run_validators()
+        return convert_to_dict(html_preset)
+
+    def test_bundled_presets_parse_to_the_end(self) -> None:
+        for preset in PRESETS_MAP.values():
+            with self.subTest(preset=preset.__name__):
+                self.assertIsNone(get_stop_selectors(preset))
+
+    def test_early_stop_gives_full_parse_result(self) -> None:
+        html = make_page(forms=20, scripts=5)
+        full = self.check(get_backend("lxml").parse(html), HeadAndForm)
+        for chunk_size in (1, 50, 512, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                parser = self.parse(html, HeadAndForm, chunk_size)
+                self.assertTrue(parser.stopped)
+                self.assertLess(parser.size, len(html.encode()) // 2)
+                self.assertEqual(self.check(parser.close(), HeadAndForm), full)
+
+    def test_missing_field_parses_to_the_end(self) -> None:
+        html = make_page(forms=0)
+        parser = self.parse(html, HeadAndForm, 64)
+        self.assertFalse(parser.stopped)
+        full = self.check(get_backend("lxml").parse(html), HeadAndForm)
+        self.assertEqual(self.check(parser.close(), HeadAndForm), full)
+
+    def test_full_stream_matches_parse(self) -> None:
+        html = make_page()
+        for preset_name, preset in PRESETS_MAP.items():
+            with self.subTest(preset=preset_name):
+                root = self.parse(html, preset, 100).close()
+                self.assertEqual(self.check(root, preset), self.check(get_backend("lxml").parse(html), preset))
+
+
+class StreamedCheckTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.server = self.enterContext(PageServer({"/": make_page(forms=200).encode()}))
+        self.enterContext(mock.patch.dict(PRESETS_MAP, {"HeadAndForm": HeadAndForm}))
+        self.html_checker = HtmlChecker(
+            request_sender=RequestSender(chunk_size=1024),
+            parser_backend="lxml",
+            result_cache=LRUResultCache(maxsize=8),
+            profile_checks=True,
+            stream_pages=True,
+        )
+
+    def check(self, preset_name: str) -> tuple:
+        with mock.patch.object(checker, "_check_document", wraps=checker._check_document) as check_document_mock:
+            result = self.html_checker.check(html="", preset_name=preset_name, url=self.server.url())
+        return result, check_document_mock.call_count
+
+    def test_stopped_check_hits_cache(self) -> None:
+        first, first_calls = self.check("HeadAndForm")
+        second, second_calls = self.check("HeadAndForm")
+        self.assertEqual((first_calls, second_calls), (1, 0))
+        self.assertEqual(first.profile.counts["stream_stopped"], 1)
+        self.assertLess(first.profile.counts["stream_received"], len(self.server.pages["/"]) // 2)
+        self.assertEqual(second.profile.counts["cache_hits"], 1)
+        self.assertEqual(first.cache_key, second.cache_key)
+        self.assertEqual(convert_to_dict(first.preset), convert_to_dict(second.preset))
+
+    def test_full_page_uses_result_of_regular_check(self) -> None:
+        self.server.pages["/"] = make_page(forms=0).encode()
+        self.html_checker.stream_pages = False
+        full, full_calls = self.check("HeadAndForm")
+        self.html_checker.stream_pages = True
+        streamed, streamed_calls = self.check("HeadAndForm")
+        self.assertEqual((full_calls, streamed_calls), (1, 0))
+        self.assertEqual(streamed.profile.counts["stream_stopped"], 0)
+        self.assertEqual(full.cache_key, streamed.cache_key)
+
+    def test_presets_without_stop_selectors_are_not_streamed(self) -> None:
+        with mock.patch.object(HtmlChecker, "_check_stream") as check_stream_mock:
+            for preset_name in ("Atlas", "TEST", "AceAff"):
+                self.html_checker.check(html="", preset_name=preset_name, url=self.server.url())
+        check_stream_mock.assert_not_called()
+
+
+def replace_nth(text: str, old: str, new: str, number: int) -> str:
+    """Заменить вхождение old с номером number, с нуля"""
+    start = -1
+    for _ in range(number + 1):
+        start = text.index(old, start + 1)
+    return text[:start] + new + text[start + len(old) :]
+
+
+class FormsPage(HtmlTag):
+    lang = HtmlTagAttribute(expected="en")
+    forms = ContactForm(selector="form", many=True)
+
+
+class JsonSerializerTests(SimpleTestCase):
+    """iter_json пишет то же, что json.dumps(convert_to_dict(...)), но по частям и без копии дерева в словарях"""
+
+    def test_iter_json_matches_convert_to_dict(self) -> None:
+        for backend_name in ("bs4", "lxml"):
+            backend = get_backend(backend_name)
+            for preset_name, preset in PRESETS_MAP.items():
+                with self.subTest(backend=backend_name, preset=preset_name):
+                    html_preset = preset(elem=backend.parse(make_page()), backend=backend)
+                    html_preset.run_validators()
+                    chunks = list(serializers.iter_json(html_preset, chunk_size=256))
+                    self.assertGreater(len(chunks), 1)
+                    expected = json.dumps({"result": convert_to_dict(html_preset)}, ensure_ascii=False)
+                    self.assertEqual("".join(chunks), expected)
+
+    def test_check_result_json(self) -> None:
+        check_result = run_check(html=make_page(), preset_name="Atlas", parser_backend="lxml")
+        data = json.loads("".join(check_result.iter_json()))
+        self.assertEqual(list(data), ["preset_name", "errors_level_stat", "result"])
+        self.assertEqual(data["preset_name"], "Atlas")
+        self.assertEqual(
+            data["errors_level_stat"],
+            {level.level: count for level, count in check_result.errors_level_stat.items()},
+        )
+        self.assertEqual(data["result"], json.loads(json.dumps(convert_to_dict(check_result.preset))))
+
+    def test_compact_json_keeps_only_errors(self) -> None:
+        check_result = run_check(html=make_page(), preset_name="Atlas", parser_backend="lxml")
+        full = json.loads("".join(check_result.iter_json()))["result"]
+        compact = json.loads("".join(check_result.iter_json(compact=True)))["result"]
+
+        def iter_attributes(node: dict) -> Iterator[dict]:
+            yield from (node["attrs"] or {}).values()
+            for child in (node["children"] or {}).values():
+                for item in child if isinstance(child, list) else [child]:
+                    yield from iter_attributes(item)
+
+        compact_attributes = list(iter_attributes(compact))
+        self.assertTrue(compact_attributes)
+        self.assertTrue(all(attribute["errors"] for attribute in compact_attributes))
+        self.assertEqual(
+            [attribute for attribute in iter_attributes(full) if attribute["errors"]],
+            compact_attributes,
+        )
+
+
+# templates/render_tag.html до render_tag_tree, рекурсивный include на каждый тэг
+OLD_RENDER_TAG_TEMPLATE = """\
+<details {%if tag_data.errors and tag_data.path_name != html %} open {%endif%}>
+  <summary class="{{tag_data.error_level.level}}">{{tag_data.path_name}}</summary>
+  <div class="row mb-3">
+    <div class="col">
+      <p class="text-center">
+        {%if tag_data.exist%}
+        {{tag_data.get_short_display}}
+        {%else%}
+        elem not found
+        {%endif%}
+      </p>
+    </div>
+    <div class="col">
+
+      <!-- {{tag_data.errors}} -->
+
+      {%if tag_data.errors.non_field_errors%}
+      {%for error in tag_data.errors.non_field_errors%}
+      <p class="error-message error-message-{{error.level.level}} text-{{error.level.level}}">
+        <span>{{error.message}}</span>
+      </p><br>
+      {%endfor%}
+      {%else%}
+      <!-- <p class="error-message error-message-success text-success"></p> -->
+      {%endif%}
+
+    </div>
+  </div>
+  {%if tag_data.exist and tag_data.attributes%}
+  <!-- TAG ATTRIBUTES TABLE -->
+
+
+  <table class="table">
+    <thead>
+      <tr>
+        <th scope="col">Attr</th>
+        <th scope="col">Value</th>
+        <th scope="col">Expected</th>
+        <th scope="col">Errors</th>
+      </tr>
+    </thead>
+    <tbody>
+      {%for attr_name, attr_data in tag_data.attributes.items%}
+      <tr>
+        <td><b>{{attr_data.name}}</b></td>
+        <td>
+          {%if attr_data.value is None%}
+          -
+          {%else%}
+          "{{attr_data.value}}"
+          {%endif%}
+        </td>
+        <td>
+          {%if attr_data.expected%}
+          "{{attr_data.expected}}"
+          {%endif%}
+          {%if attr_data.choices%}
+          {{attr_data.choices}}
+          {%endif%}
+        </td>
+        <td class="error-cell">
+          {%if attr_data.errors%}
+          {%for error in attr_data.errors%}
+          <p class="error-message error-message-{{error.level.level}} text-{{error.level.level}}">
+            <span>{{error.message}}</span>
+          </p>
+          {%endfor%}
+          {%else%}
+          <p class="error-message error-message-success text-success"></p>
+          {%endif%}
+        </td>
+      </tr>
+      {%endfor%}
+    </tbody>
+  </table>
+  <!-- TAG ATTRIBUTES TABLE -->
+  {%endif%}
+
+  <!-- TAG CHILDRENS -->
+  {% if tag_data.childrens %}
+
+  {% for child_key, child_tag in tag_data.childrens.items %}
+  {% if child_tag.many %}
+  {# Это список тегов #}
+  {% for child_data in child_tag %}
+  {% include "render_tag.html" with tag_data=child_data %}
+  {% endfor %}
+  {% else %}
+  {# Это один тег #}
+  {% include "render_tag.html" with tag_data=child_tag %}
+  {% endif %}
+  {% endfor %}
+
+  {% endif %}
+  <!-- TAG CHILDRENS -->
+</details>
+"""
+
+
+def normalize_html(html: str) -> str:
+    """HTML без комментариев и пробелов между тэгами, для сравнения с шаблоном"""
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.DOTALL)
+    html = re.sub(r"\s+", " ", html)
+    return re.sub(r"\s*([<>])\s*", r"\1", html).strip()
+
+
+class TagPositionTests(SimpleTestCase):
+    """Имя, путь, глубина и позиция тэга запоминаются в fill() и совпадают с вычисленными заново"""
+
+    def test_names_paths_depths_and_positions(self) -> None:
+        for backend_name in ("bs4", "lxml"):
+            with self.subTest(backend=backend_name):
+                backend = get_backend(backend_name)
+                html_tag = backend.parse(make_page(forms=3))
+                html_preset = FormsPage(elem=html_tag, backend=backend)
+                html_preset.run_validators()
+                elements = list(backend.iter_elements(html_tag))
+
+                def get_position(elem: object) -> int:
+                    return next(number for number, element in enumerate(elements) if element is elem)
+
+                self.assertEqual((html_preset.tag_name, html_preset.path_name, html_preset.depth), ("html", "html", 0))
+                self.assertEqual(html_preset.position, 0)
+                forms = html_preset.forms.tags_items
+                self.assertEqual([form.path_name for form in forms], ["form-1", "form-2", "form-3"])
+                self.assertEqual([form.position for form in forms], [8, 17, 26])
+                for form in forms:
+                    self.assertEqual((form.tag_name, form.depth), ("form", 1))
+                    self.assertEqual(form.position, get_position(form.elem))
+                    phone = form.phone
+                    self.assertEqual(phone.path_name, f"{form.path_name} > input[name=phone]")
+                    self.assertEqual((phone.tag_name, phone.depth), ("input", 2))
+                    self.assertEqual(phone.position, get_position(phone.elem))
+                    self.assertEqual(
+                        [item.path_name for item in form.inputs][:2],
+                        [f"{form.path_name} > input-1", f"{form.path_name} > input-2"],
+                    )
+                    for tag in (form, phone, *form.inputs):
+                        self.assertEqual(tag.path_name, tag._get_path_name())
+                        self.assertEqual(tag.tag_name, tag._get_tag_name())
+
+    def test_missing_element(self) -> None:
+        backend = get_backend("lxml")
+        html_preset = ContactPage(elem=backend.parse(make_page(forms=0)), backend=backend)
+        html_preset.run_validators()
+        form = html_preset.form
+        self.assertEqual((form.tag_name, form.path_name, form.depth, form.position), ("form", "form", 1, None))
+
+
+class RenderTagTreeTests(SimpleTestCase):
+    def test_same_html_as_old_template(self) -> None:
+        loader = ("django.template.loaders.locmem.Loader", {"render_tag.html": OLD_RENDER_TAG_TEMPLATE})
+        engine = Engine(loaders=[loader])
+        template = engine.get_template("render_tag.html")
+        for html in (make_page(), make_page(forms=0, scripts=0)):
+            for backend_name in ("bs4", "lxml"):
+                backend = get_backend(backend_name)
+                for preset_name, preset in PRESETS_MAP.items():
+                    with self.subTest(backend=backend_name, preset=preset_name):
+                        html_preset = preset(elem=backend.parse(html), backend=backend)
+                        html_preset.run_validators()
+                        rendered = render_tag_tree(html_preset)
+                        self.assertEqual(
+                            normalize_html(rendered),
+                            normalize_html(template.render(Context({"tag_data": html_preset}))),
+                        )
+                        summary = run_check(html=html, preset_name=preset_name, parser_backend=backend_name).preset
+                        self.assertEqual(render_tag_tree(summary), rendered)
+
+    def test_lazy_subtrees(self) -> None:
+        check_result = run_check(html=make_page(), preset_name="Atlas", parser_backend="lxml")
+        rendered = render_tag_tree(check_result.preset, lazy_url="/result/key/")
+        self.assertIn('<details data-src="/result/key/?path=', rendered)
+        full = render_tag_tree(check_result.preset)
+        self.assertLess(len(rendered), len(full))
+        # свернутый тэг подгружается по пути в дереве
+        path = re.search(r'data-src="/result/key/\?path=([^"]+)"', rendered).group(1)
+        tag = get_tag_by_path(check_result.preset, unquote(path))
+        body = render_tag_tree(tag, path=unquote(path), body_only=True)
+        self.assertIn(body, full)
+
+
+class IncrementalCheckTests(SimpleTestCase):
+    """Повторная проверка берет ошибки неизменившихся поддеревьев из прошлой и проверяет только изменившиеся"""
+
+    def check(self, html: str, previous_state: NodeState | None = None) -> tuple:
+        """Результат, состояние для следующей проверки, прошлая проверка и id заново проверенных форм"""
+        backend = get_backend("lxml")
+        html_preset = FormsPage(elem=backend.parse(html), backend=backend)
+        tracker = NodeTracker(html_preset, version=FormsPage.get_schema_version())
+        previous = PreviousCheck(state=previous_state, tracker=tracker) if previous_state is not None else None
+        with mock.patch.object(ContactForm, "validate", autospec=True, side_effect=TagChecker.validate) as validate:
+            html_preset.run_validators(previous=previous)
+        validated = [form.elem.get("id") for (form,), _ in validate.call_args_list]
+        return convert_to_dict(html_preset), tracker.get_state(), previous, validated
+
+    def test_unchanged_page_reuses_all_subtrees(self) -> None:
+        html = replace_nth(make_page(), 'type="tel"', 'type="text"', 0)
+        first, first_state, _, first_validated = self.check(html)
+        second, second_state, previous, second_validated = self.check(html, previous_state=first_state)
+        self.assertEqual(first_validated, ["form0", "form1", "form2"])
+        self.assertEqual(previous.reused, ["forms/0", "forms/1", "forms/2"])
+        self.assertEqual(second_validated, [])
+        self.assertEqual(second, first)
+        self.assertEqual(second_state, first_state)
+        self.assertEqual([error.path_name for error in second_state.iter_errors()], ["form-1 > input[name=phone]"])
+
+    def test_changed_subtree_is_revalidated(self) -> None:
+        _, first_state, _, _ = self.check(make_page())
+        html = replace_nth(make_page(), 'type="tel"', 'type="text"', 1)
+        second, second_state, previous, validated = self.check(html, previous_state=first_state)
+        self.assertEqual(previous.reused, ["forms/0", "forms/2"])
+        self.assertEqual(validated, ["form1"])
+        full, full_state, _, _ = self.check(html)
+        self.assertEqual(second, full)
+        self.assertEqual(second_state.errors, full_state.errors)
+
+    def test_diff_states(self) -> None:
+        previous = NodeState(
+            errors={
+                "form": ("html.form", [("", "", "danger", "missing"), ("type", "type", "danger", "not tel")]),
+                "title": ("html.title", [("", "", "warning", "empty")]),
+            },
+        )
+        current = NodeState(
+            errors={
+                "form": ("html.form", [("type", "type", "danger", "not tel"), ("type", "type", "danger", "not tel")]),
+                "image": ("html.image", [("", "", "danger", "missing")]),
+            },
+        )
+        diff = diff_states(previous, current)
+        self.assertEqual(
+            diff.new,
+            [
+                DiffError("html.form", "type", "danger", "not tel"),
+                DiffError("html.image", "", "danger", "missing"),
+            ],
+        )
+        self.assertEqual(
+            diff.fixed,
+            [
+                DiffError("html.form", "", "danger", "missing"),
+                DiffError("html.title", "", "warning", "empty"),
+            ],
+        )
+        self.assertEqual(diff.unchanged, [DiffError("html.form", "type", "danger", "not tel")])
+
+
+class ErrorContainersTests(SimpleTestCase):
+    """Контейнеры ошибок создаются при первой ошибке, но errors атрибутов и списков - всегда списки"""
+
+    def check(self, html: str) -> FormsPage:
+        backend = get_backend("lxml")
+        html_preset = FormsPage(elem=backend.parse(html), backend=backend)
+        html_preset.run_validators()
+        return html_preset
+
+    def test_errors_without_errors_are_empty_lists(self) -> None:
+        html_preset = self.check(make_page(forms=0))
+        attribute = html_preset.lang
+        self.assertEqual(attribute.errors, [])
+        self.assertEqual(html_preset.forms.errors, [])
+        self.assertIsNone(attribute._errors)
+        # добавленное в пустой список не сохраняется, ошибки добавляются через add_error
+        attribute.errors.append("error")
+        self.assertEqual(attribute.errors, [])
+        attribute.add_error(ValidationError(message="Wrong", level=levels.WARNING))
+        self.assertEqual([str(error.message) for error in attribute.errors], ["Wrong"])
+        self.assertIs(attribute.errors, attribute.errors)
+
+    def test_list_errors_follow_items(self) -> None:
+        html_preset = self.check(make_page(forms=2).replace('type="tel"', 'type="text"', 1))
+        errors = html_preset.forms.errors
+        self.assertIsInstance(errors, list)
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(["phone" in form_errors for form_errors in errors], [True, False])
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_paths_are_compared_separately(self) -> None:
+        results = list(
+            run_benchmarks(
+                scenarios=["small"],
+                preset_names=["TEST"],
+                parser_backends=["lxml"],
+                repeat=1,
+                paths=["pipeline", "incremental", "cache_hit"],
+            ),
+        )
+        self.assertEqual([result["path"] for result in results], ["pipeline", "incremental", "cache_hit"])
+        self.assertEqual(list(results[0]["phases"]), [*PHASES, TOTAL])
+        self.assertEqual(list(results[2]["phases"]), [TOTAL])
+        self.assertEqual({result["tags"] for result in results}, {results[0]["tags"]})
+        current = make_report(results, repeat=1)
+        comparisons = compare_reports(current, current)
+        self.assertEqual(len(comparisons), len(PHASES) + 1 + 2)
+        # в отчетах без путей проверки все результаты - pipeline
+        old_result = {key: value for key, value in results[0].items() if key != "path"}
+        baseline = {**current, "results": [old_result]}
+        comparisons = compare_reports(baseline, current)
+        self.assertEqual({comparison.path for comparison in comparisons}, {"pipeline"})
+        with self.assertRaises(ValueError):
+            benchmark_case("small", preset_name="TEST", parser_backend="lxml", path="pool")
+
+
+class CheckHistoryTests(TestCase):
+    def setUp(self) -> None:
+        self.history = CheckHistory()
+        self.html = make_page()
+
+    def save(self, url: str = "", html: str | None = None) -> CheckRun:
+        html = html if html is not None else self.html
+        check_result = run_check(html=html, preset_name="Atlas", parser_backend="lxml", track_nodes=url != "")
+        return self.history.save(check_result, html=html, url=url, parser_backend="lxml")
+
+    def test_snapshots_are_deduplicated_and_compressed(self) -> None:
+        first, second = self.save(), self.save(url="http://example.com/")
+        self.assertEqual(HtmlSnapshot.objects.count(), 1)
+        self.assertEqual(first.snapshot_id, second.snapshot_id)
+        snapshot = HtmlSnapshot.objects.get()
+        self.assertEqual(snapshot.sha256, hashlib.sha256(self.html.encode()).hexdigest())
+        self.assertEqual(snapshot.compression, HtmlSnapshot.GZIP)
+        self.assertEqual(snapshot.size, len(self.html.encode()))
+        self.assertLess(len(snapshot.content), snapshot.size // 2)
+        self.assertEqual(snapshot.get_html(), self.html)
+        self.save(html=make_page(forms=1))
+        self.assertEqual(HtmlSnapshot.objects.count(), 2)
+
+    def test_zstd_snapshot_requires_zstandard(self) -> None:
+        snapshot = HtmlSnapshot(compression=HtmlSnapshot.ZSTD, content=b"", size=0)
+        with mock.patch("form_checker.models.zstandard", None), self.assertRaises(ImportError):
+            snapshot.get_html()
+
+    def test_findings_and_counts(self) -> None:
+        run = self.save()
+        check_result = run_check(html=self.html, preset_name="Atlas", parser_backend="lxml")
+        stat = {level.level: count for level, count in check_result.errors_level_stat.items()}
+        self.assertEqual(
+            (run.info_count, run.warning_count, run.danger_count),
+            (stat["info"], stat["warning"], stat["danger"]),
+        )
+        self.assertEqual(run.max_level, int(levels.ERROR))
+        findings = list(run.findings.order_by("pk").values_list("path", "attribute", "level", "message"))
+        expected = [
+            (path, attribute, int(error.level), str(error.message))
+            for path, attribute, error in iter_findings(check_result.preset)
+        ]
+        self.assertEqual(findings, expected)
+        self.assertEqual(Finding.objects.with_level(levels.ERROR).count(), stat["danger"])
+        self.assertQuerySetEqual(CheckRun.objects.with_errors(), [run])
+
+    def test_previous_state_only_for_urls(self) -> None:
+        self.save()
+        self.assertIsNone(self.history.get_previous_state(url="", preset_name="Atlas", parser_backend="lxml"))
+        run = self.save(url="http://example.com/")
+        state = self.history.get_previous_state(url="http://example.com/", preset_name="Atlas", parser_backend="lxml")
+        self.assertEqual(state.to_json(), gzip.decompress(bytes(run.node_state)).decode())
+        self.assertIsNone(
+            self.history.get_previous_state(url="http://example.com/", preset_name="TEST", parser_backend="lxml"),
+        )
+
+    def test_database_errors_do_not_break_checks(self) -> None:
+        with (
+            mock.patch.object(CheckRun.objects, "create", side_effect=DatabaseError("locked")),
+            self.assertLogs(history_logger, "ERROR"),
+        ):
+            self.assertIsNone(self.save())
+        self.assertEqual(CheckRun.objects.count(), 0)
+
+
+class JobQueueTests(TestCase):
+    def make_worker(self, name: str, html_checker: object = None) -> JobWorker:
+        return JobWorker(html_checker=html_checker or mock.Mock(), name=name, host_interval=60)
+
+    def test_job_is_claimed_by_one_worker(self) -> None:
+        job = submit_job(preset_name="Atlas", url="https://example.com/landing")
+        self.assertEqual(job.host, "example.com")
+        first, second = self.make_worker("first"), self.make_worker("second")
+        claimed = first.claim_job()
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (CheckJob.RUNNING, "first", 1))
+        self.assertIsNone(second.claim_job())
+
+    def test_host_throttle_blocks_second_job_of_host(self) -> None:
+        first_job = submit_job(preset_name="Atlas", url="https://example.com/a")
+        second_job = submit_job(preset_name="Atlas", url="https://example.com/b")
+        other_host_job = submit_job(preset_name="Atlas", url="https://example.org/")
+        worker = self.make_worker("worker")
+        self.assertEqual(worker.claim_job().id, first_job.id)
+        # задача другого хоста не ждет
+        self.assertEqual(worker.claim_job().id, other_host_job.id)
+        self.assertIsNone(worker.claim_job())
+        second_job.refresh_from_db()
+        self.assertEqual((second_job.status, second_job.attempts, second_job.locked_by), (CheckJob.PENDING, 0, ""))
+        HostThrottle.objects.filter(host="example.com").update(next_request_at=timezone.now())
+        self.assertEqual(worker.claim_job().id, second_job.id)
+
+    def test_lost_claim_does_not_take_host_slot(self) -> None:
+        job = submit_job(preset_name="Atlas", url="https://example.com/")
+        worker = self.make_worker("worker")
+        ready = list(CheckJob.objects.ready().values_list("id", "host"))
+        # другой обработчик захватил задачу между выбором готовых задач и захватом
+        CheckJob.objects.filter(id=job.id).update(status=CheckJob.RUNNING, locked_by="other")
+        candidates = mock.Mock(values_list=mock.Mock(return_value=ready))
+        with mock.patch.object(CheckJob.objects, "ready", return_value=candidates):
+            self.assertIsNone(worker.claim_job())
+        candidates.values_list.assert_called_once()
+        self.assertFalse(HostThrottle.objects.exists())
+
+    def test_stale_running_jobs_are_reclaimed(self) -> None:
+        stale_at = timezone.now() - datetime.timedelta(hours=1)
+        retried = submit_job(preset_name="Atlas", html="<html></html>")
+        exhausted = submit_job(preset_name="Atlas", html="<html></html>", max_attempts=1)
+        alive = submit_job(preset_name="Atlas", html="<html></html>")
+        CheckJob.objects.update(status=CheckJob.RUNNING, locked_by="gone", attempts=1, heartbeat_at=stale_at)
+        CheckJob.objects.filter(id=alive.id).update(heartbeat_at=timezone.now())
+        with self.assertLogs(jobs.logger, "WARNING"):
+            self.assertEqual(self.make_worker("worker").reclaim_stale_jobs(), 1)
+        statuses = dict(CheckJob.objects.values_list("id", "status"))
+        self.assertEqual(
+            statuses,
+            {retried.id: CheckJob.PENDING, exhausted.id: CheckJob.FAILED, alive.id: CheckJob.RUNNING},
+        )
+
+    def test_failed_fetch_is_retried_until_attempt_limit(self) -> None:
+        html_checker = mock.Mock()
+        html_checker.check.side_effect = RequestException("connection refused")
+        worker = self.make_worker("worker", html_checker=html_checker)
+        job = submit_job(preset_name="Atlas", url="https://example.com/", max_attempts=2)
+        worker.process(worker.claim_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (CheckJob.PENDING, 1, ""))
+        self.assertIn("connection refused", job.error)
+        delay = (job.run_after - timezone.now()).total_seconds()
+        self.assertLessEqual(delay, RETRY_BACKOFF_FACTOR)
+        self.assertIsNone(worker.claim_job())
+        CheckJob.objects.filter(id=job.id).update(run_after=timezone.now())
+        HostThrottle.objects.update(next_request_at=timezone.now())
+        worker.process(worker.claim_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (CheckJob.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_events_follow_job_status(self) -> None:
+        job = submit_job(preset_name="Atlas", html=make_page())
+        check_result = run_check(html=make_page(), preset_name="Atlas", parser_backend="bs4")
+        updates = iter(
+            [
+                {"status": CheckJob.RUNNING, "attempts": 1},
+                {"status": CheckJob.RUNNING, "attempts": 1},
+                {"status": CheckJob.DONE, "result": dump_result(check_result)},
+            ],
+        )
+
+        def sleep(_: float) -> None:
+            CheckJob.objects.filter(id=job.id).update(**next(updates))
+
+        with mock.patch.object(jobs.time, "sleep", side_effect=sleep):
+            stream = "".join(iter_job_events(job.id, poll_interval=0.5))
+        events = [event.split("\n") for event in stream.split("\n\n") if event]
+        self.assertEqual(events[0], ["retry: 500"])
+        self.assertEqual([event[0] for event in events[1:]], ["event: status"] * 3 + ["event: result"])
+        statuses = [json.loads(event[1].removeprefix("data: "))["status"] for event in events[1:4]]
+        self.assertEqual(statuses, [CheckJob.PENDING, CheckJob.RUNNING, CheckJob.DONE])
+        result = json.loads(events[4][1].removeprefix("data: "))
+        self.assertEqual(result, json.loads("".join(check_result.iter_json())))
+
+
+class CheckProcessPoolTests(SimpleTestCase):
+    def test_processes_start_on_first_submit(self) -> None:
+        executor_class = self.enterContext(mock.patch.object(pool, "ProcessPoolExecutor"))
+        process_pool = CheckProcessPool(workers=3)
+        executor_class.assert_not_called()
+        future = process_pool.submit(run_check, "<html></html>", "TEST", "lxml")
+        executor_class.assert_called_once()
+        self.assertEqual(executor_class.call_args.kwargs["max_workers"], 3)
+        self.assertIs(executor_class.call_args.kwargs["initializer"], pool.warm_up_worker)
+        executor = executor_class.return_value
+        # все процессы запускаются и прогреваются до первой проверки
+        self.assertEqual(executor.submit.call_args_list[:3], [mock.call(pool._ping)] * 3)
+        self.assertEqual(executor.submit.call_args_list[3], mock.call(run_check, "<html></html>", "TEST", "lxml"))
+        self.assertIs(future, executor.submit.return_value)
+        process_pool.submit(run_check, "<html></html>", "TEST", "lxml")
+        executor_class.assert_called_once()
+        process_pool.shutdown()
+        executor.shutdown.assert_called_once_with(wait=True, cancel_futures=False)
+        with self.assertRaises(RuntimeError):
+            process_pool.submit(run_check, "<html></html>", "TEST", "lxml")
+
+    def test_warm_up_checks_every_preset_and_parser(self) -> None:
+        with mock.patch.object(pool, "run_check") as warm_up_check:
+            pool.warm_up_worker()
+        expected = [
+            mock.call(html=pool.WARM_UP_HTML, preset_name=preset_name, parser_backend=parser_backend)
+            for preset_name in PRESETS_MAP
+            for parser_backend in PARSER_BACKENDS
+        ]
+        self.assertEqual(warm_up_check.call_args_list, expected)
+
+    def test_broken_pool_is_restarted(self) -> None:
+        broken, restarted = mock.Mock(), mock.Mock()
+        self.enterContext(mock.patch.object(CheckProcessPool, "_create_executor", side_effect=[broken, restarted]))
+        broken.submit.side_effect = BrokenProcessPool()
+        process_pool = CheckProcessPool(workers=1)
+        with self.assertLogs(pool.logger, "WARNING"):
+            future = process_pool.submit(run_check, "<html></html>", "TEST", "lxml")
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertIs(future, restarted.submit.return_value)
+
+    def test_check_in_pool_matches_in_process(self) -> None:
+        html = make_page()
+        with CheckProcessPool(workers=1) as process_pool:
+            check_result = process_pool.submit(run_check, html, "Atlas", "lxml").result()
+        expected = run_check(html, "Atlas", "lxml")
+        self.assertEqual(check_result.errors_level_stat, expected.errors_level_stat)
+        self.assertEqual(convert_to_dict(check_result.preset), convert_to_dict(expected.preset))
+
+    def test_workers_must_be_positive(self) -> None:
+        with self.assertRaises(ValueError):
+            CheckProcessPool(workers=0)
+
+
+class CheckedContactForm(ContactForm):
+    def validate_phone(self, field: TagChecker) -> None:  # noqa: ARG002
+        raise ValidationError(message="Phone is not checked", level=levels.WARNING)
+
+
+class CheckedContactPage(HtmlTag):
+    forms = CheckedContactForm(selector="form", many=True)
+
+
+class CheckProfileTests(SimpleTestCase):
+    def test_phases_selectors_and_validators(self) -> None:
+        check_result = run_check(make_page(forms=2), "TEST", "lxml", profile=True)
+        profile = check_result.profile
+        self.assertEqual(list(profile.phases), ["parse", "fill", "validate", "stats", "summarize"])
+        self.assertEqual(profile.total, sum(profile.phases.values()))
+        selectors = {name: (stat.calls, stat.items) for name, stat in profile.selectors.items()}
+        self.assertEqual(
+            selectors,
+            {"TestHtml": (1, 1), "TestHtml.form": (1, 2), "Form.button": (2, 2), "Form.phone": (2, 2)},
+        )
+        # TestHtml.validate добавляет одну ошибку
+        validate = profile.validators["TestHtml.validate"]
+        self.assertEqual((validate.calls, validate.items), (1, 1))
+        self.assertEqual(profile.validators["PhoneInput.validate"].calls, 2)
+        self.assertEqual(profile.counts["tags"], 7)
+        self.assertEqual(profile.counts["errors"], sum(check_result.errors_level_stat.values()))
+        self.assertEqual(profile.counts["html_size"], len(make_page(forms=2)))
+
+    def test_custom_field_validators(self) -> None:
+        backend = get_backend("lxml")
+        profile = CheckProfile()
+        with profiling(profile):
+            html_preset = CheckedContactPage(elem=backend.parse(make_page(forms=3)), backend=backend)
+            html_preset.run_validators()
+        stat = profile.validators["CheckedContactForm.validate_phone"]
+        self.assertEqual((stat.calls, stat.items), (3, 3))
+        self.assertEqual(profile.selectors["CheckedContactPage.forms"].items, 3)
+
+    def test_without_details_only_phases_are_measured(self) -> None:
+        profile = run_check(make_page(), "TEST", "lxml", profile=True, profile_details=False).profile
+        self.assertEqual(list(profile.phases), ["parse", "fill", "validate", "stats", "summarize"])
+        self.assertEqual((profile.selectors, profile.validators), ({}, {}))
+        self.assertIsNone(run_check(make_page(), "TEST", "lxml").profile)
+
+    def test_checker_profile_is_not_cached(self) -> None:
+        html_checker = HtmlChecker(
+            request_sender=RequestSender(),
+            result_cache=LRUResultCache(maxsize=8),
+            profile_checks=True,
+        )
+        with self.assertLogs(checker.logger, "INFO") as logs:
+            first = html_checker.check(html=make_page(), preset_name="TEST", url="")
+            second = html_checker.check(html=make_page(), preset_name="TEST", url="")
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(logs.records[0].check_profile, first.profile.to_dict())
+        self.assertIn("cache", first.profile.phases)
+        self.assertNotIn("cache_hits", first.profile.counts)
+        self.assertEqual(second.profile.counts, {"cache_hits": 1})
+        self.assertNotIn("parse", second.profile.phases)
+        # в кэше лежит результат без профиля
+        self.assertIsNone(html_checker.get_cached_result(second.cache_key).profile)
+
+
+class CheckMetricsTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def make_metrics(self) -> CheckMetrics:
+        return CheckMetrics(registry=MetricsRegistry(directory=self.directory, flush_interval=60))
+
+    def test_registries_sharing_directory_are_summed(self) -> None:
+        first, second = self.make_metrics(), self.make_metrics()
+        check_result = run_check(html=make_page(), preset_name="TEST", parser_backend="lxml")
+        profile = CheckProfile()
+        profile.phases["parse"] = 0.2
+        first.record_check(check_result, profile, parser_backend="lxml", cache_hit=False)
+        second.record_check(check_result, profile, parser_backend="lxml", cache_hit=True)
+        second.record_check(check_result, profile, parser_backend="bs4", cache_hit=True)
+        second.record_failure("TEST", ValueError())
+        second.registry.flush()
+
+        text = first.expose()
+        self.assertEqual(len(list(self.directory.glob("*.json"))), 2)
+        self.assertIn('atlas_checks_total{preset="TEST",backend="lxml"} 2.0\n', text)
+        self.assertIn('atlas_checks_total{preset="TEST",backend="bs4"} 1.0\n', text)
+        self.assertIn('atlas_check_failures_total{preset="TEST",exception="ValueError"} 1.0\n', text)
+        self.assertIn('atlas_check_phase_duration_seconds_bucket{phase="parse",le="0.25"} 3.0\n', text)
+        self.assertIn('atlas_check_phase_duration_seconds_count{phase="parse"} 3.0\n', text)
+        self.assertIn("atlas_check_cache_hit_ratio 0.6666666666666666\n", text)
+
+    def test_events_are_flushed_once_per_interval(self) -> None:
+        check_metrics = self.make_metrics()
+        with mock.patch.object(check_metrics.registry, "flush", wraps=check_metrics.registry.flush) as flush:
+            for _ in range(3):
+                check_metrics.record_failure("TEST", ValueError())
+                check_metrics.record_request_attempt(
+                    RequestAttempt(url="http://a", method="GET", seconds=0.1, error_type="ConnectTimeout"),
+                )
+            flush.assert_not_called()
+            self.assertEqual(list(self.directory.iterdir()), [])
+            # при завершении процесса
+            check_metrics.registry.flush_pending()
+            check_metrics.registry.flush_pending()
+        flush.assert_called_once()
+        text = self.make_metrics().expose()
+        self.assertIn('atlas_fetch_failures_total{exception="ConnectTimeout"} 3.0\n', text)
+
+    def test_metrics_view_requires_token_or_allowed_address(self) -> None:
+        self.enterContext(mock.patch("form_checker.views.get_check_metrics", return_value=self.make_metrics()))
+        self.enterContext(override_settings(CHECK_METRICS_TOKEN="secret", CHECK_METRICS_ALLOWED_IPS=["10.0.0.1"]))
+        url = reverse("form_checker:metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer wrong"}).status_code, 403)
+        response = self.client.get(url, headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE atlas_checks_total counter", response.content)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.1").status_code, 200)
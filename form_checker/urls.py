@@ -7,5 +7,14 @@ app_name = 'form_checker'
 
 urlpatterns = [
     path('', views.CheckFormView.as_view(), name="check_form_form"),
+    path('async/', views.AsyncCheckFormView.as_view(), name="check_form_form_async"),
+    path('result/<str:cache_key>/', views.CheckResultNodeView.as_view(), name="check_result_node"),
+    path('api/check/', views.CheckResultJsonView.as_view(), name="check_json"),
+    path('api/bulk-check/', views.BulkCheckView.as_view(), name="bulk_check"),
+    path('jobs/<int:pk>/', views.CheckJobView.as_view(), name="check_job"),
+    path('api/jobs/', views.CheckJobCreateView.as_view(), name="check_job_create"),
+    path('api/jobs/<int:pk>/', views.CheckJobStatusView.as_view(), name="check_job_status"),
+    path('api/jobs/<int:pk>/events/', views.CheckJobEventsView.as_view(), name="check_job_events"),
+    path('metrics', views.metrics, name="metrics"),
     path('test/', views.test),
 ]
\ No newline at end of file
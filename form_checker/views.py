@@ -1,22 +1,72 @@
+import hmac
+import json
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse
-from django.shortcuts import render
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.views import View
 from requests.exceptions import RequestException
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from common.request_sender import RequestSender
+from common.exceptions import ResponseRejected
+from common.metrics import CONTENT_TYPE
 
-from .form_checker import HtmlChecker
+from .form_checker.bulk import iter_check_urls
+from .form_checker.dto import HtmlCheckResult
 from .form_checker.exceptions import HtmlTagNotFound
+from .form_checker.factory import create_html_checker
+from .form_checker.jobs import DEFAULT_MAX_EVENT_STREAMS, JobEventStreams, iter_job_json, load_result, submit_job
+from .form_checker.metrics import get_check_metrics
+from .form_checker.render import get_tag_by_path, render_tag_tree
 from .forms import CheckFormsByUrlForm
+from .models import CheckJob
+from .serializers import BulkCheckSerializer, CheckJobSerializer, CheckSerializer
+
+html_checker = create_html_checker()
+job_event_streams = JobEventStreams(
+    max_streams=getattr(settings, "CHECK_JOB_EVENTS_MAX_STREAMS", DEFAULT_MAX_EVENT_STREAMS),
+)
 
-html_checker = HtmlChecker(request_sender=RequestSender())
+
+def get_lazy_url(check_result: HtmlCheckResult) -> str | None:
+    """Адрес для подгрузки свернутых тэгов, если ленивая отрисовка включена и результат лежит в кэше"""
+    if not getattr(settings, "CHECK_RESULT_LAZY_RENDER", False) or check_result.cache_key is None:
+        return None
+    return reverse("form_checker:check_result_node", args=[check_result.cache_key])
 
 
 def index(request):
     return HttpResponse("123")
 
 
+def is_metrics_request_allowed(request) -> bool:
+    """Запрос с токеном CHECK_METRICS_TOKEN или с адреса из CHECK_METRICS_ALLOWED_IPS"""
+    token = getattr(settings, "CHECK_METRICS_TOKEN", None)
+    authorization = request.headers.get("Authorization", "").encode()
+    if token and hmac.compare_digest(authorization, f"Bearer {token}".encode()):
+        return True
+    return request.META.get("REMOTE_ADDR") in getattr(settings, "CHECK_METRICS_ALLOWED_IPS", ())
+
+
+def metrics(request):
+    """Метрики проверок в текстовом формате Prometheus, если они включены"""
+    check_metrics = get_check_metrics()
+    if check_metrics is None:
+        raise Http404("Metrics are disabled")
+    if not is_metrics_request_allowed(request):
+        raise PermissionDenied
+    return HttpResponse(check_metrics.expose(), content_type=CONTENT_TYPE)
+
+
 class CheckFormView(LoginRequiredMixin, View):
     template_name = "form_checker/check_form.html"
     result_template_name = "form_checker/check_result.html"
@@ -30,17 +80,27 @@ class CheckFormView(LoginRequiredMixin, View):
 
     def post(self, request):
         form = CheckFormsByUrlForm(request.POST)
+        if form.is_valid() and getattr(settings, "CHECK_JOBS_FOR_FORMS", False):
+            job = submit_job(**form.cleaned_data)
+            return redirect("form_checker:check_job", pk=job.pk)
         if form.is_valid():
             try:
                 html = form.cleaned_data["html"]
                 url = form.cleaned_data["url"]
                 preset_name = form.cleaned_data["preset_name"]
-                check_result = html_checker.check(preset_name=preset_name, html=html, url=url)
+                parser_backend = form.cleaned_data["parser_backend"]
+                check_result = html_checker.check(
+                    preset_name=preset_name,
+                    html=html,
+                    url=url,
+                    parser_backend=parser_backend,
+                )
                 content = {
                     "check_result": check_result,
+                    "lazy_url": get_lazy_url(check_result),
                 }
                 return render(request, self.result_template_name, content)
-            except RequestException as e:
+            except (RequestException, ResponseRejected) as e:
                 message = f"Не удалось загрузить сайт: {e}"
                 form.add_error(None, str(message))
             except HtmlTagNotFound as e:
@@ -51,6 +111,180 @@ class CheckFormView(LoginRequiredMixin, View):
         return render(request, self.template_name, content)
 
 
+class AsyncCheckFormView(View):
+    """Проверка форм без блокировки воркера на загрузке сайта, работает через atlas/asgi.py"""
+
+    template_name = CheckFormView.template_name
+    result_template_name = CheckFormView.result_template_name
+
+    async def dispatch(self, request, *args, **kwargs):
+        # LoginRequiredMixin проверяет пользователя синхронно, в async view это запрос к бд из цикла событий
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request):
+        form = CheckFormsByUrlForm()
+        content = {
+            "form": form,
+        }
+        return await sync_to_async(render)(request, self.template_name, content)
+
+    async def post(self, request):
+        form = CheckFormsByUrlForm(request.POST)
+        if form.is_valid():
+            try:
+                check_result = await html_checker.acheck(
+                    preset_name=form.cleaned_data["preset_name"],
+                    html=form.cleaned_data["html"],
+                    url=form.cleaned_data["url"],
+                    parser_backend=form.cleaned_data["parser_backend"],
+                )
+                content = {
+                    "check_result": check_result,
+                    "lazy_url": get_lazy_url(check_result),
+                }
+                return await sync_to_async(render)(request, self.result_template_name, content)
+            except (httpx.HTTPError, ResponseRejected) as e:
+                message = f"Не удалось загрузить сайт: {e}"
+                form.add_error(None, str(message))
+            except HtmlTagNotFound as e:
+                form.add_error(None, str(e))
+        content = {
+            "form": form,
+        }
+        return await sync_to_async(render)(request, self.template_name, content)
+
+
+class CheckResultNodeView(LoginRequiredMixin, View):
+    """Содержимое свернутого тэга из сохраненного результата проверки, запрашивается при его раскрытии"""
+
+    def get(self, request, cache_key):
+        check_result = html_checker.get_cached_result(cache_key)
+        if check_result is None:
+            raise Http404("Результат проверки не найден в кэше")
+        path = request.GET.get("path", "")
+        try:
+            tag = get_tag_by_path(check_result.preset, path)
+        except (KeyError, IndexError, ValueError) as e:
+            raise Http404("Тэг не найден") from e
+        lazy_url = reverse("form_checker:check_result_node", args=[cache_key])
+        return HttpResponse(render_tag_tree(tag, lazy_url=lazy_url, path=path, body_only=True))
+
+
+class CheckResultJsonView(APIView):
+    """Результат проверки в JSON, дерево отдается по частям без сборки в словари"""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        compact = serializer.validated_data.pop("compact")
+        try:
+            check_result = html_checker.check(**serializer.validated_data)
+        except (RequestException, ResponseRejected) as e:
+            return Response({"detail": f"Не удалось загрузить сайт: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        except HtmlTagNotFound as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return StreamingHttpResponse(check_result.iter_json(compact=compact), content_type="application/json")
+
+
+class BulkCheckView(APIView):
+    """Проверка списка url пресетами, результаты отдаются в формате JSON Lines по мере готовности"""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # общий пул процессов проверки, без CHECK_PROCESS_POOL_WORKERS проверка идет в потоках процесса
+        results = iter_check_urls(executor=html_checker.executor, **serializer.validated_data)
+        lines = (json.dumps(result.to_dict(), ensure_ascii=False) + "\n" for result in results)
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+
+class CheckJobView(LoginRequiredMixin, View):
+    """Страница фоновой проверки: ожидание обработчика, затем результат или ошибка"""
+
+    template_name = "form_checker/check_job.html"
+
+    def get(self, request, pk):
+        job = get_object_or_404(CheckJob.objects.defer("html"), pk=pk)
+        if job.status == CheckJob.DONE:
+            # результат лежит в задаче, а не в кэше этого процесса, поэтому отрисовывается целиком
+            content = {"check_result": load_result(job), "lazy_url": None}
+            return render(request, CheckFormView.result_template_name, content)
+        content = {
+            "job": job,
+            "events_url": reverse("form_checker:check_job_events", args=[job.pk]),
+            "status_url": reverse("form_checker:check_job_status", args=[job.pk]),
+        }
+        return render(request, self.template_name, content)
+
+
+class CheckJobCreateView(APIView):
+    """Постановка проверки в очередь, сразу возвращает id задачи и адреса для получения результата"""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CheckJobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = submit_job(**serializer.validated_data)
+        return Response(
+            {
+                "id": job.pk,
+                "status": job.status,
+                "status_url": reverse("form_checker:check_job_status", args=[job.pk]),
+                "events_url": reverse("form_checker:check_job_events", args=[job.pk]),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class CheckJobStatusView(APIView):
+    """Статус задачи, после успешного завершения в ключе result - результат проверки"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = get_object_or_404(CheckJob.objects.defer("html"), pk=pk)
+        compact = request.query_params.get("compact") in ("1", "true")
+        return StreamingHttpResponse(iter_job_json(job, compact=compact), content_type="application/json")
+
+
+class CheckJobEventsView(LoginRequiredMixin, View):
+    """Статус и результат задачи в виде server-sent events. Обычный View: DRF отвечает 406 на text/event-stream"""
+
+    raise_exception = True
+
+    def get(self, request, pk):
+        get_object_or_404(CheckJob.objects.only("id"), pk=pk)
+        events = job_event_streams.open(
+            job_id=pk,
+            with_result=request.GET.get("result") != "0",
+            compact=request.GET.get("compact") in ("1", "true"),
+        )
+        if events is None:
+            # EventSource не переподключается после ответа не 200, клиент переходит на опрос status_url
+            response = JsonResponse(
+                {
+                    "detail": "Слишком много потоков событий, опрашивайте статус задачи",
+                    "status_url": reverse("form_checker:check_job_status", args=[pk]),
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "5"
+            return response
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # nginx не должен буферизовать поток событий
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
 def test(request):
     with open('test.html') as file:
         html = file.read()
@@ -0,0 +1,47 @@
+from typing import Any
+
+from .base import DetachedElement, Element, ParserBackend
+from .beautifulsoup import BeautifulSoupBackend
+from .detached import DetachedBackend
+from .lxml_html import LxmlBackend
+
+__all__ = [
+    "DEFAULT_PARSER_BACKEND",
+    "PARSER_BACKENDS",
+    "DETACHED_BACKEND",
+    "BeautifulSoupBackend",
+    "DetachedBackend",
+    "DetachedElement",
+    "Element",
+    "LxmlBackend",
+    "ParserBackend",
+    "get_backend",
+    "get_backend_for",
+]
+
+DEFAULT_PARSER_BACKEND = "bs4"
+
+PARSER_BACKENDS: dict[str, ParserBackend] = {
+    backend.name: backend
+    for backend in (
+        BeautifulSoupBackend(),
+        LxmlBackend(),
+    )
+}
+
+# не выбирается для разбора html, используется для сохраненных результатов проверки
+DETACHED_BACKEND = DetachedBackend()
+
+
+def get_backend(name: str) -> ParserBackend:
+    try:
+        return PARSER_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f'Unknown parser backend "{name}", expected one of {list(PARSER_BACKENDS)}') from None
+
+
+def get_backend_for(elem: Any) -> ParserBackend:  # noqa: ANN401
+    for backend in (*PARSER_BACKENDS.values(), DETACHED_BACKEND):
+        if backend.is_element(elem):
+            return backend
+    raise TypeError(f"Expected bs4.Tag or lxml.html.HtmlElement, got {type(elem)}")
@@ -0,0 +1,76 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from typing import Any
+
+# bs4.Tag или lxml.html.HtmlElement, в зависимости от бэкенда
+Element = Any
+
+
+class DetachedElement:
+    """Снимок элемента без ссылок на дерево документа, чтобы результат проверки можно было сохранить"""
+
+    __slots__ = ("name", "attrs")
+
+    def __init__(self, name: str, attrs: dict[str, str | list[str]]):
+        self.name = name
+        self.attrs = attrs
+
+    def __repr__(self):
+        return f"<DetachedElement:{self.name}>"
+
+
+class ParserBackend(ABC):
+    """Разбор html и доступ к элементам дерева, с которыми работают TagChecker"""
+
+    name = None
+
+    @abstractmethod
+    def parse(self, html: str) -> Element | None:
+        """Корневой тег <html> документа или None"""
+
+    @abstractmethod
+    def is_element(self, obj: Any) -> bool:  # noqa: ANN401
+        ...
+
+    @abstractmethod
+    def get_tag_name(self, elem: Element) -> str: ...
+
+    @abstractmethod
+    def get_attribute(self, elem: Element, name: str) -> str | None:
+        """Значение атрибута, многозначные атрибуты (class, rel...) склеиваются через пробел"""
+
+    @abstractmethod
+    def get_attributes(self, elem: Element) -> dict[str, str | list[str]]: ...
+
+    @abstractmethod
+    def get_classes(self, elem: Element) -> list[str]: ...
+
+    @abstractmethod
+    def get_text(self, elem: Element) -> str: ...
+
+    @abstractmethod
+    def get_parent(self, elem: Element) -> Element | None: ...
+
+    @abstractmethod
+    def get_outer_html(self, elem: Element) -> str:
+        """Разметка элемента вместе с потомками, по ней сравнивается содержимое элемента между проверками"""
+
+    @abstractmethod
+    def iter_elements(self, elem: Element) -> Iterator[Element]:
+        """Сам elem и все его потомки-элементы в порядке документа"""
+
+    @abstractmethod
+    def select(self, elem: Element, selector: str) -> list[Element]:
+        """Потомки elem, подходящие под css селектор, в порядке документа"""
+
+    def select_one(self, elem: Element, selector: str) -> Element | None:
+        elements = self.select(elem=elem, selector=selector)
+        return elements[0] if elements else None
+
+    def detach(self, elem: Element) -> DetachedElement:
+        """Снимок имени и атрибутов элемента, который можно сериализовать отдельно от документа"""
+        attrs = {
+            name: list(value) if isinstance(value, list) else value
+            for name, value in self.get_attributes(elem).items()
+        }
+        return DetachedElement(name=self.get_tag_name(elem), attrs=attrs)
@@ -0,0 +1,56 @@
+from collections.abc import Iterator
+from typing import Any
+
+from bs4 import BeautifulSoup, Tag
+
+from .base import ParserBackend
+
+
+class BeautifulSoupBackend(ParserBackend):
+    name = "bs4"
+
+    def parse(self, html: str) -> Tag | None:
+        return BeautifulSoup(html, "lxml").find("html")
+
+    def is_element(self, obj: Any) -> bool:  # noqa: ANN401
+        return isinstance(obj, Tag)
+
+    def get_tag_name(self, elem: Tag) -> str:
+        return elem.name
+
+    def get_attribute(self, elem: Tag, name: str) -> str | None:
+        value = elem.get(name)
+        if isinstance(value, list):
+            value = " ".join(value)
+        return value
+
+    def get_attributes(self, elem: Tag) -> dict[str, str | list[str]]:
+        return elem.attrs
+
+    def get_classes(self, elem: Tag) -> list[str]:
+        classes = elem.get("class", [])
+        if isinstance(classes, str):
+            classes = classes.split()
+        return classes
+
+    def get_text(self, elem: Tag) -> str:
+        return elem.text
+
+    def get_parent(self, elem: Tag) -> Tag | None:
+        return elem.parent
+
+    def get_outer_html(self, elem: Tag) -> str:
+        # без экранирования текста: str(elem) в несколько раз медленнее
+        return elem.decode(formatter=None)
+
+    def iter_elements(self, elem: Tag) -> Iterator[Tag]:
+        yield elem
+        for node in elem.descendants:
+            if isinstance(node, Tag):
+                yield node
+
+    def select(self, elem: Tag, selector: str) -> list[Tag]:
+        return elem.select(selector)
+
+    def select_one(self, elem: Tag, selector: str) -> Tag | None:
+        return elem.select_one(selector)
@@ -0,0 +1,57 @@
+from collections.abc import Iterator
+from html import escape
+from typing import Any
+
+from .base import DetachedElement, ParserBackend
+
+
+class DetachedBackend(ParserBackend):
+    """Элементы без документа: только имя тега и атрибуты, остаются после сериализации результата проверки"""
+
+    name = "detached"
+
+    def parse(self, html: str) -> None:
+        raise NotImplementedError("Detached backend can't parse html")
+
+    def is_element(self, obj: Any) -> bool:  # noqa: ANN401
+        return isinstance(obj, DetachedElement)
+
+    def get_tag_name(self, elem: DetachedElement) -> str:
+        return elem.name
+
+    def get_attribute(self, elem: DetachedElement, name: str) -> str | None:
+        value = elem.attrs.get(name)
+        if isinstance(value, list):
+            value = " ".join(value)
+        return value
+
+    def get_attributes(self, elem: DetachedElement) -> dict[str, str | list[str]]:
+        return elem.attrs
+
+    def get_classes(self, elem: DetachedElement) -> list[str]:
+        classes = elem.attrs.get("class", [])
+        if isinstance(classes, str):
+            classes = classes.split()
+        return classes
+
+    def get_text(self, elem: DetachedElement) -> str:  # noqa: ARG002
+        return ""
+
+    def get_parent(self, elem: DetachedElement) -> None:  # noqa: ARG002
+        return None
+
+    def get_outer_html(self, elem: DetachedElement) -> str:
+        """Только открывающий тег: содержимого у снимка нет"""
+        attrs = "".join(
+            f' {name}="{escape(self.get_attribute(elem, name), quote=True)}"' for name in sorted(elem.attrs)
+        )
+        return f"<{elem.name}{attrs}>"
+
+    def iter_elements(self, elem: DetachedElement) -> Iterator[DetachedElement]:
+        yield elem
+
+    def select(self, elem: DetachedElement, selector: str) -> list[DetachedElement]:  # noqa: ARG002
+        return []
+
+    def detach(self, elem: DetachedElement) -> DetachedElement:
+        return elem
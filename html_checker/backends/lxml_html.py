@@ -0,0 +1,107 @@
+from collections.abc import Callable, Iterator
+from functools import cache
+from typing import Any
+
+import lxml.html
+from lxml import etree
+
+from ..selector import compile_selector
+from .base import ParserBackend
+
+try:
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+# Атрибуты, которые bs4 разбивает на список значений, чтобы оба бэкенда отдавали одинаковые значения
+MULTI_VALUED_ATTRIBUTES = {
+    "*": {"class", "accesskey", "dropzone"},
+    "a": {"rel", "rev"},
+    "link": {"rel", "rev"},
+    "td": {"headers"},
+    "th": {"headers"},
+    "form": {"accept-charset"},
+    "object": {"archive"},
+    "area": {"rel"},
+    "icon": {"sizes"},
+    "iframe": {"sandbox"},
+    "output": {"for"},
+}
+
+# Строки внутри этих тегов bs4 не включает в .text родительских элементов
+STRING_CONTAINER_TAGS = ("script", "style", "template", "rt", "rp")
+TEXT_XPATH = etree.XPath(
+    "descendant::text()[not({})]".format(" or ".join(f"ancestor::{tag}" for tag in STRING_CONTAINER_TAGS)),
+)
+
+
+def _is_multi_valued(tag_name: str, attribute_name: str) -> bool:
+    return attribute_name in MULTI_VALUED_ATTRIBUTES["*"] or attribute_name in MULTI_VALUED_ATTRIBUTES.get(
+        tag_name,
+        (),
+    )
+
+
+@cache
+def _compile_css(selector: str) -> Callable[[lxml.html.HtmlElement], list]:
+    if CSSSelector is None:
+        raise ImportError(f'Selector "{selector}" requires the cssselect package for lxml backend')
+    return CSSSelector(selector, translator="html")
+
+
+class LxmlBackend(ParserBackend):
+    """Работа напрямую с деревом lxml.html, без построения дерева BeautifulSoup"""
+
+    name = "lxml"
+
+    def parse(self, html: str) -> lxml.html.HtmlElement | None:
+        parser = lxml.html.HTMLParser(encoding="utf-8")
+        try:
+            document = lxml.html.document_fromstring(html.encode("utf-8"), parser=parser)
+        except etree.ParserError:
+            return None
+        return document if document.tag == "html" else None
+
+    def is_element(self, obj: Any) -> bool:  # noqa: ANN401
+        return isinstance(obj, lxml.html.HtmlElement)
+
+    def get_tag_name(self, elem: lxml.html.HtmlElement) -> str:
+        return elem.tag
+
+    def get_attribute(self, elem: lxml.html.HtmlElement, name: str) -> str | None:
+        value = elem.get(name)
+        if value is not None and _is_multi_valued(tag_name=elem.tag, attribute_name=name):
+            value = " ".join(value.split())
+        return value
+
+    def get_attributes(self, elem: lxml.html.HtmlElement) -> dict[str, str | list[str]]:
+        return {
+            name: value.split() if _is_multi_valued(tag_name=elem.tag, attribute_name=name) else value
+            for name, value in elem.attrib.items()
+        }
+
+    def get_classes(self, elem: lxml.html.HtmlElement) -> list[str]:
+        return (elem.get("class") or "").split()
+
+    def get_text(self, elem: lxml.html.HtmlElement) -> str:
+        if elem.tag in STRING_CONTAINER_TAGS:
+            return elem.text_content()
+        return "".join(TEXT_XPATH(elem))
+
+    def get_parent(self, elem: lxml.html.HtmlElement) -> lxml.html.HtmlElement | None:
+        return elem.getparent()
+
+    def get_outer_html(self, elem: lxml.html.HtmlElement) -> str:
+        return etree.tostring(elem, encoding="unicode", with_tail=False)
+
+    def iter_elements(self, elem: lxml.html.HtmlElement) -> Iterator[lxml.html.HtmlElement]:
+        return elem.iter(etree.Element)
+
+    def select(self, elem: lxml.html.HtmlElement, selector: str) -> list[lxml.html.HtmlElement]:
+        compiled = compile_selector(selector)
+        if compiled is None:
+            return [match for match in _compile_css(selector)(elem) if match is not elem]
+        candidates = elem.iterdescendants(compiled.tag_name) if compiled.tag_name else elem.iterdescendants()
+        return [
+            candidate for candidate in candidates if self.is_element(candidate) and compiled.match(candidate, self)
+        ]
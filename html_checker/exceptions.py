@@ -6,6 +6,9 @@ class ValidationError(Exception):
         self.message = message
         self.level = level
 
+    def __reduce__(self):
+        return self.__class__, (self.message, self.level)
+
     def __repr__(self):
         return f"ValidationError(message='{self.message}', level={self.level}"
 
@@ -14,3 +17,26 @@ class ValidationError(Exception):
             "message": str(self.message),
             "level": str(self.level),
         }
+
+
+class ErrorDetail:
+    """Найденная ошибка в дереве результата: только сообщение и уровень, без трейсбека исключения"""
+
+    __slots__ = ("message", "level")
+
+    def __init__(self, message: str, level: ErrorLevel = ERROR):
+        self.message = message
+        self.level = level
+
+    @classmethod
+    def from_error(cls, error: ValidationError) -> "ErrorDetail":
+        return cls(message=error.message, level=error.level)
+
+    def __repr__(self):
+        return f"ErrorDetail(message='{self.message}', level={self.level})"
+
+    def to_detail(self) -> dict:
+        return {
+            "message": str(self.message),
+            "level": str(self.level),
+        }
@@ -0,0 +1,184 @@
+import hashlib
+import json
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from .exceptions import ValidationError
+from .levels import ErrorLevel
+from .tag import NON_FIELD_ERROR, ListTagChecker, TagChecker
+
+PATH_SEPARATOR = "/"
+
+
+def iter_tag_paths(tag: TagChecker, path: str = "") -> Iterator[tuple[str, TagChecker]]:
+    """Тэг и все вложенные тэги с путями из имен полей и номеров элементов списков: "form/0/email".
+
+    Порядок тот же, что у TagChecker.iter_tags.
+    """
+    stack = [(path, tag)]
+    while stack:
+        path, tag = stack.pop()
+        yield path, tag
+        prefix = f"{path}{PATH_SEPARATOR}" if path else ""
+        nested = []
+        for key, child in tag.childrens.items():
+            if isinstance(child, ListTagChecker):
+                nested.extend(
+                    (f"{prefix}{key}{PATH_SEPARATOR}{number}", item) for number, item in enumerate(child.tags_items)
+                )
+            else:
+                nested.append((f"{prefix}{key}", child))
+        stack.extend(reversed(nested))
+
+
+class DiffError(NamedTuple):
+    path_name: str
+    attribute: str
+    level: str
+    message: str
+
+
+@dataclass
+class NodeState:
+    """Отпечатки поддеревьев и собственные ошибки тэгов одной проверки, сохраняются вместе с ее результатом"""
+
+    # путь поддерева -> отпечаток его html
+    fingerprints: dict[str, str] = field(default_factory=dict)
+    # путь тэга -> (path_name, [(ключ атрибута, имя атрибута, уровень, сообщение)]), ошибки тэга с пустым атрибутом
+    errors: dict[str, tuple[str, list[tuple[str, str, str, str]]]] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps({"fingerprints": self.fingerprints, "errors": self.errors}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "NodeState":
+        state = json.loads(data)
+        return cls(fingerprints=state["fingerprints"], errors=state["errors"])
+
+    def iter_errors(self) -> Iterator[DiffError]:
+        for path_name, errors in self.errors.values():
+            for _, attribute_name, level, message in errors:
+                yield DiffError(path_name=path_name, attribute=attribute_name, level=level, message=message)
+
+
+def _get_fingerprint(version: str, backend_name: str, path: str, html: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (version, backend_name, path, html):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class NodeTracker:
+    """Пути и отпечатки тэгов дерева проверки, считаются после fill() и до валидации"""
+
+    __slots__ = ("preset", "tags", "indexes", "sizes", "fingerprints")
+
+    def __init__(self, preset: TagChecker, version: str):
+        self.preset = preset
+        # тэги в порядке iter_tags, поддерево тэга с номером i - tags[i:i + sizes[i]]
+        self.tags = list(iter_tag_paths(preset))
+        self.indexes = {id(tag): index for index, (_, tag) in enumerate(self.tags)}
+        self.sizes = [1] * len(self.tags)
+        incremental = [tag.INCREMENTAL for _, tag in self.tags]
+        for index in range(len(self.tags) - 1, 0, -1):
+            parent = self.indexes[id(self.tags[index][1].root)]
+            self.sizes[parent] += self.sizes[index]
+            incremental[parent] = incremental[parent] and incremental[index]
+        # отпечатки только у найденных тэгов с вложенными тэгами, проверка листьев дешевле сравнения
+        self.fingerprints: dict[str, str] = {}
+        backend = preset.backend
+        for index, (path, tag) in enumerate(self.tags):
+            if index and incremental[index] and tag.elem is not None and tag.childrens:
+                html = backend.get_outer_html(tag.elem)
+                self.fingerprints[path] = _get_fingerprint(version, backend.name, path, html)
+
+    def get_state(self) -> NodeState:
+        """Состояние после валидации"""
+        errors = {}
+        for path, tag in self.tags:
+            tag_errors = [
+                ("", "", error.level.level, str(error.message)) for error in tag.errors.get(NON_FIELD_ERROR, ())
+            ]
+            for key, attribute in tag.attributes.items():
+                tag_errors.extend(
+                    (key, attribute.name, error.level.level, str(error.message)) for error in attribute.errors
+                )
+            if tag_errors:
+                errors[path] = (tag.path_name, tag_errors)
+        return NodeState(fingerprints=self.fingerprints, errors=errors)
+
+
+class PreviousCheck:
+    """Прошлая проверка страницы, из которой берутся ошибки поддеревьев с прежним отпечатком"""
+
+    __slots__ = ("state", "tracker", "reused")
+
+    def __init__(self, state: NodeState, tracker: NodeTracker):
+        self.state = state
+        self.tracker = tracker
+        # пути поддеревьев, ошибки которых взяты из прошлой проверки
+        self.reused: list[str] = []
+
+    def restore(self, field: object) -> bool:
+        """Восстановить ошибки поддерева field вместо валидации, False - поддерево нужно проверить заново"""
+        index = self.tracker.indexes.get(id(field))
+        if index is None:
+            return False
+        path = self.tracker.tags[index][0]
+        fingerprint = self.tracker.fingerprints.get(path)
+        if fingerprint is None or self.state.fingerprints.get(path) != fingerprint:
+            return False
+        tags = self.tracker.tags[index : index + self.tracker.sizes[index]]
+        for tag_path, tag in tags:
+            state = self.state.errors.get(tag_path)
+            if state is None:
+                continue
+            for key, _, level, message in state[1]:
+                error = ValidationError(message=message, level=ErrorLevel(level))
+                if key:
+                    tag.attributes[key].add_error(error)
+                else:
+                    tag.add_error(error)
+        # ошибки полей связываются снизу вверх, как при обычной валидации
+        for _, tag in reversed(tags):
+            if tag.childrens or tag.has_errors():
+                tag._collect_fields_errors()
+        self.reused.append(path)
+        return True
+
+
+@dataclass
+class CheckDiff:
+    """Разница ошибок двух проверок страницы, ошибки сравниваются по path_name, атрибуту, уровню и сообщению"""
+
+    new: list[DiffError]
+    fixed: list[DiffError]
+    unchanged: list[DiffError]
+
+    def to_dict(self) -> dict:
+        return {
+            "new": [error._asdict() for error in self.new],
+            "fixed": [error._asdict() for error in self.fixed],
+            "unchanged": [error._asdict() for error in self.unchanged],
+        }
+
+
+def diff_states(previous: NodeState, current: NodeState) -> CheckDiff:
+    previous_errors = list(previous.iter_errors())
+    remaining = Counter(previous_errors)
+    new, unchanged = [], []
+    for error in current.iter_errors():
+        if remaining[error]:
+            remaining[error] -= 1
+            unchanged.append(error)
+        else:
+            new.append(error)
+    fixed = []
+    for error in previous_errors:
+        if remaining[error]:
+            remaining[error] -= 1
+            fixed.append(error)
+    return CheckDiff(new=new, fixed=fixed, unchanged=unchanged)
@@ -0,0 +1,150 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from .backends import Element, ParserBackend, get_backend_for
+from .selector import SimpleSelector, compile_selector
+
+# function name(...), а также const name = function(...), const name = function other(...) и const name = (...) => ...
+# Ветки начинаются с набора символов [fclv], так re пропускает неподходящие позиции намного быстрее, чем с (?:a|b)
+JS_FUNCTION_RE = re.compile(
+    r"[fclv](?:"
+    r"(?<=f)unction[\t ]+(?P<declaration>[\w$]+)[\t ]*\("
+    r"|(?:(?<=c)onst|(?<=l)et|(?<=v)ar)[\t ]+(?P<expression>[\w$]+)[\t ]*=[\t ]*(?:async[\t ]+)?"
+    r"(?:function\b(?:[\t ]+(?P<named>[\w$]+)[\t ]*\()?|\([^()]*\)[\t ]*=>|[\w$]+[\t ]*=>))",
+)
+JS_FUNCTION_MARKERS = ("function", "=>")
+
+
+def find_js_functions(text: str) -> set[str]:
+    """Имена всех функций, объявленных в тексте скрипта. У именованного функционального выражения
+    (const name = function other(...)) - оба имени
+    """
+    if not any(marker in text for marker in JS_FUNCTION_MARKERS):
+        return set()
+    names = set()
+    for match in JS_FUNCTION_RE.finditer(text):
+        names.add(match.group("declaration") or match.group("expression"))
+        if match.group("named"):
+            names.add(match.group("named"))
+    return names
+
+
+def _index_key(value: str) -> str:
+    # селектор [attr=value] совпадает и со значением "value\n", храним их под одним ключом
+    return value.removesuffix("\n")
+
+
+class DocumentIndex:
+    """Индекс элементов документа по имени тега, атрибутам name, id и классам.
+
+    Строится один раз при первом запросе. Каждому элементу присваивается номер в порядке документа,
+    поэтому поиск внутри поддерева сводится к поиску номеров в диапазоне (начало, конец поддерева).
+    """
+
+    def __init__(self, root: Element, backend: ParserBackend | None = None):
+        self.root = root
+        self.backend = backend if backend is not None else get_backend_for(root)
+        self._is_built = False
+        self._elements: list[Element] = []
+        self._subtree_ends: list[int] = []
+        self._positions: dict[int, int] = {}
+        self._by_tag_name: dict[str, list[int]] = defaultdict(list)
+        self._by_name: dict[str, list[int]] = defaultdict(list)
+        self._by_id: dict[str, list[int]] = defaultdict(list)
+        self._by_class: dict[str, list[int]] = defaultdict(list)
+        self._js_functions: dict[str, list[int]] | None = None
+
+    def __len__(self) -> int:
+        self._build()
+        return len(self._elements)
+
+    def _build(self) -> None:
+        if self._is_built:
+            return
+        open_elements: list[Element] = []
+        for elem in self.backend.iter_elements(self.root):
+            position = len(self._elements)
+            parent = self.backend.get_parent(elem)
+            while open_elements and open_elements[-1] is not parent:
+                self._subtree_ends[self._positions[id(open_elements.pop())]] = position
+            open_elements.append(elem)
+            self._add(elem=elem, position=position)
+        for elem in open_elements:
+            self._subtree_ends[self._positions[id(elem)]] = len(self._elements)
+        self._is_built = True
+
+    def _add(self, elem: Element, position: int) -> None:
+        self._elements.append(elem)
+        self._subtree_ends.append(position + 1)
+        self._positions[id(elem)] = position
+        self._by_tag_name[self.backend.get_tag_name(elem)].append(position)
+        if (name := self.backend.get_attribute(elem, "name")) is not None:
+            self._by_name[_index_key(name)].append(position)
+        if (elem_id := self.backend.get_attribute(elem, "id")) is not None:
+            self._by_id[_index_key(elem_id)].append(position)
+        for class_name in set(self.backend.get_classes(elem)):
+            self._by_class[class_name].append(position)
+
+    def _get_candidates(self, compiled: SimpleSelector) -> list[int] | range:
+        if compiled.ids:
+            return self._by_id.get(compiled.ids[0], [])
+        for attribute_name, expected in compiled.attributes:
+            if attribute_name == "name" and expected is not None:
+                return self._by_name.get(expected, [])
+        if compiled.classes:
+            return self._by_class.get(compiled.classes[0], [])
+        if compiled.tag_name is not None:
+            return self._by_tag_name.get(compiled.tag_name, [])
+        return range(len(self._elements))
+
+    def get_position(self, elem: Element) -> int | None:
+        """Номер элемента в порядке документа, None если элемент не из этого документа"""
+        self._build()
+        position = self._positions.get(id(elem))
+        if position is None or self._elements[position] is not elem:
+            return None
+        return position
+
+    def _in_scope(self, positions: list[int] | range, scope_position: int) -> list[int] | range:
+        start = bisect_right(positions, scope_position)
+        end = bisect_left(positions, self._subtree_ends[scope_position], lo=start)
+        return positions[start:end]
+
+    def _get_js_functions(self) -> dict[str, list[int]]:
+        if self._js_functions is None:
+            self._js_functions = defaultdict(list)
+            for position in self._by_tag_name.get("script", []):
+                for name in find_js_functions(self.backend.get_text(self._elements[position])):
+                    self._js_functions[name].append(position)
+        return self._js_functions
+
+    def find_script_with_js_function(self, js_function_name: str, scope: Element) -> Element | None:
+        """Первый тег script внутри scope, в котором объявлена функция js_function_name.
+
+        Все скрипты документа разбираются один раз, дальше это поиск по словарю.
+        """
+        scope_position = self.get_position(scope)
+        if scope_position is None:
+            scripts = self.backend.select(scope, "script")
+            return next(
+                (script for script in scripts if js_function_name in find_js_functions(self.backend.get_text(script))),
+                None,
+            )
+        positions = self._in_scope(self._get_js_functions().get(js_function_name, []), scope_position)
+        return self._elements[positions[0]] if positions else None
+
+    def select(self, selector: str, scope: Element) -> list[Element] | None:
+        """Потомки scope, подходящие под selector, в порядке документа.
+
+        None, если селектор не простой или scope не входит в документ, тогда поиск нужно делать через soupsieve.
+        """
+        compiled = compile_selector(selector)
+        if compiled is None:
+            return None
+        scope_position = self.get_position(scope)
+        if scope_position is None:
+            return None
+        candidates = self._in_scope(self._get_candidates(compiled=compiled), scope_position)
+        elements = (self._elements[position] for position in candidates)
+        return [elem for elem in elements if compiled.match(elem, self.backend)]
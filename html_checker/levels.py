@@ -2,24 +2,38 @@ from typing import Union
 
 
 class ErrorLevel:
+    """Уровень ошибки, на каждое имя уровня создается один экземпляр: ErrorLevel("danger") is ERROR"""
+
     PRIORITY = {
         "success": 0,
         "info": 1,
         "warning": 2,
         "danger": 3,
     }
+    _instances: dict[str, "ErrorLevel"] = {}
+
+    __slots__ = ("level", "priority")
 
-    def __init__(self, level: str):
-        self.level = level
+    def __new__(cls, level: str):
+        instance = cls._instances.get(level)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.level = level
+            instance.priority = cls.PRIORITY[level]
+            cls._instances[level] = instance
+        return instance
+
+    def __reduce__(self):
+        return self.__class__, (self.level,)
 
     def __int__(self):
-        return self.PRIORITY[self.level]
+        return self.priority
 
     def __lt__(self, other: Union['ErrorLevel', int]):
-        return int(self) < int(other)
+        return self.priority < int(other)
 
     def __eq__(self, other: Union['ErrorLevel', int]):
-        return int(self) == int(other)
+        return self.priority == int(other)
 
     def __hash__(self):
         return hash(self.level)
@@ -32,4 +46,7 @@ WARNING = ErrorLevel("warning")
 ERROR = ErrorLevel("danger")
 INFO = ErrorLevel("info")
 
+# все уровни в порядке возрастания, номер уровня в кортеже совпадает с int(level)
+LEVELS = (SUCCESS, INFO, WARNING, ERROR)
+
 
@@ -0,0 +1,144 @@
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from .tag import TagChecker
+
+# профиль текущей проверки, None - профилирование выключено и точки замера в тэгах ничего не делают
+_current_profile: ContextVar[Union["CheckProfile", None]] = ContextVar("check_profile", default=None)
+
+
+class TimingStat:
+    """Суммарное время вызовов и количество найденных элементов или ошибок"""
+
+    __slots__ = ("calls", "seconds", "items")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.items = 0
+
+    def add(self, seconds: float, items: int = 0) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.items += items
+
+    def merge(self, other: "TimingStat") -> None:
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.items += other.items
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "seconds": self.seconds, "items": self.items}
+
+
+class CheckProfile:
+    """Время этапов проверки, поиска элементов полей и проверок тэгов, счетчики и попытки загрузки страницы.
+
+    Профиль можно передать из процесса пула вместе с результатом проверки.
+    details=False - только этапы и счетчики, точки замера в тэгах и загрузке страницы его не видят.
+    """
+
+    __slots__ = ("details", "phases", "selectors", "validators", "counts", "requests")
+
+    def __init__(self, details: bool = True):
+        self.details = details
+        # этапы в порядке выполнения, повторный замер этапа прибавляется к прошлому
+        self.phases: dict[str, float] = {}
+        # поиск элемента поля, ключ - <класс тэга>.<поле>, items - найдено элементов
+        self.selectors: dict[str, TimingStat] = {}
+        # validate и validate_<поле> тэгов, ключ - <класс тэга>.<метод>, items - добавлено ошибок
+        self.validators: dict[str, TimingStat] = {}
+        self.counts: dict[str, int] = {}
+        # попытки загрузки страницы: адрес, код ответа, размер, время, ошибка
+        self.requests: list[dict] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started_at)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_selector(self, name: str, seconds: float, matched: int) -> None:
+        stat = self.selectors.get(name)
+        if stat is None:
+            stat = self.selectors[name] = TimingStat()
+        stat.add(seconds, matched)
+
+    @contextmanager
+    def validator(self, name: str, tag: "TagChecker") -> Iterator[None]:
+        """Время проверки и количество ошибок, которые она добавила тэгу или его полям"""
+        errors_count = tag.get_errors_count()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            stat = self.validators.get(name)
+            if stat is None:
+                stat = self.validators[name] = TimingStat()
+            stat.add(time.perf_counter() - started_at, tag.get_errors_count() - errors_count)
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def merge(self, other: "CheckProfile") -> None:
+        """Добавить замеры другого профиля, например профиля проверки из процесса пула"""
+        for name, seconds in other.phases.items():
+            self.add_phase(name, seconds)
+        for stats, other_stats in ((self.selectors, other.selectors), (self.validators, other.validators)):
+            for name, other_stat in other_stats.items():
+                stats.setdefault(name, TimingStat()).merge(other_stat)
+        for name, value in other.counts.items():
+            self.count(name, value)
+        self.requests.extend(other.requests)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def format_phases(self) -> str:
+        """Этапы для строки лога: parse=12.3ms fill=4.5ms"""
+        return " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.phases.items())
+
+    def get_slowest_selectors(self, limit: int = 10) -> list[tuple[str, TimingStat]]:
+        return sorted(self.selectors.items(), key=lambda item: item[1].seconds, reverse=True)[:limit]
+
+    def get_slowest_validators(self, limit: int = 10) -> list[tuple[str, TimingStat]]:
+        return sorted(self.validators.items(), key=lambda item: item[1].seconds, reverse=True)[:limit]
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "phases": dict(self.phases),
+            "selectors": {name: stat.to_dict() for name, stat in self.selectors.items()},
+            "validators": {name: stat.to_dict() for name, stat in self.validators.items()},
+            "counts": dict(self.counts),
+            "requests": list(self.requests),
+        }
+
+
+def get_current_profile() -> CheckProfile | None:
+    return _current_profile.get()
+
+
+@contextmanager
+def profiling(profile: CheckProfile | None) -> Iterator[CheckProfile | None]:
+    """Сделать profile текущим для точек замера в потоке или задаче, None - выключить профилирование"""
+    token = _current_profile.set(profile if profile is not None and profile.details else None)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def measure_phase(profile: CheckProfile | None, name: str) -> AbstractContextManager:
+    """Замер этапа в профиле, без профиля - пустой контекст"""
+    return profile.phase(name) if profile is not None else nullcontext()
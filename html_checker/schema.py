@@ -0,0 +1,109 @@
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field
+from functools import cache, cached_property
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from .tag import ListTagChecker, TagChecker
+    from .tag_attribut import HtmlTagAttribute
+
+ATTRIBUTE = "attribute"
+TAG = "tag"
+LIST = "list"
+
+
+@cache
+def get_slot_names(klass: type) -> tuple[str, ...]:
+    """Имена слотов класса вместе со слотами родителей"""
+    return tuple(
+        name
+        for base in reversed(klass.__mro__)
+        for name in base.__dict__.get("__slots__", ())
+        if name not in ("__dict__", "__weakref__")
+    )
+
+
+@dataclass(frozen=True)
+class FieldSchema:
+    name: str
+    kind: str
+    declaration: Union["HtmlTagAttribute", "TagChecker"]
+    selector: str | None = None
+
+
+@dataclass(frozen=True)
+class TagSchema:
+    """Описание полей класса TagChecker, собирается один раз на класс"""
+
+    fields: tuple[FieldSchema, ...]
+    field_validators: dict[str, str] = field(default_factory=dict)
+
+    @cached_property
+    def attributes(self) -> tuple[FieldSchema, ...]:
+        return tuple(field for field in self.fields if field.kind == ATTRIBUTE)
+
+    @cached_property
+    def childrens(self) -> tuple[FieldSchema, ...]:
+        return tuple(field for field in self.fields if field.kind != ATTRIBUTE)
+
+    @cached_property
+    def selectors(self) -> tuple[str, ...]:
+        return tuple(field.selector for field in self.childrens if field.selector)
+
+
+class EmptyMapping(Mapping):
+    """Общий пустой словарь только для чтения, вместо отдельного пустого dict в каждом узле дерева"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> object:
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __repr__(self):
+        return "{}"
+
+    def __reduce__(self):
+        return "EMPTY_MAPPING"
+
+
+EMPTY_MAPPING = EmptyMapping()
+
+
+class BoundFields:
+    """Поля экземпляра TagChecker, разделенные на атрибуты и вложенные теги один раз при привязке.
+
+    Пока полей нужного вида нет, вместо словаря хранится EMPTY_MAPPING.
+    """
+
+    __slots__ = ("attributes", "childrens")
+
+    def __init__(self):
+        self.attributes: Mapping[str, object] = EMPTY_MAPPING
+        self.childrens: Mapping[str, object] = EMPTY_MAPPING
+
+    def __reduce_ex__(self, protocol: int) -> str | tuple:
+        if self is EMPTY_BOUND_FIELDS:
+            return "EMPTY_BOUND_FIELDS"
+        return super().__reduce_ex__(protocol)
+
+    def add(self, name: str, field: Union["HtmlTagAttribute", "TagChecker", "ListTagChecker"], kind: str) -> None:
+        if self is EMPTY_BOUND_FIELDS:
+            raise TypeError("EMPTY_BOUND_FIELDS is read-only")
+        if kind == ATTRIBUTE:
+            if self.attributes is EMPTY_MAPPING:
+                self.attributes = {}
+            self.attributes[name] = field
+        else:
+            if self.childrens is EMPTY_MAPPING:
+                self.childrens = {}
+            self.childrens[name] = field
+
+
+# общий набор для тегов без привязанных полей (элемент не найден)
+EMPTY_BOUND_FIELDS = BoundFields()
@@ -0,0 +1,116 @@
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cache
+from itertools import chain
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .backends import Element, ParserBackend
+
+IDENT = r"-?[^\W\d][\w-]*"
+TAG_RE = re.compile(rf"(?:(?P<tag>{IDENT})|(?P<any>\*))?")
+TOKEN_RE = re.compile(
+    rf"""
+    \#(?P<id>{IDENT})
+    | \.(?P<class>{IDENT})
+    | \[\s*(?P<attr>{IDENT})\s*(?:=\s*(?:(?P<value>{IDENT})|"(?P<dq>[^"\\]*)"|'(?P<sq>[^'\\]*)')\s*)?\]
+    """,
+    re.VERBOSE,
+)
+# soupsieve сравнивает значение атрибута type без учета регистра
+CASE_INSENSITIVE_ATTRIBUTES = ("type",)
+
+
+@dataclass(frozen=True)
+class SimpleSelector:
+    """Селектор без комбинаторов и псевдоклассов: tag#id.class[attr=value]"""
+
+    tag_name: str | None = None
+    ids: tuple[str, ...] = ()
+    classes: tuple[str, ...] = ()
+    attributes: tuple[tuple[str, str | None], ...] = ()
+
+    def match(self, elem: "Element", backend: "ParserBackend") -> bool:
+        if self.tag_name is not None and backend.get_tag_name(elem).lower() != self.tag_name:
+            return False
+        if any(backend.get_attribute(elem, "id") != elem_id for elem_id in self.ids):
+            return False
+        if self.classes:
+            elem_classes = backend.get_classes(elem)
+            if any(class_name not in elem_classes for class_name in self.classes):
+                return False
+        return all(
+            self._match_attribute(backend.get_attribute(elem, name), name, expected)
+            for name, expected in self.attributes
+        )
+
+    @staticmethod
+    def _match_attribute(value: str | None, attribute_name: str, expected: str | None) -> bool:
+        if value is None:
+            return False
+        if expected is None:
+            return True
+        if attribute_name in CASE_INSENSITIVE_ATTRIBUTES:
+            value, expected = value.lower(), expected.lower()
+        # как и регулярка ^value$ в soupsieve, допускаем перевод строки в конце
+        return value in (expected, f"{expected}\n")
+
+
+@cache
+def compile_selector(selector: str) -> SimpleSelector | None:
+    """Разбор простого селектора, None если селектор нужно отдать soupsieve"""
+    selector = selector.strip()
+    tag_match = TAG_RE.match(selector)
+    position = tag_match.end()
+    if position == 0 and not selector.startswith(("#", ".", "[")):
+        return None
+    ids, classes, attributes = [], [], []
+    while position < len(selector):
+        token = TOKEN_RE.match(selector, position)
+        if token is None:
+            return None
+        if token.group("id"):
+            ids.append(token.group("id"))
+        elif token.group("class"):
+            classes.append(token.group("class"))
+        else:
+            value = next((value for value in token.group("value", "dq", "sq") if value is not None), None)
+            attributes.append((token.group("attr").lower(), value))
+        position = token.end()
+    tag_name = tag_match.group("tag")
+    return SimpleSelector(
+        tag_name=tag_name.lower() if tag_name else None,
+        ids=tuple(ids),
+        classes=tuple(classes),
+        attributes=tuple(attributes),
+    )
+
+
+def select_all(elem: "Element", selectors: Iterable[str], backend: "ParserBackend") -> dict[str, list["Element"]]:
+    """Поиск элементов по всем простым селекторам за один обход потомков elem.
+
+    Селекторы, которые не удалось разобрать, в результат не попадают.
+    """
+    results: dict[str, list[Element]] = {}
+    by_tag_name = defaultdict(list)
+    any_tag_name = []
+    for selector in selectors:
+        compiled = compile_selector(selector)
+        if compiled is None or selector in results:
+            continue
+        results[selector] = []
+        if compiled.tag_name is None:
+            any_tag_name.append((selector, compiled))
+        else:
+            by_tag_name[compiled.tag_name].append((selector, compiled))
+    if not results:
+        return results
+    descendants = backend.iter_elements(elem)
+    next(descendants)
+    for node in descendants:
+        for selector, compiled in chain(by_tag_name.get(backend.get_tag_name(node), ()), any_tag_name):
+            if compiled.match(node, backend):
+                results[selector].append(node)
+    return results
@@ -0,0 +1,139 @@
+import json
+from collections.abc import Iterator
+
+from .summary import AttributeSummary, ListSummary, TagSummary
+from .tag import NON_FIELD_ERROR, ListTagChecker, TagChecker
+from .tag_attribut import HtmlTagAttribute
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value: object) -> list | str:
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+_encode = json.JSONEncoder(ensure_ascii=False, default=_json_default).encode
+
+
+def get_tag_header(tag: TagChecker | TagSummary, name: str | None) -> dict:
+    """Поля тэга без ошибок и вложенных полей, общие для convert_to_dict и iter_json"""
+    return {
+        "name": name,
+        "class_name": tag.class_name,
+        "elem_number": tag.elem_number,
+        "path_name": tag.path_name,
+        "depth": tag.depth,
+        "position": tag.position,
+        "type": "Tag",
+        "get_short_display": tag.get_short_display(),
+        "exist": tag.exist(),
+        "error_level": tag.error_level.level,
+    }
+
+
+def get_attribute_header(attribute: HtmlTagAttribute | AttributeSummary) -> dict:
+    return {
+        "name": attribute.name,
+        "type": "attribute",
+        "value": attribute.value,
+        "expected": attribute.expected,
+        "choices": attribute.choices,
+        "error_level": attribute.error_level.level,
+    }
+
+
+def get_tag_errors(tag: TagChecker | TagSummary) -> list[dict]:
+    """Собственные ошибки тэга, ошибки полей выводятся в самих полях"""
+    return [error.to_detail() for error in tag.errors.get(NON_FIELD_ERROR, ())]
+
+
+def has_errors(field: TagChecker | ListTagChecker | HtmlTagAttribute | TagSummary | ListSummary) -> bool:
+    if isinstance(field, (ListTagChecker, ListSummary)):
+        return any(item.has_errors() for item in field.tags_items)
+    if isinstance(field, (TagChecker, TagSummary)):
+        return field.has_errors()
+    return len(field.errors) != 0
+
+
+class _ChunkWriter:
+    """Буфер частей JSON, генераторы обхода отдают из него готовый кусок, когда он набирает chunk_size"""
+
+    __slots__ = ("chunk_size", "parts", "size")
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.parts: list[str] = []
+        self.size = 0
+
+    def write(self, part: str) -> None:
+        self.parts.append(part)
+        self.size += len(part)
+
+    def is_full(self) -> bool:
+        return self.size >= self.chunk_size
+
+    def flush(self) -> str:
+        chunk = "".join(self.parts)
+        self.parts.clear()
+        self.size = 0
+        return chunk
+
+
+def _get_attribute_dict(attribute: HtmlTagAttribute | AttributeSummary) -> dict:
+    return {**get_attribute_header(attribute), "errors": [error.to_detail() for error in attribute.errors]}
+
+
+def _iter_tag(tag: TagChecker | TagSummary, name: str | None, compact: bool, writer: _ChunkWriter) -> Iterator[str]:
+    # заголовок и ошибки кодируются одним вызовом, закрывающая скобка объекта отрезается
+    writer.write(_encode({**get_tag_header(tag, name=name), "errors": get_tag_errors(tag)})[:-1])
+    writer.write(', "children": ')
+    childrens = [(key, field) for key, field in tag.childrens.items() if not compact or has_errors(field)]
+    if childrens:
+        writer.write("{")
+        for number, (key, field) in enumerate(childrens):
+            writer.write(f"{', ' if number else ''}{_encode(key)}: ")
+            if isinstance(field, (ListTagChecker, ListSummary)):
+                writer.write("[")
+                items = [item for item in field.tags_items if not compact or item.has_errors()]
+                for item_number, item in enumerate(items):
+                    if item_number:
+                        writer.write(", ")
+                    yield from _iter_tag(item, name=key, compact=compact, writer=writer)
+                writer.write("]")
+            else:
+                yield from _iter_tag(field, name=key, compact=compact, writer=writer)
+        writer.write("}")
+    else:
+        writer.write("null")
+    # атрибуты - листья дерева, все атрибуты тэга кодируются одним вызовом
+    attributes = {
+        key: _get_attribute_dict(attribute)
+        for key, attribute in tag.attributes.items()
+        if not compact or has_errors(attribute)
+    }
+    writer.write(f', "attrs": {_encode(attributes) if attributes else "null"}}}')
+    if writer.is_full():
+        yield writer.flush()
+
+
+def iter_json(
+    tag: TagChecker | TagSummary,
+    compact: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    extra: dict | None = None,
+) -> Iterator[str]:
+    """Дерево результата проверки в JSON по частям, без промежуточной копии дерева в словарях.
+
+    Схема узла та же, что у convert_to_dict. В режиме compact пропускаются поля без ошибок во всем поддереве.
+    Ключи extra выводятся перед деревом, само дерево лежит в ключе "result".
+    """
+    writer = _ChunkWriter(chunk_size=chunk_size)
+    writer.write("{")
+    for key, value in (extra or {}).items():
+        writer.write(f"{_encode(key)}: {_encode(value)}, ")
+    writer.write('"result": ')
+    yield from _iter_tag(tag, name=tag.field_name, compact=compact, writer=writer)
+    writer.write("}")
+    yield writer.flush()
@@ -0,0 +1,107 @@
+from functools import cache
+
+import lxml.html
+from lxml import etree
+
+from .backends import LxmlBackend, ParserBackend, get_backend
+from .selector import SimpleSelector, compile_selector
+from .tag import GET_ELEMENT_METHOD_NAME, HtmlTag, TagChecker
+
+
+def _is_self_contained(declaration: TagChecker) -> bool:
+    """Тэг и все вложенные тэги ищутся и проверяются только внутри своего элемента"""
+    if not declaration.INCREMENTAL or hasattr(declaration, GET_ELEMENT_METHOD_NAME):
+        return False
+    return all(_is_self_contained(field.declaration) for field in declaration.get_schema().childrens)
+
+
+@cache
+def get_stop_selectors(preset: type[HtmlTag]) -> tuple[SimpleSelector, ...] | None:
+    """Селекторы полей пресета, после закрытия первых подходящих элементов которых разбор можно остановить.
+
+    None - остаток документа может изменить результат и разбирать нужно до конца: у пресета есть списки
+    (many=True) или поля с get_element на верхнем уровне, вложенные тэги смотрят за пределы своего элемента
+    (INCREMENTAL = False), селекторы не простые, или validate пресета может смотреть на весь документ.
+    """
+    tag_schema = preset.get_schema()
+    if preset.validate is not TagChecker.validate or tag_schema.field_validators:
+        return None
+    selectors = []
+    for field in tag_schema.childrens:
+        declaration = field.declaration
+        compiled = compile_selector(field.selector) if field.selector and not declaration.many else None
+        if compiled is None or not _is_self_contained(declaration):
+            return None
+        selectors.append(compiled)
+    return tuple(selectors)
+
+
+# столько первых байт html передаются парсеру одним куском: push-парсер libxml2 2.13 портит память,
+# если первый кусок обрывается внутри <!DOCTYPE ...> в начале документа
+FIRST_CHUNK_BYTES = 1024
+
+
+class StreamingParser:
+    """Разбор html по частям по мере загрузки страницы.
+
+    Части передаются в feed, пока он не вернет True: для каждого селектора stop_selectors найден первый подходящий
+    элемент и закрыт, то есть все, что проверяет пресет, уже есть в дереве. Остаток документа можно не загружать,
+    close достраивает дерево из полученного. stop_selectors None - разбирать до конца.
+    """
+
+    def __init__(self, stop_selectors: tuple[SimpleSelector, ...] | None = None):
+        self.backend: ParserBackend = get_backend(LxmlBackend.name)
+        self.stopped = False
+        # байт html, переданных парсеру
+        self.size = 0
+        self._can_stop = stop_selectors is not None
+        self._parser = etree.HTMLPullParser(events=("start", "end") if self._can_stop else (), encoding="utf-8")
+        self._parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+        self._unmatched = list(stop_selectors or ())
+        # атрибуты корня известны после открывающего тега <html>, он всегда первый
+        self._is_root_started = False
+        # найденные элементы, конца которых еще не было, по id. Ссылка держит прокси lxml, иначе id может смениться
+        self._open_matches: dict[int, lxml.html.HtmlElement] = {}
+        # начало документа, пока набирается FIRST_CHUNK_BYTES, None - уже передано парсеру
+        self._head: bytearray | None = bytearray()
+
+    def feed(self, text: str) -> bool:
+        """Передать часть html, True - результат проверки уже не зависит от остатка документа"""
+        if self.stopped:
+            return True
+        data = text.encode("utf-8")
+        self.size += len(data)
+        if self._head is not None:
+            self._head += data
+            if len(self._head) < FIRST_CHUNK_BYTES:
+                return False
+            data, self._head = bytes(self._head), None
+        self._parser.feed(data)
+        if self._can_stop:
+            self._process_events()
+            self.stopped = self._is_root_started and not (self._unmatched or self._open_matches)
+        return self.stopped
+
+    def _process_events(self) -> None:
+        for event, elem in self._parser.read_events():
+            if event == "end":
+                self._open_matches.pop(id(elem), None)
+                continue
+            self._is_root_started = True
+            if not self.backend.is_element(elem):
+                continue
+            matched = [selector for selector in self._unmatched if selector.match(elem, self.backend)]
+            if matched:
+                self._unmatched = [selector for selector in self._unmatched if selector not in matched]
+                self._open_matches[id(elem)] = elem
+
+    def close(self) -> lxml.html.HtmlElement | None:
+        """Корневой тег <html> полученного документа или None, как у LxmlBackend.parse"""
+        try:
+            if self._head:
+                self._parser.feed(bytes(self._head))
+            self._head = None
+            document = self._parser.close()
+        except etree.LxmlError:
+            return None
+        return document if document is not None and document.tag == "html" else None
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping, Sequence
+
+from . import levels, schema
+from .exceptions import ErrorDetail
+from .tag import ListTagChecker, TagChecker
+from .tag_attribut import HtmlTagAttribute
+
+
+class AttributeSummary:
+    """Атрибут в дереве результата: значение, ожидания и ошибки, без объявления поля"""
+
+    __slots__ = ("name", "value", "expected", "choices", "errors", "error_level")
+
+    def __init__(self, attribute: HtmlTagAttribute):
+        self.name = attribute.name
+        self.value = attribute.value
+        self.expected = attribute.expected
+        self.choices = attribute.choices
+        self.errors: Sequence[ErrorDetail] = attribute.errors
+        self.error_level = attribute.error_level
+
+    def __repr__(self):
+        return f'<AttrSummary:{self.name}="{self.value}">'
+
+
+class ListSummary:
+    __slots__ = ("field_name", "tags_items", "errors")
+
+    def __init__(self, field: ListTagChecker):
+        self.field_name = field.field_name
+        self.tags_items: list[TagSummary] = []
+        self.errors: Sequence[Mapping] = field.errors
+
+    def __iter__(self):
+        return iter(self.tags_items)
+
+    def __len__(self):
+        return len(self.tags_items)
+
+    def exist(self) -> bool:
+        return bool(self.tags_items)
+
+
+class TagSummary:
+    """Тэг в дереве результата: то, что нужно для вывода, без элементов документа и объявлений полей.
+
+    Повторяет интерфейс TagChecker для чтения, которым пользуются serializers, history и отрисовка.
+    Дерево из простых объектов дешево сериализуется, в нем можно вернуть результат из процесса.
+    """
+
+    __slots__ = (
+        "class_name",
+        "field_name",
+        "elem_number",
+        "tag_name",
+        "path_name",
+        "depth",
+        "position",
+        "short_display",
+        "errors",
+        "error_level",
+        "attributes",
+        "childrens",
+        "_exist",
+        "_errors_level_counts",
+    )
+
+    def __init__(self, tag: TagChecker):
+        self.class_name = tag.class_name
+        self.field_name = tag.field_name
+        self.elem_number = tag.elem_number
+        self.tag_name = tag.tag_name
+        self.path_name = tag.path_name
+        self.depth = tag.depth
+        self.position = tag.position
+        self.short_display = tag.get_short_display()
+        # ошибки тэга - словари и списки ErrorDetail без ссылок на тэги, их можно взять как есть
+        self.errors: Mapping[str, list | Mapping] = tag.errors
+        self.error_level = tag.error_level
+        self.attributes: Mapping[str, AttributeSummary] = (
+            {key: AttributeSummary(attribute) for key, attribute in tag.attributes.items()}
+            if tag.attributes
+            else schema.EMPTY_MAPPING
+        )
+        self.childrens: Mapping[str, TagSummary | ListSummary] = schema.EMPTY_MAPPING
+        self._exist = tag.exist()
+        self._errors_level_counts = tag._errors_level_counts
+
+    def __repr__(self):
+        return f"<TagSummary:{self.tag_name}>"
+
+    def exist(self) -> bool:
+        return self._exist
+
+    def get_short_display(self) -> str:
+        return self.short_display
+
+    def has_errors(self) -> bool:
+        return self._errors_level_counts is not None
+
+    def get_errors_levels_stat(self) -> OrderedDict[levels.ErrorLevel, int]:
+        counts = self._errors_level_counts or [0] * len(levels.LEVELS)
+        return OrderedDict(zip(levels.LEVELS, counts))
+
+    def iter_tags(self) -> Iterator["TagSummary"]:
+        """Тэг и все вложенные тэги в том же порядке, что TagChecker.iter_tags"""
+        stack = [self]
+        while stack:
+            tag = stack.pop()
+            yield tag
+            nested = []
+            for field in tag.childrens.values():
+                if isinstance(field, ListSummary):
+                    nested.extend(field.tags_items)
+                else:
+                    nested.append(field)
+            stack.extend(reversed(nested))
+
+
+def summarize(tag: TagChecker) -> TagSummary:
+    """Дерево результата проверки без элементов документа, обход стеком"""
+    root = TagSummary(tag)
+    stack = [(tag, root)]
+    while stack:
+        tag, summary = stack.pop()
+        if not tag.childrens:
+            continue
+        summary.childrens = {}
+        for key, field in tag.childrens.items():
+            if isinstance(field, ListTagChecker):
+                list_summary = ListSummary(field)
+                for item in field.tags_items:
+                    item_summary = TagSummary(item)
+                    list_summary.tags_items.append(item_summary)
+                    stack.append((item, item_summary))
+                summary.childrens[key] = list_summary
+            else:
+                child_summary = TagSummary(field)
+                summary.childrens[key] = child_summary
+                stack.append((field, child_summary))
+    return root
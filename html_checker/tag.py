@@ -1,27 +1,107 @@
-import contextlib
+import hashlib
+import inspect
+import time
 from collections import OrderedDict
-from copy import deepcopy
-from typing import Callable, Optional, Union
-
-from bs4 import Tag
-from bs4.element import AttributeValueList
-
-from . import levels
-from .exceptions import ValidationError
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Callable, Optional, Union
+
+from . import levels, schema
+from .backends import DETACHED_BACKEND, Element, ParserBackend, get_backend_for
+from .exceptions import ErrorDetail, ValidationError
+from .index import DocumentIndex
+from .profiling import get_current_profile
+from .selector import select_all
 from .tag_attribut import HtmlTagAttribute
 
+if TYPE_CHECKING:
+    from .incremental import PreviousCheck
+
 NON_FIELD_ERROR = "non_field_errors"
 GET_ELEMENT_METHOD_NAME = 'get_element'
+FIELD_VALIDATOR_PREFIX = "validate_"
+
+
+def _get_profile_name(root: Optional["TagChecker"], field_name: str | None, class_name: str) -> str:
+    """Имя поля в профиле проверки: <класс родителя>.<поле>, для корня - класс тэга"""
+    if root is None:
+        return class_name
+    return f"{root.class_name}.{field_name}"
+
+
+def _hash_parts(*parts: str) -> str:
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _get_class_source(klass: type) -> str:
+    if klass is object:
+        return ""
+    try:
+        return inspect.getsource(klass)
+    except (OSError, TypeError):
+        return klass.__qualname__
+
+
+def _get_declaration_version(declaration: Union["TagChecker", HtmlTagAttribute]) -> str:
+    if isinstance(declaration, HtmlTagAttribute):
+        return _hash_parts(
+            *(_get_class_source(klass) for klass in declaration.__class__.__mro__),
+            repr(
+                (
+                    declaration.name,
+                    declaration.required,
+                    declaration.ignore_case,
+                    declaration.expected,
+                    declaration.choices,
+                ),
+            ),
+        )
+    return _hash_parts(
+        declaration.get_schema_version(),
+        repr((declaration.selector, declaration.many, declaration.required)),
+        *(
+            f"{name}:{_get_declaration_version(attribute)}"
+            for name, attribute in declaration._attributes_declarations
+        ),
+    )
 
 
 class TagChecker:
     SELECTOR = None
     DEFAULT_ERROR_LEVEL = levels.ERROR
+    # ошибки тэга зависят только от его элемента, при повторной проверке их можно взять из прошлой.
+    # False для тэгов, проверки которых (или validate_<field> родителя для них) смотрят за пределы элемента
+    INCREMENTAL = True
+
+    # __dict__ нужен для привязанных полей: они устанавливаются атрибутами экземпляра с именами полей
+    __slots__ = (
+        "selector",
+        "field_name",
+        "elem",
+        "many",
+        "root",
+        "required",
+        "not_exist_error_level",
+        "elem_number",
+        "document_index",
+        "backend",
+        "_errors",
+        "_error_level",
+        "_errors_level_counts",
+        "_attributes_declarations",
+        "_fields",
+        "_is_fields_bind",
+        "_selected",
+        "_tag_name",
+        "_path_name",
+        "depth",
+        "position",
+        "__dict__",
+    )
 
     def __init__(  # noqa: PLR0913
         self,
         selector: str | None = None,
-        elem: Tag | None = None,
+        elem: Element | None = None,
         many: bool = False,
         required: bool = True,
         root: Optional["TagChecker"] = None,
@@ -34,12 +114,25 @@ class TagChecker:
         self.elem = elem
         self.many = many
         self.root = root
-        self.errors = OrderedDict()
+        self._errors: OrderedDict[str, list | Mapping] | None = None
+        self._error_level = levels.SUCCESS
+        self._errors_level_counts: list[int] | None = None
         self.required = required
         self.not_exist_error_level = not_exist_error_level
         self.elem_number = elem_number
-        self._attributes = attributes
-        self._fields: dict[str, HtmlTagAttribute | TagChecker] = {}
+        self._attributes_declarations = tuple(
+            (name, HtmlTagAttribute(**attribute_data)) for name, attribute_data in (attributes or {}).items()
+        )
+        self._fields = schema.EMPTY_BOUND_FIELDS
+        self._is_fields_bind = False
+        self._selected: dict[str, list[Element]] | None = None
+        self.document_index: DocumentIndex | None = None
+        self.backend: ParserBackend | None = None
+        # вычисляются в fill(), после поиска элемента
+        self._tag_name: str | None = None
+        self._path_name: str | None = None
+        self.depth = 0
+        self.position: int | None = None
 
     def __repr__(self):
         return f"<Tag:{self.tag_name}>"
@@ -47,40 +140,140 @@ class TagChecker:
     def __str__(self):
         return repr(self)
 
-    def _bind_fields(self) -> None:
-        if hasattr(self, "_is_fields_bind"):
-            raise RuntimeError("Fields already bound")
-        self._fields: dict[str, HtmlTagAttribute | TagChecker] = {}
-        for name in dir(self.__class__):
+    def __getstate__(self) -> tuple[dict | None, dict]:
+        # элементы документа не сериализуются, вместо них сохраняется снимок имени и атрибутов
+        state = {name: getattr(self, name) for name in schema.get_slot_names(self.__class__)}
+        if self.elem is not None and self.backend is not None:
+            state["elem"] = self.backend.detach(self.elem)
+            state["backend"] = DETACHED_BACKEND
+        state["document_index"] = None
+        state["_selected"] = None
+        return self.__dict__ or None, state
+
+    @classmethod
+    def get_schema(cls) -> schema.TagSchema:
+        tag_schema = cls.__dict__.get("_schema")
+        if tag_schema is None:
+            tag_schema = cls._build_schema()
+            cls._schema = tag_schema
+        return tag_schema
+
+    @classmethod
+    def _build_schema(cls) -> schema.TagSchema:
+        fields = []
+        field_validators = {}
+        for name in dir(cls):
+            if name.startswith(FIELD_VALIDATOR_PREFIX) and callable(getattr(cls, name)):
+                field_validators[name.removeprefix(FIELD_VALIDATOR_PREFIX)] = name
             if name.startswith(("__", "_")) and name != "_class":
                 continue
-            attr = getattr(self.__class__, name)
+            attr = getattr(cls, name)
             if isinstance(attr, HtmlTagAttribute):
-                field = deepcopy(attr)
-                self._set_field(field=field, field_name=name)
+                fields.append(schema.FieldSchema(name=name, kind=schema.ATTRIBUTE, declaration=attr))
             elif isinstance(attr, TagChecker):
-                field = ListTagChecker(field=attr) if attr.many else deepcopy(attr)
-                self._set_field(field=field, field_name=name)
+                kind = schema.LIST if attr.many else schema.TAG
+                fields.append(schema.FieldSchema(name=name, kind=kind, declaration=attr, selector=attr.selector))
+        return schema.TagSchema(fields=tuple(fields), field_validators=field_validators)
+
+    @classmethod
+    def get_schema_version(cls) -> str:
+        """Хэш исходного кода классов и объявлений полей, меняется при любом изменении пресета"""
+        version = cls.__dict__.get("_schema_version")
+        if version is None:
+            version = _hash_parts(
+                *(_get_class_source(klass) for klass in cls.__mro__),
+                *(
+                    f"{field.name}:{field.kind}:{_get_declaration_version(field.declaration)}"
+                    for field in cls.get_schema().fields
+                ),
+            )
+            cls._schema_version = version
+        return version
+
+    def clone(self) -> "TagChecker":
+        """Копия объявления поля без найденного элемента, ошибок и привязанных полей"""
+        tag = self.__class__.__new__(self.__class__)
+        tag.selector = self.selector
+        tag.field_name = self.field_name
+        tag.elem = self.elem
+        tag.many = self.many
+        tag.root = self.root
+        tag.required = self.required
+        tag.not_exist_error_level = self.not_exist_error_level
+        tag.elem_number = self.elem_number
+        tag.document_index = self.document_index
+        tag.backend = self.backend
+        tag._attributes_declarations = self._attributes_declarations
+        tag._is_fields_bind = self._is_fields_bind
+        tag._errors = None
+        tag._error_level = levels.SUCCESS
+        tag._errors_level_counts = None
+        tag._fields = schema.EMPTY_BOUND_FIELDS
+        tag._selected = None
+        tag._tag_name = None
+        tag._path_name = None
+        tag.depth = 0
+        tag.position = None
+        # слоты, объявленные в наследниках
+        for name in schema.get_slot_names(self.__class__)[len(schema.get_slot_names(TagChecker)):]:
+            setattr(tag, name, getattr(self, name))
+        if self.__dict__:
+            tag.__dict__.update(self.__dict__)
+        return tag
+
+    def _bind_fields(self) -> None:
+        if self._is_fields_bind:
+            raise RuntimeError("Fields already bound")
+        self._fields = schema.BoundFields()
+        for field_schema in self.get_schema().fields:
+            if field_schema.kind == schema.LIST:
+                field = ListTagChecker(field=field_schema.declaration)
+            else:
+                field = field_schema.declaration.clone()
+            self._set_field(field=field, field_name=field_schema.name, kind=field_schema.kind)
         # for attributes from Tag param
-        if self._attributes:
-            for name, attribute_data in self._attributes.items():
-                field = HtmlTagAttribute(**attribute_data)
-                if hasattr(self, name):
-                    raise AttributeError(f'{self} already have attribute "{name}" as field.')
-                self._set_field(field=field, field_name=name)
-        setattr(self, "_is_fields_bind", True)
-
-    def _set_field(self, field: Union["TagChecker", HtmlTagAttribute], field_name: str) -> None:
-        self._fields[field_name] = field
+        for name, declaration in self._attributes_declarations:
+            if hasattr(self, name):
+                raise AttributeError(f'{self} already have attribute "{name}" as field.')
+            self._set_field(field=declaration.clone(), field_name=name, kind=schema.ATTRIBUTE)
+        self._is_fields_bind = True
+
+    def _iter_fields(self) -> Iterator[tuple[str, Union["TagChecker", "ListTagChecker", HtmlTagAttribute]]]:
+        """Привязанные поля в порядке объявления: поля класса, затем атрибуты из параметра attributes"""
+        if self._fields is schema.EMPTY_BOUND_FIELDS:
+            return
+        for field_schema in self.get_schema().fields:
+            yield field_schema.name, getattr(self, field_schema.name)
+        for name, _ in self._attributes_declarations:
+            yield name, getattr(self, name)
+
+    def _set_field(self, field: Union["TagChecker", HtmlTagAttribute], field_name: str, kind: str) -> None:
+        self._fields.add(name=field_name, field=field, kind=kind)
         setattr(self, field_name, field)
         field.bind(root=self, field_name=field_name)
 
     def bind(self, root: "TagChecker", field_name: str) -> None:
         self.root = root
         self.field_name = field_name
+        self.document_index = root.document_index
+        self.backend = root.backend
 
     def fill(self) -> None:
-        self._find_elem()
+        profile = get_current_profile()
+        # элемент тэга из списка уже найден ListTagChecker, его поиск замеряется там
+        if profile is None or self.elem_number is not None:
+            self._find_elem()
+        else:
+            started_at = time.perf_counter()
+            self._find_elem()
+            profile.add_selector(
+                _get_profile_name(self.root, self.field_name, self.class_name),
+                time.perf_counter() - started_at,
+                matched=int(self.elem is not None),
+            )
+        if self.elem is not None and self.backend is None:
+            self.backend = get_backend_for(self.elem)
+        self._set_position()
         if self.elem is not None:
             self._bind_fields()
             self._fill_attributes()
@@ -90,23 +283,52 @@ class TagChecker:
         if hasattr(self, GET_ELEMENT_METHOD_NAME):
             get_element_method = getattr(self, GET_ELEMENT_METHOD_NAME)
             element = get_element_method()
-            if not (isinstance(element, Tag) or element is None):
-                raise TypeError(f"{GET_ELEMENT_METHOD_NAME} method must return bs4.Tag type, not {type(element)}")
+            if not (element is None or self.backend is None or self.backend.is_element(element)):
+                raise TypeError(f"{GET_ELEMENT_METHOD_NAME} method must return html element, not {type(element)}")
             self.elem = element
             return
-        if self.elem:
+        if self.elem is not None:
             return
         if self.selector:
-            self.elem = self.root.elem.select_one(self.selector)
+            self.elem = self.root._select_element(self.selector)
             return
         raise AttributeError(f'Set "elem", "selector", or define "{GET_ELEMENT_METHOD_NAME}" method in your class')
 
+    def _set_position(self) -> None:
+        """Имя тэга, путь, глубина и позиция элемента в документе, запоминаются один раз после поиска элемента"""
+        self._tag_name = self._get_tag_name()
+        self._path_name = self._get_path_name()
+        self.depth = self.root.depth + 1 if self.root is not None else 0
+        if self.elem is not None and self.document_index is not None:
+            self.position = self.document_index.get_position(self.elem)
+
+    def _get_selected(self) -> dict[str, list[Element]]:
+        """Простые селекторы всех дочерних полей, найденные за один обход self.elem"""
+        if self._selected is None:
+            self._selected = select_all(elem=self.elem, selectors=self.get_schema().selectors, backend=self.backend)
+        return self._selected
+
+    def _lookup_elements(self, selector: str) -> list[Element] | None:
+        if self.document_index is not None:
+            return self.document_index.select(selector=selector, scope=self.elem)
+        return self._get_selected().get(selector)
+
+    def _select_elements(self, selector: str) -> list[Element]:
+        elements = self._lookup_elements(selector)
+        if elements is None:
+            return self.backend.select(self.elem, selector)
+        return elements
+
+    def _select_element(self, selector: str) -> Element | None:
+        elements = self._lookup_elements(selector)
+        if elements is None:
+            return self.backend.select_one(self.elem, selector)
+        return elements[0] if elements else None
+
     def _fill_attributes(self) -> None:
         for attribute_field_name, attribute in self.attributes.items():
-            with contextlib.suppress(KeyError):
-                attribute_value = self.elem[attribute.name]
-                if isinstance(attribute_value, AttributeValueList):
-                    attribute_value = " ".join(attribute_value)
+            attribute_value = self.backend.get_attribute(self.elem, attribute.name)
+            if attribute_value is not None:
                 attribute.value = attribute_value
 
     def _fill_childrens(self) -> None:
@@ -114,32 +336,65 @@ class TagChecker:
             children.fill()
 
     def exist(self) -> bool:
-        return bool(self.elem)
+        return self.elem is not None
+
+    def iter_tags(self) -> Iterator["TagChecker"]:
+        """Тэг и все вложенные тэги в порядке полей, для порядка документа можно сортировать по position"""
+        stack = [self]
+        while stack:
+            tag = stack.pop()
+            yield tag
+            nested = []
+            for field in tag.childrens.values():
+                if isinstance(field, ListTagChecker):
+                    nested.extend(field.tags_items)
+                else:
+                    nested.append(field)
+            stack.extend(reversed(nested))
 
     @property
-    def attributes(self) -> dict[str, HtmlTagAttribute]:
-        return {field_name: field for field_name, field in self._fields.items() if isinstance(field, HtmlTagAttribute)}
+    def attributes(self) -> Mapping[str, HtmlTagAttribute]:
+        return self._fields.attributes
 
     @property
-    def childrens(self) -> dict[str, "TagChecker"]:
-        return {field_name: field for field_name, field in self._fields.items() \
-                if isinstance(field, (TagChecker, ListTagChecker))}
+    def childrens(self) -> Mapping[str, Union["TagChecker", "ListTagChecker"]]:
+        return self._fields.childrens
 
     def get_short_display(self) -> str:
-        if self.elem:
-            return f"<{self.elem.name} {self.elem.attrs}>...</{self.elem.name}>"
+        if self.elem is not None:
+            name = self.backend.get_tag_name(self.elem)
+            return f"<{name} {self.backend.get_attributes(self.elem)}>...</{name}>"
         return ""
 
+    def get_text(self) -> str:
+        if self.elem is not None:
+            return self.backend.get_text(self.elem)
+        return ""
+
+    @property
+    def class_name(self) -> str:
+        return self.__class__.__name__
+
     @property
     def tag_name(self) -> str:
-        if self.elem:
-            return self.elem.name
+        if self._tag_name is not None:
+            return self._tag_name
+        return self._get_tag_name()
+
+    def _get_tag_name(self) -> str:
+        if self.elem is not None:
+            return self.backend.get_tag_name(self.elem)
         if self.selector:
             return self.selector
         return self.__class__.__name__
 
     @property
     def path_name(self) -> str:
+        if self._path_name is not None:
+            return self._path_name
+        return self._get_path_name()
+
+    def _get_path_name(self) -> str:
         name = self.selector if self.selector else self.tag_name
         if self.elem_number:
             name = f"{name}-{self.elem_number}"
@@ -147,67 +402,126 @@ class TagChecker:
             name = f"{self.root.path_name} > {name}"
         return name
 
+    @property
+    def errors(self) -> Mapping[str, list | Mapping]:
+        return self._errors if self._errors is not None else schema.EMPTY_MAPPING
+
     @property
     def error_level(self) -> levels.ErrorLevel:
-        # get attributes level errors
-        max_attribute_error_level = levels.SUCCESS
-        if len(self.attributes) != 0:
-            attributes_levels: list[levels.ErrorLevel] = []
-            for attribute in self.attributes.values():
-                attributes_levels.append(attribute.error_level)
-            max_attribute_error_level = max(attributes_levels)
-        # get non_fields (self) level errors
-        if self.errors.get(NON_FIELD_ERROR):
-            max_level_error = max(self.errors[NON_FIELD_ERROR], key=lambda validation_error: validation_error.level)
-            self_error_level = max_level_error.level
-            return max(self_error_level, max_attribute_error_level)
-        return max_attribute_error_level
-
-    def run_validators(self) -> None:
+        """Максимальный уровень ошибок самого тега и его атрибутов, без вложенных тегов"""
+        return self._error_level
+
+    def get_errors_levels_stat(self) -> OrderedDict[levels.ErrorLevel, int]:
+        """Количество ошибок каждого уровня в тэге и всех вложенных полях"""
+        counts = self._errors_level_counts or [0] * len(levels.LEVELS)
+        return OrderedDict(zip(levels.LEVELS, counts))
+
+    def has_errors(self) -> bool:
+        """Есть ли ошибки в тэге или вложенных полях"""
+        return self._errors_level_counts is not None
+
+    def get_errors_count(self) -> int:
+        """Количество ошибок в тэге и всех вложенных полях"""
+        return sum(self._errors_level_counts) if self._errors_level_counts is not None else 0
+
+    def _get_errors_for_update(self) -> OrderedDict[str, list | Mapping]:
+        if self._errors is None:
+            self._errors = OrderedDict()
+        return self._errors
+
+    def add_error(self, error: ValidationError) -> None:
+        self._get_errors_for_update().setdefault(NON_FIELD_ERROR, []).append(ErrorDetail.from_error(error))
+        self._error_level = max(self._error_level, error.level)
+        self._count_error(error)
+
+    def _add_attribute_error(self, error: ValidationError) -> None:
+        self._error_level = max(self._error_level, error.level)
+        self._count_error(error)
+
+    def _count_error(self, error: ValidationError) -> None:
+        # счетчики ведутся сразу у всех предков, поэтому статистика по дереву не требует его обхода
+        level_number = int(error.level)
+        tag = self
+        while tag is not None:
+            if tag._errors_level_counts is None:
+                tag._errors_level_counts = [0] * len(levels.LEVELS)
+            tag._errors_level_counts[level_number] += 1
+            tag = tag.root
+
+    def run_validators(self, previous: "PreviousCheck | None" = None) -> None:
+        """previous - прошлая проверка страницы, ошибки неизменившихся поддеревьев берутся из нее"""
         self._run_non_fields_validators()
         if self.elem is not None:  # запускать валидацию атрибутов и вложенных тегов только если текущий тэг найден
-            self._run_fields_validation()
+            self._run_fields_validation(previous=previous)
 
     def _run_non_fields_validators(self) -> None:
+        profile = get_current_profile()
+        if profile is None:
+            self._run_validate_methods()
+            return
+        with profile.validator(f"{self.class_name}.validate", tag=self):
+            self._run_validate_methods()
+
+    def _run_validate_methods(self) -> None:
         non_fields_validators = [self._required_validation, self.validate]
         for validator in non_fields_validators:
             try:
                 validator()
             except ValidationError as error:
-                self.errors.setdefault(NON_FIELD_ERROR, []).append(error)
-
-    def _run_fields_validation(self) -> None:
-        for field_name, field in self._fields.items():
-            field.run_validators()
-            # run validation from methods validate_<field_name>
-            self._run_custom_field_validator(field_name=field_name)  # must be called after field.run_validators()
+                self.add_error(error)
+
+    def _run_fields_validation(self, previous: "PreviousCheck | None" = None) -> None:
+        for field_name, field in self._iter_fields():
+            # у восстановленного поддерева уже есть и ошибки validate_<field_name>
+            if previous is None or not previous.restore(field):
+                if isinstance(field, HtmlTagAttribute):
+                    field.run_validators()
+                else:
+                    field.run_validators(previous=previous)
+                # run validation from methods validate_<field_name>
+                self._run_custom_field_validator(field_name=field_name)  # must be called after field.run_validators()
             # collect field errors
             if len(field.errors) != 0:
-                self.errors[field_name] = field.errors
+                self._get_errors_for_update()[field_name] = field.errors
+
+    def _collect_fields_errors(self) -> None:
+        """Собрать ошибки полей, как после _run_fields_validation, для поддерева, ошибки которого восстановлены"""
+        for field_name, field in self._iter_fields():
+            if isinstance(field, ListTagChecker) and field.tags_items:
+                field._errors = [item.errors for item in field.tags_items]
+            if len(field.errors) != 0:
+                self._get_errors_for_update()[field_name] = field.errors
 
     def _get_custom_field_validator(self, field_name: str) -> Callable | None:
-        method_field_validation_name = f"validate_{field_name}"
-        for method_name in dir(self):
-            method = getattr(self, method_name)
-            if callable(method) and method_name == method_field_validation_name:
-                return method
-        return None
+        method_name = self.get_schema().field_validators.get(field_name)
+        if method_name is None:
+            return None
+        return getattr(self, method_name)
 
     def _run_custom_field_validator(self, field_name: str) -> None:
         field_validation_method = self._get_custom_field_validator(field_name=field_name)
-        if field_validation_method is not None:
-            field = getattr(self, field_name)
-            try:
-                field_validation_method(field=field)
-            except ValidationError as error:
-                if isinstance(field,TagChecker):
-                    field.errors.setdefault(NON_FIELD_ERROR, []).append(error)
-                elif isinstance(field, ListTagChecker):
-                    self.errors.setdefault(NON_FIELD_ERROR, []).append(error)
-                elif isinstance(field, HtmlTagAttribute):
-                    field.errors.append(error)
-                else:
-                    raise TypeError(f"Unknown class type of field {type(field)}")
+        if field_validation_method is None:
+            return
+        profile = get_current_profile()
+        if profile is None:
+            self._call_custom_field_validator(field_name, field_validation_method)
+            return
+        with profile.validator(f"{self.class_name}.{field_validation_method.__name__}", tag=self):
+            self._call_custom_field_validator(field_name, field_validation_method)
+
+    def _call_custom_field_validator(self, field_name: str, field_validation_method: Callable) -> None:
+        field = getattr(self, field_name)
+        try:
+            field_validation_method(field=field)
+        except ValidationError as error:
+            if isinstance(field,TagChecker):
+                field.add_error(error)
+            elif isinstance(field, ListTagChecker):
+                self.add_error(error)
+            elif isinstance(field, HtmlTagAttribute):
+                field.add_error(error)
+            else:
+                raise TypeError(f"Unknown class type of field {type(field)}")
 
     def _required_validation(self) -> None:
         if self.required and self.elem is None:
@@ -223,13 +537,17 @@ class TagChecker:
 class ListTagChecker:
     DEFAULT_ERROR_LEVEL = levels.ERROR
 
+    __slots__ = ("field", "many", "root", "field_name", "tags_items", "document_index", "backend", "_errors")
+
     def __init__(self, field: TagChecker):
         self.field = field
         self.many = True
         self.root = None
         self.field_name = None
         self.tags_items = []
-        self.errors = []
+        self.document_index: DocumentIndex | None = None
+        self.backend: ParserBackend | None = None
+        self._errors: list[Mapping] | None = None
 
     def __iter__(self):
         return iter(self.tags_items)
@@ -240,30 +558,55 @@ class ListTagChecker:
     def exist(self) -> bool:
         return bool(self.tags_items)
 
+    def __getstate__(self) -> tuple[None, dict]:
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["document_index"] = None
+        return None, state
+
+    @property
+    def errors(self) -> list[Mapping]:
+        """Ошибки элементов списка по порядку, заполняются при проверке. Без элементов - новый пустой список"""
+        return self._errors if self._errors is not None else []
+
     def bind(self, root: "TagChecker", field_name: str) -> None:
         self.root = root
         self.field_name = field_name
+        self.document_index = root.document_index
+        self.backend = root.backend
 
     def fill(self) -> None:
-        elements = self.root.elem.select(self.field.selector)
+        profile = get_current_profile()
+        if profile is None:
+            elements = self.root._select_elements(self.field.selector)
+        else:
+            started_at = time.perf_counter()
+            elements = self.root._select_elements(self.field.selector)
+            profile.add_selector(
+                _get_profile_name(self.root, self.field_name, self.field.class_name),
+                time.perf_counter() - started_at,
+                matched=len(elements),
+            )
         for elem_number, elem in enumerate(elements):
-            field = deepcopy(self.field)
+            field = self.field.clone()
             field.elem = elem
             field.elem_number = elem_number + 1
             field.root = self.root
+            field.document_index = self.root.document_index
+            field.backend = self.root.backend
             self.tags_items.append(field)
             field.fill()
 
-    def run_validators(self) -> None:
+    def run_validators(self, previous: "PreviousCheck | None" = None) -> None:
         try:
             self._required_validation()
         except ValidationError as error:
-            self.root.errors.setdefault(NON_FIELD_ERROR, []).append(error)
+            self.root.add_error(error)
             return
         for field in self.tags_items:
-            field.run_validators()
-        for field in self.tags_items:
-            self.errors.append(field.errors)
+            if previous is None or not previous.restore(field):
+                field.run_validators(previous=previous)
+        if self.tags_items:
+            self._errors = [field.errors for field in self.tags_items]
 
     def _required_validation(self) -> None:
         if self.field.required and len(self.tags_items) == 0:
@@ -273,12 +616,20 @@ class ListTagChecker:
             )
 
 class HtmlTag(TagChecker):
-    def __init__(self, *args, **kwargs):  # noqa: ANN002, ANN003
+    def __init__(
+        self,
+        *args,  # noqa: ANN002
+        document_index: DocumentIndex | None = None,
+        backend: ParserBackend | None = None,
+        **kwargs,  # noqa: ANN003
+    ):
         elem = kwargs.get("elem")
-        if not isinstance(elem, Tag):
-            raise TypeError("Expected bs4.Tag for 'elem'")
-        if elem.name != "html":
-            raise ValueError(f"Expected <html> tag, got <{elem.name}>")
+        backend = backend if backend is not None else get_backend_for(elem)
+        if not backend.is_element(elem):
+            raise TypeError(f"Expected {backend.name} element for 'elem'")
+        tag_name = backend.get_tag_name(elem)
+        if tag_name != "html":
+            raise ValueError(f"Expected <html> tag, got <{tag_name}>")
         super().__init__(
             *args,
             many=False,
@@ -287,4 +638,8 @@ class HtmlTag(TagChecker):
             selector="html",
             **kwargs,
         )
+        self.backend = backend
+        if document_index is None:
+            document_index = DocumentIndex(root=elem, backend=backend)
+        self.document_index = document_index
         self.fill()
@@ -1,12 +1,14 @@
 from typing import Optional, Sequence
 
-from . import levels
-from .exceptions import ValidationError
+from . import levels, schema
+from .exceptions import ErrorDetail, ValidationError
 
 
 class HtmlTagAttribute:
     DEFAULT_ERROR_LEVEL = levels.ERROR
 
+    __slots__ = ("name", "root", "required", "value", "expected", "choices", "ignore_case", "_errors", "_error_level")
+
     def __init__(  # noqa: PLR0913
         self,
         name: str | None = None,
@@ -24,7 +26,8 @@ class HtmlTagAttribute:
         self.expected = expected
         self.choices = choices
         self.ignore_case = ignore_case
-        self.errors = []
+        self._errors: list[ErrorDetail] | None = None
+        self._error_level = levels.SUCCESS
 
         if all([self.expected, self.choices]):
             raise AttributeError("You cant set both of parameters: expected and choices")
@@ -34,12 +37,42 @@ class HtmlTagAttribute:
     def __repr__(self):
         return f'<Attr:{self.name}="{self.value}">'
 
+    @property
+    def errors(self) -> list[ErrorDetail]:
+        """Ошибки атрибута. Список создается при первой ошибке, ошибки добавляются только через add_error:
+        пустой список без ошибок каждый раз новый, и добавленное в него не сохраняется
+        """
+        return self._errors if self._errors is not None else []
+
     @property
     def error_level(self) -> levels.ErrorLevel:
-        if self.errors:
-            max_level_error = max(self.errors, key=lambda validation_error: validation_error.level)
-            return max_level_error.level
-        return levels.SUCCESS
+        return self._error_level
+
+    def add_error(self, error: ValidationError) -> None:
+        if self._errors is None:
+            self._errors = []
+        self._errors.append(ErrorDetail.from_error(error))
+        self._error_level = max(self._error_level, error.level)
+        if self.root is not None:
+            self.root._add_attribute_error(error)
+
+    def clone(self) -> "HtmlTagAttribute":
+        attribute = self.__class__.__new__(self.__class__)
+        attribute.name = self.name
+        attribute.root = self.root
+        attribute.required = self.required
+        attribute.value = self.value
+        attribute.expected = self.expected
+        attribute.choices = self.choices
+        attribute.ignore_case = self.ignore_case
+        attribute._errors = None
+        attribute._error_level = levels.SUCCESS
+        # слоты, объявленные в наследниках
+        for name in schema.get_slot_names(self.__class__)[len(HtmlTagAttribute.__slots__) :]:
+            setattr(attribute, name, getattr(self, name))
+        if hasattr(self, "__dict__"):
+            attribute.__dict__.update(self.__dict__)
+        return attribute
 
     def bind(self, root: "TagChecker", field_name: str) -> None:  # noqa: F821
         self.root = root
@@ -56,18 +89,18 @@ class HtmlTagAttribute:
             try:
                 self.required_validation()
             except ValidationError as error:
-                self.errors.append(error)
+                self.add_error(error)
 
         if self.value is not None:
             try:
                 self.expected_validation()
                 self.choices_validation()
             except ValidationError as error:
-                self.errors.append(error)
+                self.add_error(error)
         try:
             self.validate()
         except ValidationError as error:
-            self.errors.append(error)
+            self.add_error(error)
 
     def required_validation(self) -> None:
         if self.value is None:
@@ -1,90 +1,60 @@
-import re
-from bs4 import Tag
 from collections import OrderedDict
 from collections.abc import Mapping
 
 from html_checker import HtmlTagAttribute, ListTagChecker, TagChecker
 
-from .exceptions import ValidationError
-from .levels import ERROR, INFO, SUCCESS, WARNING, ErrorLevel
+from .backends import Element, ParserBackend, get_backend_for
+from .exceptions import ErrorDetail, ValidationError
+from .index import find_js_functions
+from .levels import ErrorLevel
+from .serializers import get_attribute_header, get_tag_errors, get_tag_header
+from .summary import AttributeSummary, ListSummary, TagSummary
 
 
 def convert_errors(err: dict) -> dict | list | str:
-    if isinstance(err, list):
+    if isinstance(err, (list, tuple)):
         return [convert_errors(e) for e in err]
-    if isinstance(err, ValidationError):
+    if isinstance(err, (ValidationError, ErrorDetail)):
         return err.to_detail()
-    if isinstance(err, dict):
+    if isinstance(err, Mapping):
         return {k: convert_errors(v) for k, v in err.items()}
     return str(err)
 
 
-def convert_to_dict(elem):
-    if isinstance(elem, ListTagChecker):
-        return [convert_to_dict(item) for item in elem.tags_items]
+def convert_to_dict(
+    elem: TagChecker | ListTagChecker | HtmlTagAttribute | TagSummary | ListSummary | AttributeSummary,
+    name: str | None = None,
+) -> dict | list:
+    """Дерево результата в словарях, схема совпадает с serializers.iter_json"""
+    if isinstance(elem, (ListTagChecker, ListSummary)):
+        return [convert_to_dict(item, name=name or elem.field_name) for item in elem.tags_items]
 
-    if isinstance(elem, TagChecker):
+    if isinstance(elem, (TagChecker, TagSummary)):
         return {
-            "name": elem.name,
-            "class_name": elem.__class__.__name__,
-            "elem_number": elem.elem_number,
-            "type": "Tag",
-            "get_short_display": elem.get_short_display(),
-            "exist": bool(elem.elem),
-            "errors": convert_errors(elem.errors),
-            "children": {field_name: convert_to_dict(field) for field_name, field in elem.childrens.items()}
-            if elem.childrens.items()
-            else None,
-            "attrs": {attr_name: convert_to_dict(attr) for attr_name, attr in elem.attributes.items()}
-            if elem.attributes.items()
-            else None,
+            **get_tag_header(elem, name=name or elem.field_name),
+            "errors": get_tag_errors(elem),
+            "children": {key: convert_to_dict(field, name=key) for key, field in elem.childrens.items()} or None,
+            "attrs": {key: convert_to_dict(attr) for key, attr in elem.attributes.items()} or None,
         }
 
-    if isinstance(elem, HtmlTagAttribute):
-        return {
-            "name": elem.name,
-            "type": "attribute",
-            "value": elem.value,
-            "expected": elem.expected,
-            "choices": elem.choices,
-            "errors": convert_errors(elem.errors),
-        }
+    return {
+        **get_attribute_header(elem),
+        "errors": convert_errors(elem.errors),
+    }
 
-    return {"1": "1"}
 
-def find_script_with_js_function(scripts: list[Tag], js_function_name: str) -> Tag | None:
+def find_script_with_js_function(
+    scripts: list[Element],
+    js_function_name: str,
+    backend: ParserBackend | None = None,
+) -> Element | None:
     """Поиск тега script в котором есть указанная функция (поиск по имени)"""
     for script in scripts:
-        pattern = rf"function[\t ]+{re.escape(js_function_name)}[\t ]*\("
-        if re.search(pattern, script.text):
+        script_backend = backend if backend is not None else get_backend_for(script)
+        if js_function_name in find_js_functions(script_backend.get_text(script)):
             return script
     return None
 
 
-def get_errors_levels_stat(tag: TagChecker) -> OrderedDict[ErrorLevel, int]:
-    result = OrderedDict(
-        [
-            (SUCCESS, 0),
-            (INFO, 0),
-            (WARNING, 0),
-            (ERROR, 0),
-        ],
-    )
-
-    def collect_errors(error_collection: list | Mapping) -> None:
-        if isinstance(error_collection, Mapping):
-            for key, value in error_collection.items():
-                collect_errors(error_collection=value)
-        elif isinstance(error_collection, list):
-            for error_item in error_collection:
-                if isinstance(error_item, ValidationError):
-                    result[error_item.level] += 1
-                elif isinstance(error_item, Mapping):
-                    collect_errors(error_collection=error_item)
-                else:
-                    raise TypeError(f"Incorrect error collection type: {type(error_collection)}")
-        else:
-            raise TypeError(f"Incorrect error collection type: {type(error_collection)}")
-
-    collect_errors(tag.errors)
-    return result
+def get_errors_levels_stat(tag: TagChecker | TagSummary) -> OrderedDict[ErrorLevel, int]:
+    return tag.get_errors_levels_stat()